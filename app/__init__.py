@@ -55,6 +55,63 @@ def create_app(config_class=DevelopmentConfig): # Change default here
     bcrypt.init_app(app) # Initialize Bcrypt with the app
     migrate.init_app(app, db) # Initialize Migrate with the app and db
 
+    # --- SQLite Engine Profile ---
+    from .db_engine import configure_sqlite_engine
+    with app.app_context():
+        configure_sqlite_engine(
+            db.engine,
+            profile=app.config.get('SQLITE_ENGINE_PROFILE', 'default'),
+            overrides=app.config.get('SQLITE_PRAGMAS')
+        )
+
+    # --- Compressed News Text ---
+    from .text_compression import configure_text_compression
+    with app.app_context():
+        configure_text_compression(
+            db.engine,
+            dictionary_dir=app.config.get('TEXT_DICTIONARY_DIR'), # None uses app/text_dictionaries
+            level=app.config.get('TEXT_COMPRESSION_LEVEL', 6)
+        )
+
+    # --- Analysis Result Cache ---
+    from .analysis_cache import configure_analysis_cache
+    configure_analysis_cache(
+        enabled=app.config.get('ANALYSIS_CACHE_ENABLED', True),
+        max_entries=app.config.get('ANALYSIS_CACHE_MAX_ENTRIES', 1024),
+        db_path=app.config.get('ANALYSIS_CACHE_DB_PATH'), # None keeps the cache in memory only
+        ttl_seconds=app.config.get('ANALYSIS_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+    )
+
+    # --- Report Payload Cache ---
+    from .payload_cache import configure_payload_cache
+    configure_payload_cache(
+        enabled=app.config.get('PAYLOAD_CACHE_ENABLED', True),
+        max_bytes=app.config.get('PAYLOAD_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+        db_path=app.config.get('PAYLOAD_CACHE_DB_PATH'), # None keeps the cache in memory only
+        shared_max_bytes=app.config.get('PAYLOAD_CACHE_SHARED_MAX_BYTES', 256 * 1024 * 1024),
+        ttl_seconds=app.config.get('PAYLOAD_CACHE_TTL_SECONDS', 24 * 3600)
+    )
+
+    # --- Shared OpenAI Client ---
+    from .openai_client import configure_openai_client
+    configure_openai_client(
+        timeout=app.config.get('OPENAI_TIMEOUT_SECONDS', 30.0),
+        connect_timeout=app.config.get('OPENAI_CONNECT_TIMEOUT_SECONDS', 5.0),
+        max_connections=app.config.get('OPENAI_MAX_CONNECTIONS', 20),
+        max_retries=app.config.get('OPENAI_MAX_RETRIES', 4),
+        requests_per_minute=app.config.get('OPENAI_REQUESTS_PER_MINUTE', 500),
+        tokens_per_minute=app.config.get('OPENAI_TOKENS_PER_MINUTE', 200_000),
+        max_in_flight=app.config.get('OPENAI_MAX_IN_FLIGHT', 16),
+        latency_target=app.config.get('OPENAI_LATENCY_TARGET_SECONDS', 10.0)
+    )
+
+    # --- Analyzer Backend ---
+    from .analyzer_backend import configure_analyzer
+    configure_analyzer(
+        backend=app.config.get('ANALYZER_BACKEND', 'openai'),
+        fallback=app.config.get('ANALYZER_FALLBACK_BACKEND') # None disables degraded-mode fallback
+    )
+
     # --- User Loader for Flask-Login ---
     # Import User model here to avoid circular imports at the top level
     from .models import User
@@ -72,6 +129,17 @@ def create_app(config_class=DevelopmentConfig): # Change default here
     from .main.routes import bp as main_bp
     app.register_blueprint(main_bp) # Register main blueprint without prefix
 
+    # --- CLI Commands ---
+    from .jobs import analysis_worker_command
+    app.cli.add_command(analysis_worker_command) # flask analysis-worker
+    from .ingest import ingest_file_command
+    app.cli.add_command(ingest_file_command) # flask ingest-file
+    from .rollups import rebuild_sentiment_rollups_command
+    app.cli.add_command(rebuild_sentiment_rollups_command) # flask rebuild-sentiment-rollups
+    from .text_compression import train_text_dictionary_command, recompress_news_text_command
+    app.cli.add_command(train_text_dictionary_command) # flask train-text-dictionary
+    app.cli.add_command(recompress_news_text_command) # flask recompress-news-text
+
     # --- Context Processor ---
     # Make variables available to all templates
     @app.context_processor
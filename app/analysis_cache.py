@@ -0,0 +1,194 @@
+# Content-addressed cache for news item analysis results.
+# Results are keyed by a hash of the normalized text, the model name and the prompt version,
+# and kept in two tiers: a bounded in-process LRU in front of a SQLite table with TTL-based expiry.
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from app.openai_api import SingleNewsItemAnalysis
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Normalizes text so that trivially different copies of an article share a cache entry."""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Builds the cache key for a text analyzed with the given model and prompt version."""
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return f"{model}:{prompt_version}:{digest}"
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of SingleNewsItemAnalysis results.
+
+    The first tier is an in-process LRU bounded to `max_entries`. The optional second tier is a
+    SQLite table shared by every process pointing at the same `db_path`; entries there expire
+    after `ttl_seconds`. All methods are thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, ttl_seconds: int = 7 * 24 * 3600):
+        self.max_entries = max(0, int(max_entries))
+        self.db_path = db_path
+        self.ttl_seconds = int(ttl_seconds)
+        self._memory = OrderedDict() # cache_key -> (expires_at, SingleNewsItemAnalysis)
+        self._lock = threading.Lock()
+        self._local = threading.local() # One SQLite connection per thread
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'expired_evictions': 0,
+        }
+        if self.db_path:
+            self._init_db()
+
+    # --- SQLite tier helpers ---
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " cache_key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_analysis_cache_expires_at ON analysis_cache (expires_at)")
+        conn.commit()
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    # --- Public API ---
+    def get(self, key: str) -> Optional[SingleNewsItemAnalysis]:
+        """Returns a copy of the cached analysis for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, analysis = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return analysis.model_copy(deep=True)
+                # Expired in memory; drop it and fall through to the shared tier
+                del self._memory[key]
+                self._counters['expired_evictions'] += 1
+
+        if self.db_path:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT payload, expires_at FROM analysis_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                payload, expires_at = row
+                if expires_at > now:
+                    analysis = SingleNewsItemAnalysis.model_validate_json(payload)
+                    self._remember(key, expires_at, analysis)
+                    self._count('disk_hits')
+                    return analysis.model_copy(deep=True)
+                conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                self._count('expired_evictions')
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, analysis: SingleNewsItemAnalysis):
+        """Stores an analysis result in both tiers."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, expires_at, analysis.model_copy(deep=True))
+        if self.db_path:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, payload, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, analysis.model_dump_json(), now, expires_at)
+            )
+            conn.commit()
+        self._count('stores')
+
+    def _remember(self, key: str, expires_at: float, analysis: SingleNewsItemAnalysis):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._memory[key] = (expires_at, analysis)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._counters['memory_evictions'] += 1
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries from both tiers and returns how many were removed."""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            expired_keys = [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]
+            for key in expired_keys:
+                del self._memory[key]
+            removed += len(expired_keys)
+        if self.db_path:
+            conn = self._connection()
+            cursor = conn.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,))
+            conn.commit()
+            removed += cursor.rowcount
+        self._count('expired_evictions', removed)
+        return removed
+
+    def clear(self):
+        """Removes every entry from both tiers. Counters are kept."""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            conn = self._connection()
+            conn.execute("DELETE FROM analysis_cache")
+            conn.commit()
+
+    def stats(self) -> dict:
+        """Returns hit, miss and eviction counters together with the current tier sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        if self.db_path:
+            stats['disk_entries'] = self._connection().execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        return stats
+
+
+# Process-wide cache instance, configured by create_app()
+_analysis_cache: Optional[AnalysisCache] = None
+
+def configure_analysis_cache(enabled: bool = True, max_entries: int = 1024,
+                             db_path: Optional[str] = None, ttl_seconds: int = 7 * 24 * 3600) -> Optional[AnalysisCache]:
+    """Creates (or disables) the process-wide analysis cache."""
+    global _analysis_cache
+    _analysis_cache = AnalysisCache(max_entries=max_entries, db_path=db_path, ttl_seconds=ttl_seconds) if enabled else None
+    return _analysis_cache
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Returns the process-wide analysis cache, or None if caching is disabled."""
+    return _analysis_cache
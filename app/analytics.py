@@ -0,0 +1,130 @@
+# Cross-report analytics: top keywords and intents over every report a user can access.
+# Everything is computed by GROUP BY queries over the indexed tag tables (see app/news_tags.py),
+# never by loading items. A time budget bounds the response time: on SQLite a progress handler
+# interrupts the queries once the budget is spent, and AnalyticsBudgetExceeded is raised.
+
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import AnalysisReport, analysis_report_shares
+from app.news_tags import keyword_stats, intent_stats
+
+DEFAULT_KEYWORD_LIMIT = 20
+DEFAULT_INTENT_LIMIT = 5
+MAX_TAG_LIMIT = 100
+DEFAULT_TIME_BUDGET_MS = 2000
+# SQLite virtual machine instructions between two checks of the deadline
+_PROGRESS_INTERVAL = 1000
+
+
+class AnalyticsBudgetExceeded(Exception):
+    """Raised when the analytics queries do not finish within their time budget."""
+
+
+def parse_report_ids(value: Optional[str]) -> Optional[List[int]]:
+    """
+    Parses a comma-separated list of report IDs; None or an empty string means all reports.
+
+    Raises:
+        ValueError: If an entry is not an integer.
+    """
+    if not value:
+        return None
+    try:
+        return [int(part) for part in value.split(',') if part.strip()]
+    except ValueError as e:
+        raise ValueError('report_ids must be a comma-separated list of report IDs.') from e
+
+def parse_date_bounds(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Parses YYYY-MM-DD start and end dates (both inclusive) into a half-open UTC range.
+
+    Raises:
+        ValueError: If a date is malformed.
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc) if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1) if end_date else None
+    except ValueError as e:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD.') from e
+    return start, end
+
+def accessible_report_ids(user_id: int, report_ids: Optional[Iterable[int]] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None) -> sa.Select:
+    """
+    SELECT of the IDs of the complete reports `user_id` owns or has been shared, optionally limited
+    to `report_ids` and to reports created in [start, end). IDs the user cannot access are ignored.
+    """
+    shared = sa.select(analysis_report_shares.c.analysis_report_id).where(analysis_report_shares.c.recipient_id == user_id)
+    scope = sa.select(AnalysisReport.id).where(sa.or_(AnalysisReport.user_id == user_id, AnalysisReport.id.in_(shared)),
+                                               AnalysisReport.complete)
+    if report_ids is not None:
+        scope = scope.where(AnalysisReport.id.in_(list(report_ids)))
+    if start is not None:
+        scope = scope.where(AnalysisReport.timestamp >= start)
+    if end is not None:
+        scope = scope.where(AnalysisReport.timestamp < end)
+    return scope
+
+@contextmanager
+def _time_budget(budget_ms: Optional[int]):
+    # Interrupts the SQLite queries run inside the block once budget_ms have passed
+    dbapi_connection = db.session.connection().connection.dbapi_connection
+    if not budget_ms or db.engine.dialect.name != 'sqlite':
+        yield
+        return
+    deadline = time.monotonic() + budget_ms / 1000
+    dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_INTERVAL)
+    try:
+        yield
+    except sa.exc.OperationalError as e:
+        if 'interrupted' not in str(e.orig):
+            raise
+        db.session.rollback()
+        raise AnalyticsBudgetExceeded(f'The analytics query did not finish within {budget_ms} ms. '
+                                      'Narrow the date range or select fewer reports.') from e
+    finally:
+        dbapi_connection.set_progress_handler(None, 0)
+
+def _limit(value: int, name: str) -> int:
+    if value is None or value < 1:
+        raise ValueError(f'{name} must be a positive integer.')
+    return min(value, MAX_TAG_LIMIT)
+
+def user_tag_analytics(user_id: int, report_ids: Optional[Iterable[int]] = None,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       keyword_limit: int = DEFAULT_KEYWORD_LIMIT, intent_limit: int = DEFAULT_INTENT_LIMIT,
+                       time_budget_ms: Optional[int] = DEFAULT_TIME_BUDGET_MS) -> Dict[str, Any]:
+    """
+    Top keywords and intents, with item counts and average sentiment, across the reports a
+    user can access (see accessible_report_ids).
+
+    Args:
+        user_id (int): The requesting user.
+        report_ids (Iterable[int], optional): Only these reports; all accessible reports if None.
+        start, end (datetime, optional): Only reports created in [start, end).
+        keyword_limit (int): Number of keywords returned (capped at MAX_TAG_LIMIT).
+        intent_limit (int): Number of intents returned (capped at MAX_TAG_LIMIT).
+        time_budget_ms (int, optional): Time allowed for the queries; None or 0 for no limit.
+
+    Returns:
+        Dict[str, Any]: 'report_count', 'keywords' and 'intents'; each tag is a dict with
+                        'text', 'count' and 'avg_sentiment', most frequent first.
+
+    Raises:
+        ValueError: If a limit is not a positive integer.
+        AnalyticsBudgetExceeded: If the queries run past the time budget.
+    """
+    keyword_limit = _limit(keyword_limit, 'keyword_limit')
+    intent_limit = _limit(intent_limit, 'intent_limit')
+    scope = accessible_report_ids(user_id, report_ids, start, end)
+    with _time_budget(time_budget_ms):
+        report_count = db.session.scalar(sa.select(sa.func.count()).select_from(scope.subquery()))
+        keywords = keyword_stats(scope, limit=keyword_limit) if report_count else []
+        intents = intent_stats(scope, limit=intent_limit) if report_count else []
+    return {'report_count': report_count, 'keywords': keywords, 'intents': intents}
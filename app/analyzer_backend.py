@@ -0,0 +1,93 @@
+# Pluggable analyzer backends.
+# An AnalyzerBackend turns a news text into a SingleNewsItemAnalysis. The OpenAI backend
+# (app/openai_api.py) is the default; the lexicon backend (app/lexicon_analyzer.py) runs
+# locally without network access. create_app() selects the active and fallback backends
+# from the ANALYZER_BACKEND and ANALYZER_FALLBACK_BACKEND config values.
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Union, TYPE_CHECKING
+
+if TYPE_CHECKING: # Avoid a circular import; openai_api imports this module
+    from app.openai_api import SingleNewsItemAnalysis
+
+
+class AnalyzerBackend(ABC):
+    """
+    Interface implemented by every analysis engine.
+
+    Implementations must raise on failure instead of returning a placeholder result,
+    so callers can count failures and fall back to another backend.
+    """
+    # Registry name, e.g. 'openai'
+    name: str = ''
+    # Model identifier; part of the analysis cache key
+    model_name: str = ''
+    # Version of the prompt or rule set; part of the analysis cache key
+    prompt_version: str = '1'
+    # Whether results are worth storing in the analysis cache
+    cacheable: bool = True
+    # Whether analyze_batch() analyzes several items in one request
+    supports_batching: bool = False
+
+    @abstractmethod
+    def analyze(self, text: str) -> 'SingleNewsItemAnalysis':
+        """Analyzes one text. Raises on failure."""
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Union['SingleNewsItemAnalysis', Exception]]:
+        """
+        Analyzes several texts, returning results in input order. Raises if the batch fails as a
+        whole; an item that fails on its own may be returned as its exception instead.
+        """
+        return [self.analyze(text) for text in texts]
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.model_name}>'
+
+
+def _create_openai_backend() -> AnalyzerBackend:
+    from app.openai_api import OpenAIBackend
+    return OpenAIBackend()
+
+def _create_lexicon_backend() -> AnalyzerBackend:
+    from app.lexicon_analyzer import LexiconBackend
+    return LexiconBackend()
+
+# Backend name -> factory. Factories import lazily so unused engines are never loaded.
+_BACKEND_FACTORIES: Dict[str, Callable[[], AnalyzerBackend]] = {
+    'openai': _create_openai_backend,
+    'lexicon': _create_lexicon_backend,
+}
+
+def register_backend(name: str, factory: Callable[[], AnalyzerBackend]):
+    """Makes a backend available under `name` for the ANALYZER_BACKEND settings."""
+    _BACKEND_FACTORIES[name] = factory
+
+def create_backend(name: str) -> AnalyzerBackend:
+    """Instantiates the backend registered under `name`."""
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown analyzer backend '{name}'. Available: {sorted(_BACKEND_FACTORIES)}")
+    return factory()
+
+
+# Process-wide active and fallback backends, configured by create_app()
+_active_backend: Optional[AnalyzerBackend] = None
+_fallback_backend: Optional[AnalyzerBackend] = None
+
+def configure_analyzer(backend: str = 'openai', fallback: Optional[str] = None):
+    """Selects the active backend and an optional fallback used when it fails."""
+    global _active_backend, _fallback_backend
+    _active_backend = create_backend(backend)
+    _fallback_backend = create_backend(fallback) if fallback and fallback != backend else None
+
+def get_analyzer() -> AnalyzerBackend:
+    """Returns the active backend, defaulting to OpenAI if none was configured."""
+    global _active_backend
+    if _active_backend is None:
+        _active_backend = create_backend('openai')
+    return _active_backend
+
+def get_fallback_analyzer() -> Optional[AnalyzerBackend]:
+    """Returns the degraded-mode backend, or None if fallback is disabled."""
+    return _fallback_backend
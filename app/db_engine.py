@@ -0,0 +1,80 @@
+# SQLite engine profiles.
+# A profile is a set of PRAGMAs run on every new database connection. The 'production'
+# profile lets dashboard reads proceed while /analyze and the workers write:
+# - WAL journal mode: readers no longer block on, or get blocked by, a writer,
+# - synchronous=NORMAL: in WAL mode, fsync only at checkpoints instead of on every commit,
+# - mmap_size/cache_size/temp_store: keep hot pages and temporary sort data in memory,
+# - busy_timeout: wait for a competing writer instead of failing with "database is locked",
+# - foreign_keys: enforce the schema's foreign keys and ON DELETE CASCADE rules.
+
+import re
+from typing import Any, Dict, Optional
+
+import sqlalchemy as sa
+
+# Every PRAGMA a profile may set, in the order they are applied (busy_timeout first, so that
+# switching to WAL waits for other connections instead of failing)
+SQLITE_PRAGMA_NAMES = ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size',
+                       'temp_store', 'foreign_keys')
+_PRAGMA_VALUE_RE = re.compile(r'-?\w+')
+
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # SQLite's own defaults (rollback journal, synchronous=FULL)
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024, # 256 MB
+        'cache_size': -64 * 1024,       # Negative values are KiB: 64 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,           # Milliseconds
+        'foreign_keys': 'ON',
+    },
+}
+
+
+def sqlite_pragmas(profile: str = 'default', overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Returns the PRAGMAs of a profile, with `overrides` applied (a None value removes a PRAGMA).
+
+    Raises:
+        ValueError: If the profile or an overridden PRAGMA is unknown, or a value is not a plain word or number.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite engine profile '{profile}'. Use one of: {', '.join(SQLITE_PROFILES)}.")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name, value in (overrides or {}).items():
+        if name not in SQLITE_PRAGMA_NAMES:
+            raise ValueError(f"Unsupported SQLite PRAGMA '{name}'. Use one of: {', '.join(SQLITE_PRAGMA_NAMES)}.")
+        if value is None:
+            pragmas.pop(name, None)
+        elif not _PRAGMA_VALUE_RE.fullmatch(str(value)):
+            raise ValueError(f"Invalid value for SQLite PRAGMA '{name}': {value!r}")
+        else:
+            pragmas[name] = value
+    return pragmas
+
+def configure_sqlite_engine(engine: sa.engine.Engine, profile: str = 'default',
+                            overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Applies a profile's PRAGMAs to every connection `engine` opens. Engines for other databases
+    are left untouched.
+
+    Returns:
+        Dict[str, Any]: The PRAGMAs that will be applied (empty for non-SQLite engines).
+    """
+    pragmas = sqlite_pragmas(profile, overrides)
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return {}
+    statements = [f"PRAGMA {name}={pragmas[name]}" for name in SQLITE_PRAGMA_NAMES if name in pragmas]
+
+    @sa.event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return pragmas
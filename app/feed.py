@@ -0,0 +1,269 @@
+# Keyset (cursor) pagination of a report's news item feed.
+# The feed is ordered newest first (publication_date DESC NULLS LAST, id DESC). A page starts
+# after the last item of the previous one instead of at an OFFSET, so every page is an index
+# seek on ix_news_item_report_feed and costs the same at any depth. The optional total is
+# cached per report version and filter set, since counting a large report is the expensive part.
+# Responses are assembled from the JSON each item was stored with (NewsItem.feed_json), without
+# loading the items or re-serializing them.
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db
+from app.models import AnalysisReport, NewsItem
+from app.news_tags import has_intent, has_keyword
+
+DEFAULT_FEED_PAGE_SIZE = 10
+MAX_FEED_PAGE_SIZE = 100
+FEED_FILTER_FIELDS = ('date_range', 'sentiment_min', 'sentiment_max', 'intent', 'keyword')
+
+# Totals are keyed by the report's version stamp, so a change made by any process retires them;
+# the lifetime and entry count only bound the cache
+FEED_TOTAL_TTL_SECONDS = 60
+FEED_TOTAL_MAX_ENTRIES = 1024
+
+
+class FeedPosition(NamedTuple):
+    """Decoded cursor: the sort key of the item a page starts after, and the paging direction."""
+    publication_date: Optional[datetime]
+    id: int
+    backwards: bool
+
+
+def encode_cursor(item: NewsItem, backwards: bool = False) -> str:
+    """Builds the opaque cursor for the page after (or, if `backwards`, before) `item`."""
+    payload = {
+        'd': item.publication_date.isoformat() if item.publication_date else None,
+        'i': item.id,
+        'b': backwards
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> FeedPosition:
+    """
+    Decodes a cursor built by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        date_str, item_id, backwards = payload['d'], payload['i'], payload['b']
+        if not isinstance(item_id, int) or not isinstance(backwards, bool):
+            raise TypeError
+        return FeedPosition(datetime.fromisoformat(date_str) if date_str is not None else None, item_id, backwards)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError('Invalid cursor.') from e
+
+def _number(filters: Dict[str, Any], field: str) -> float:
+    try:
+        return float(filters[field])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'{field} must be a number.') from e
+
+def feed_filter_clauses(report_id: int, filters: Dict[str, Any]) -> List[Any]:
+    """
+    Builds the WHERE clauses of the dashboard feed filters (see FEED_FILTER_FIELDS).
+
+    Raises:
+        ValueError: If a date range or sentiment bound is malformed.
+    """
+    clauses = []
+    # Date range filter
+    date_range_str = filters.get('date_range')
+    if date_range_str:
+        try:
+            start_date_str, end_date_str = date_range_str.split(' to ')
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1) # end_date is exclusive
+        except ValueError as e:
+            raise ValueError('Invalid date range format. Use YYYY-MM-DD to YYYY-MM-DD') from e
+        clauses += [NewsItem.publication_date >= start_date, NewsItem.publication_date < end_date]
+
+    # Sentiment range filter (e.g., from -1 to +1)
+    if filters.get('sentiment_min') is not None:
+        clauses.append(NewsItem.sentiment_score >= _number(filters, 'sentiment_min'))
+    if filters.get('sentiment_max') is not None:
+        clauses.append(NewsItem.sentiment_score <= _number(filters, 'sentiment_max'))
+
+    # Intent and keyword filters (exact, case-insensitive match through the tag tables)
+    if filters.get('intent'):
+        clauses.append(has_intent(str(filters['intent']), report_id=report_id))
+    if filters.get('keyword'):
+        clauses.append(has_keyword(str(filters['keyword']), report_id=report_id))
+    return clauses
+
+
+# The feed in two segments, each read with an index seek: dated items, then undated ones
+# (row values compare as NULL against a NULL date, so the segments are queried separately).
+# Both are ordered by (publication_date, id), the index order; the date is constant among
+# undated items, so this is their id order.
+def _segment_where(dated: bool, position: Optional[FeedPosition]) -> List[Any]:
+    # WHERE clauses of one segment, bounded by the cursor if it lies in the segment
+    if dated:
+        where = [NewsItem.publication_date.is_not(None)]
+        if position is not None and position.publication_date is not None:
+            key = sa.tuple_(NewsItem.publication_date, NewsItem.id)
+            bound = (position.publication_date, position.id)
+            where.append(key > bound if position.backwards else key < bound)
+    else:
+        where = [NewsItem.publication_date.is_(None)]
+        if position is not None and position.publication_date is None:
+            where.append(NewsItem.id > position.id if position.backwards else NewsItem.id < position.id)
+    return where
+
+def _segments(position: Optional[FeedPosition], include_undated: bool) -> List[List[Any]]:
+    # Segments to read, in reading order, starting with the one holding the cursor
+    if position is None:
+        dated_order = [True, False]
+    elif position.publication_date is None:
+        dated_order = [False, True] if position.backwards else [False]
+    else:
+        dated_order = [True] if position.backwards else [True, False]
+    return [_segment_where(dated, position) for dated in dated_order if dated or include_undated]
+
+# Columns of NewsItem.usage_json(), read along with feed_json when the viewer is the report's author
+USAGE_COLUMNS = (NewsItem.usage_model, NewsItem.prompt_tokens, NewsItem.completion_tokens, NewsItem.cached_tokens,
+                 NewsItem.latency_ms, NewsItem.retries, NewsItem.cost_usd)
+
+def item_json(item_id: int, feed_json: str, usage_json: Optional[str] = None) -> str:
+    """
+    The JSON object of NewsItem.to_dict(): the stored feed_json with the item's 'id' put in
+    front, and the 'usage' object (NewsItem.usage_json) at the end if given.
+    """
+    if usage_json is None:
+        return f'{{"id":{item_id},{feed_json[1:]}'
+    return f'{{"id":{item_id},{feed_json[1:-1]},"usage":{usage_json}}}'
+
+def _encoded_items(rows: List[Any], include_usage: bool) -> List[str]:
+    # The JSON of each (id, publication_date, feed_json[, usage columns]) row; items without a
+    # stored feed_json (written by other clients) are loaded and serialized instead
+    missing = [row.id for row in rows if row.feed_json is None]
+    loaded = {item.id: item for item in db.session.scalars(sa.select(NewsItem).where(NewsItem.id.in_(missing)))} if missing else {}
+    return [item_json(row.id, row.feed_json, NewsItem.usage_json(row) if include_usage else None)
+            if row.feed_json is not None else
+            json.dumps(loaded[row.id].to_dict(include_usage=include_usage), separators=(',', ':')) for row in rows]
+
+def encode_with_items(fields: Dict[str, Any], items: List[str], key: str = 'news_items') -> bytes:
+    """Encodes a JSON object of `fields` plus `key`, the list of the pre-encoded `items`."""
+    head = json.dumps(fields, separators=(',', ':'))
+    return f'{head[:-1]}{"," if fields else ""}"{key}":[{",".join(items)}]}}'.encode('utf-8')
+
+def news_feed_page(report_id: int, filters: Optional[Dict[str, Any]] = None, cursor: Optional[str] = None,
+                   per_page: int = DEFAULT_FEED_PAGE_SIZE, encoded: bool = False,
+                   include_usage: bool = False) -> Dict[str, Any]:
+    """
+    Returns one page of a report's feed, newest first.
+
+    Args:
+        report_id (int): The report whose items are listed.
+        filters (dict, optional): Dashboard filters (see feed_filter_clauses).
+        cursor (str, optional): next_cursor or prev_cursor of a previous page; None for the first page.
+        per_page (int): Page size (capped at MAX_FEED_PAGE_SIZE).
+        encoded (bool): Return the items' JSON (see item_json) instead of NewsItem objects.
+                        Only the ID, date and stored JSON of each item are read.
+        include_usage (bool): With `encoded`, add each item's usage telemetry (for the report's author).
+
+    Returns:
+        Dict[str, Any]: 'items' (NewsItem objects, or JSON strings if `encoded`), 'next_cursor'/'prev_cursor'
+                        (None at either end), 'has_next'/'has_prev' and 'per_page'.
+
+    Raises:
+        ValueError: If the cursor, the page size or a filter is malformed.
+    """
+    filters = filters or {}
+    try:
+        per_page = min(max(int(per_page), 1), MAX_FEED_PAGE_SIZE)
+    except (TypeError, ValueError) as e:
+        raise ValueError('per_page must be a number.') from e
+    position = decode_cursor(cursor) if cursor else None
+    backwards = position is not None and position.backwards
+
+    # Read one item more than the page holds, to learn whether there is another page
+    columns = [NewsItem.id, NewsItem.publication_date, NewsItem.feed_json] if encoded else [NewsItem]
+    if encoded and include_usage:
+        columns += USAGE_COLUMNS
+    base = sa.select(*columns).where(NewsItem.analysis_report_id == report_id, *feed_filter_clauses(report_id, filters))
+    order_by = [NewsItem.publication_date.asc(), NewsItem.id.asc()] if backwards else \
+               [NewsItem.publication_date.desc(), NewsItem.id.desc()]
+    items: List[Any] = []
+    # A date range excludes undated items, so their segment is not queried
+    for where in _segments(position, include_undated=not filters.get('date_range')):
+        result = db.session.execute(base.where(*where).order_by(*order_by).limit(per_page + 1 - len(items)))
+        items += result.all() if encoded else result.scalars().all()
+        if len(items) > per_page:
+            break
+    more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    # Coming from a cursor means there are items on the side we came from
+    has_next = more if not backwards else position is not None
+    has_prev = more if backwards else position is not None
+    return {
+        'items': _encoded_items(items, include_usage) if encoded else items,
+        'next_cursor': encode_cursor(items[-1]) if items and has_next else None,
+        'prev_cursor': encode_cursor(items[0], backwards=True) if items and has_prev else None,
+        'has_next': has_next,
+        'has_prev': has_prev,
+        'per_page': per_page
+    }
+
+
+_totals_lock = threading.Lock()
+
+def _totals() -> OrderedDict:
+    # Per application, so apps sharing a process (e.g. in tests) never see each other's totals
+    return current_app.extensions.setdefault('feed_totals', OrderedDict()) # (report_id, version, filters JSON) -> (expires_at, total)
+
+def feed_total(report: AnalysisReport, filters: Dict[str, Any]) -> int:
+    """
+    Number of items in a report's feed matching `filters`, cached for the report's current
+    version (see reports.touch_report) for at most FEED_TOTAL_TTL_SECONDS.
+
+    Raises:
+        ValueError: If a filter is malformed (see feed_filter_clauses).
+    """
+    key = (report.id, report.version, json.dumps({field: filters.get(field) for field in FEED_FILTER_FIELDS}, sort_keys=True, default=str))
+    now = time.monotonic()
+    totals = _totals()
+    with _totals_lock:
+        cached = totals.get(key)
+        if cached is not None and cached[0] > now:
+            totals.move_to_end(key)
+            return cached[1]
+
+    total = db.session.scalar(sa.select(sa.func.count()).select_from(NewsItem).where(
+        NewsItem.analysis_report_id == report.id, *feed_filter_clauses(report.id, filters)))
+    with _totals_lock:
+        totals[key] = (now + FEED_TOTAL_TTL_SECONDS, total)
+        totals.move_to_end(key)
+        while len(totals) > FEED_TOTAL_MAX_ENTRIES:
+            totals.popitem(last=False)
+    return total
+
+def feed_request_params(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parameters a feed response depends on, normalized so that equal GET (query string) and
+    POST (JSON) requests share their validators and cached payloads.
+    """
+    params = {field: str(filters[field]) for field in FEED_FILTER_FIELDS + ('cursor', 'per_page')
+              if filters.get(field) is not None}
+    params['include_total'] = bool(filters.get('include_total'))
+    return params
+
+def invalidate_feed_totals(report_id: int) -> None:
+    """Drops this process's cached totals of a report's earlier versions, after items were added to it."""
+    totals = _totals()
+    with _totals_lock:
+        for key in [key for key in totals if key[0] == report_id]:
+            del totals[key]
@@ -2,7 +2,8 @@
 # Includes forms for user login, registration, and sentiment analysis submission.
 
 from flask_wtf import FlaskForm # Base class for Flask-WTF forms
-from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField, EmailField, SelectMultipleField, HiddenField
+from flask_wtf.file import FileField, FileRequired, FileAllowed # File uploads for bulk ingestion
+from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField, EmailField, SelectMultipleField, HiddenField, SelectField
 from wtforms.validators import DataRequired, Length, EqualTo, ValidationError, Email, Optional as WTFormsOptional, Regexp
 import sqlalchemy as sa
 
@@ -87,9 +88,25 @@ class AnalysisForm(FlaskForm):
     news_text = TextAreaField('News Articles Text (one article per line or separated by double newlines)', 
                               validators=[DataRequired(), Length(min=10, max=50000)],
                               render_kw={"rows": 15, "placeholder": "Paste your news articles here. For multiple articles, place each on a new line or separate them with a blank line."})
+    # How news_text is split into articles; 'auto' picks the marker, blank lines or lines
+    split_mode = SelectField('Split Articles By', default='auto',
+                             choices=[('auto', 'Auto-detect'),
+                                      ('blank', 'Blank line between articles'),
+                                      ('line', 'One article per line'),
+                                      ('marker', '---NEXT_ITEM--- marker')])
     submit = SubmitField('Analyze and Create Report')
 
 
+class UploadAnalysisForm(FlaskForm):
+    """Form for uploading a CSV, JSONL or NDJSON news feed (optionally gzipped) for bulk analysis."""
+    report_name = StringField('Report Name (Optional)', validators=[WTFormsOptional(), Length(max=128)])
+    news_file = FileField('News File', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'jsonl', 'ndjson', 'gz'], 'Upload a .csv, .jsonl or .ndjson file, optionally gzipped.')
+    ])
+    submit = SubmitField('Upload and Analyze')
+
+
 class ShareReportForm(FlaskForm):
     """Form for sharing an analysis report with another user."""
     # Renamed from ShareForm to ShareReportForm for clarity
@@ -0,0 +1,67 @@
+# Conditional GET (ETag / Last-Modified) for report pages and APIs.
+# A representation's validators come from the report's version stamp (AnalysisReport.version,
+# bumped by reports.touch_report whenever its items, aggregates or sharing change). They are
+# checked right after the report row is loaded, so a repeat request for an unchanged report is
+# answered with 304 Not Modified before any item is read.
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, NamedTuple, Optional
+
+from flask import Response, current_app, request
+
+from app.models import AnalysisReport
+
+# Clients may store the responses but must revalidate them on every use
+CACHE_CONTROL = 'private, no-cache'
+
+
+class Validators(NamedTuple):
+    """The strong ETag and the Last-Modified time of one representation of a report."""
+    etag: str
+    last_modified: datetime
+
+
+def template_fingerprint(*template_names: str) -> str:
+    """Hash of the source of templates, so a deploy that changes a page also changes its ETags."""
+    fingerprints = current_app.extensions.setdefault('template_fingerprints', {})
+    if template_names not in fingerprints:
+        env = current_app.jinja_env
+        digest = hashlib.sha256()
+        for name in template_names:
+            digest.update(env.loader.get_source(env, name)[0].encode('utf-8'))
+        fingerprints[template_names] = digest.hexdigest()[:16]
+    return fingerprints[template_names]
+
+def report_validators(report: AnalysisReport, *variant: Any) -> Validators:
+    """
+    Validators of a representation of `report`. `variant` holds whatever else the response
+    depends on (e.g. the viewing user or the filters); it must be JSON-serializable.
+    """
+    key = json.dumps([report.id, report.version, *variant], sort_keys=True, separators=(',', ':'), default=str)
+    last_modified = report.updated_at or report.timestamp
+    if last_modified.tzinfo is None: # SQLite returns naive UTC datetimes
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return Validators(f'r{report.id}-v{report.version}-{hashlib.sha256(key.encode()).hexdigest()[:16]}',
+                      last_modified.replace(microsecond=0))
+
+def not_modified(validators: Validators) -> Optional[Response]:
+    """
+    A 304 response if the request's If-None-Match (or, without it, If-Modified-Since) matches,
+    else None. Only GET and HEAD requests are conditional.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(validators.etag)
+    else:
+        matched = request.if_modified_since is not None and validators.last_modified <= request.if_modified_since
+    return with_validators(Response(status=304), validators) if matched else None
+
+def with_validators(response: Response, validators: Validators) -> Response:
+    """Adds the ETag, Last-Modified and Cache-Control headers to a response."""
+    response.set_etag(validators.etag)
+    response.last_modified = validators.last_modified
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
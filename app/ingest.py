@@ -0,0 +1,323 @@
+# Bulk ingestion of news feeds uploaded as CSV, JSONL or NDJSON files (optionally gzipped).
+# Files are parsed record by record and analyzed in fixed-size chunks; each chunk's
+# NewsItems are committed and released before the next chunk is read, so memory use
+# stays flat however large the file is. Each chunk is also merged into the report's
+# aggregates (reports.ReportAggregator), so the stored items are never read back. The
+# report stays hidden (AnalysisReport.complete) until its last chunk is stored.
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import AnalysisJob, AnalysisReport, NewsItem, NewsItemKeyword, NewsItemIntent, User
+from app.openai_api import iter_text_analyses, analysis_options_from_config, SingleNewsItemAnalysis
+from app.reports import (ReportAggregator, news_item_values, insert_news_items, parse_publication_date,
+                         touch_report, usage_totals, merge_usage_totals)
+from app.rollups import sentiment_totals, add_report_totals
+from app.text_segmenter import limit_item_tokens, MIN_ITEM_CHARS, DEFAULT_MAX_ITEM_TOKENS, OVERSIZE_SPLIT
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+# File extensions (after stripping .gz) mapped to their format
+FORMAT_EXTENSIONS = {'.csv': FORMAT_CSV, '.jsonl': FORMAT_JSONL, '.ndjson': FORMAT_JSONL}
+ALLOWED_EXTENSIONS = ('csv', 'jsonl', 'ndjson', 'gz')
+
+# Recognized column names, in order of preference. Only a text column is required.
+TEXT_FIELDS = ('text', 'content', 'body', 'article', 'news_text', 'description')
+TITLE_FIELDS = ('title', 'headline')
+DATE_FIELDS = ('publication_date', 'published_at', 'published', 'pub_date', 'date')
+SOURCE_FIELDS = ('source', 'publisher', 'outlet', 'feed')
+
+# Number of articles analyzed and committed together
+DEFAULT_CHUNK_SIZE = 200
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class IngestedArticle(NamedTuple):
+    """One article read from an uploaded file."""
+    text: str
+    publication_date: Optional[datetime] = None
+    source: Optional[str] = None
+
+
+def detect_format(filename: str) -> str:
+    """
+    Returns the ingest format for `filename` from its extension, ignoring a trailing .gz.
+
+    Raises:
+        ValueError: If the extension is not .csv, .jsonl or .ndjson.
+    """
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    file_format = FORMAT_EXTENSIONS.get(os.path.splitext(name)[1])
+    if file_format is None:
+        raise ValueError(f"Unsupported file type '{filename}'. Upload a .csv, .jsonl or .ndjson file, optionally gzipped.")
+    return file_format
+
+def _is_gzip(stream: BinaryIO, filename: str) -> bool:
+    if stream.seekable():
+        position = stream.tell()
+        magic = stream.read(2)
+        stream.seek(position)
+        return magic == GZIP_MAGIC
+    return filename.lower().endswith('.gz')
+
+def open_text_stream(stream: BinaryIO, filename: str) -> io.TextIOBase:
+    """Wraps a binary upload in a decoding text stream, decompressing gzip on the fly."""
+    if _is_gzip(stream, filename):
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    # utf-8-sig drops the byte order mark spreadsheet exports often start with
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+
+def _pick(record: Dict[str, Any], fields: Iterable[str]) -> Optional[str]:
+    for field in fields:
+        value = record.get(field)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+def record_to_article(record: Dict[str, Any]) -> Optional[IngestedArticle]:
+    """
+    Maps one parsed row or JSON object onto an article. Column names are matched
+    case-insensitively; a title column, if present, is prepended to the text.
+
+    Returns:
+        Optional[IngestedArticle]: None if the record has no text.
+    """
+    record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    text = _pick(record, TEXT_FIELDS)
+    if text is None:
+        return None
+    title = _pick(record, TITLE_FIELDS)
+    if title and not text.startswith(title):
+        text = f"{title}\n{text}"
+    date_str = _pick(record, DATE_FIELDS)
+    source = _pick(record, SOURCE_FIELDS)
+    return IngestedArticle(
+        text=text,
+        publication_date=parse_publication_date(date_str) if date_str else None,
+        source=source[:256] if source else None
+    )
+
+def iter_csv_records(text_stream: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    """Yields each CSV row as a dict keyed by the header row."""
+    yield from csv.DictReader(text_stream)
+
+def iter_jsonl_records(text_stream: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    """
+    Yields each non-empty line of a JSONL/NDJSON stream as a dict.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number} is not valid JSON: {e.msg}") from e
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number} is not a JSON object.")
+        yield record
+
+def iter_articles(stream: BinaryIO, filename: str, file_format: Optional[str] = None,
+                  max_item_tokens: Optional[int] = DEFAULT_MAX_ITEM_TOKENS,
+                  oversize: str = OVERSIZE_SPLIT, min_chars: int = MIN_ITEM_CHARS) -> Iterator[IngestedArticle]:
+    """
+    Stream-parses an uploaded file into articles ready for analysis.
+
+    Args:
+        stream (BinaryIO): The uploaded file, opened in binary mode.
+        filename (str): Original file name, used to detect the format and gzip compression.
+        file_format (str, optional): 'csv' or 'jsonl'; detected from `filename` if omitted.
+        max_item_tokens (int, optional): Per-item token limit, as for pasted submissions.
+        oversize (str): 'split' or 'trim' for articles over the limit. Split parts keep the
+                        article's date and source.
+        min_chars (int): Articles shorter than this are skipped.
+
+    Yields:
+        IngestedArticle: Articles in file order.
+    """
+    file_format = file_format or detect_format(filename)
+    text_stream = open_text_stream(stream, filename)
+    records = iter_csv_records(text_stream) if file_format == FORMAT_CSV else iter_jsonl_records(text_stream)
+    for record in records:
+        article = record_to_article(record)
+        if article is None or len(article.text) < min_chars:
+            continue
+        for part in limit_item_tokens(article.text, max_item_tokens, oversize):
+            if len(part) >= min_chars:
+                yield article._replace(text=part)
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yields consecutive lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def discard_partial_report(report_id: int) -> None:
+    """
+    Deletes a report whose ingest did not complete, with the items committed so far, and unlinks
+    it from its job. Its items were never added to the rollups. Complete reports are left alone.
+    """
+    complete = db.session.scalar(db.select(AnalysisReport.complete).where(AnalysisReport.id == report_id))
+    if complete is not False:
+        return
+    db.session.execute(db.update(AnalysisJob).where(AnalysisJob.analysis_report_id == report_id)
+                       .values(analysis_report_id=None))
+    db.session.execute(db.delete(NewsItemKeyword).where(NewsItemKeyword.analysis_report_id == report_id))
+    db.session.execute(db.delete(NewsItemIntent).where(NewsItemIntent.analysis_report_id == report_id))
+    db.session.execute(db.delete(NewsItem).where(NewsItem.analysis_report_id == report_id))
+    db.session.execute(db.delete(AnalysisReport).where(AnalysisReport.id == report_id))
+    db.session.commit()
+
+def ingest_articles(user_id: int, report_name: str, articles: Iterable[IngestedArticle],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    analysis_options: Optional[Dict[str, Any]] = None,
+                    on_progress: Optional[Callable[[int, int], None]] = None,
+                    on_start: Optional[Callable[[int], None]] = None,
+                    on_complete: Optional[Callable[[int], None]] = None) -> AnalysisReport:
+    """
+    Analyzes a stream of articles chunk by chunk and stores them as one AnalysisReport.
+
+    The report is created hidden (complete=False), so it is not listed, searched or shown
+    while its items are being added, and is made visible in the transaction that stores its
+    aggregates.
+
+    Args:
+        user_id (int): ID of the report's author.
+        report_name (str): Display name of the report.
+        articles (Iterable[IngestedArticle]): Articles to analyze, typically from iter_articles().
+        chunk_size (int): Articles analyzed and committed per batch.
+        analysis_options (dict, optional): Keyword arguments for iter_text_analyses().
+        on_progress (callable, optional): Called as on_progress(items_done, items_failed) in each
+                                          chunk's transaction, before it is committed. An exception
+                                          it raises aborts the ingest.
+        on_start (callable, optional): Called as on_start(report_id) in the transaction that creates
+                                       the hidden report.
+        on_complete (callable, optional): Called as on_complete(report_id) in the transaction that
+                                          makes the report visible. An exception it raises aborts the ingest.
+
+    Returns:
+        AnalysisReport: The committed report.
+
+    Raises:
+        ValueError: If `articles` is empty. Any other error removes the partial report and is re-raised.
+    """
+    chunks = iter_chunks(articles, max(1, chunk_size))
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError('No articles with text were found in the file.')
+
+    # Step 1: Create the hidden report up front so each chunk's items can reference it
+    report = AnalysisReport(
+        name=report_name,
+        user_id=user_id,
+        timestamp=datetime.now(timezone.utc),
+        summary=report_name,
+        overall_sentiment_score=0.0,
+        overall_sentiment_label="Neutral",
+        complete=False
+    )
+    db.session.add(report)
+    db.session.flush()
+    report_id = report.id
+    if on_start is not None:
+        on_start(report_id)
+    db.session.commit()
+
+    aggregator = ReportAggregator()
+    rollup_totals = sentiment_totals([])
+    report_usage = usage_totals([])
+    items_done = items_failed = 0
+    last_summary = None
+    try:
+        # Step 2: Analyze each chunk, then commit and release its items, keeping only their aggregates
+        for chunk in chain([first_chunk], chunks):
+            analyses: List[Optional[SingleNewsItemAnalysis]] = [None] * len(chunk)
+            for index, analysis, error in iter_text_analyses([a.text for a in chunk], **(analysis_options or {})):
+                analyses[index] = analysis
+                if error is None:
+                    items_done += 1
+                else:
+                    items_failed += 1
+
+            # Bulk INSERTs add no ORM objects, so the session does not grow with the file
+            item_values = [news_item_values(article.text, analysis,
+                                            publication_date=article.publication_date, source=article.source)
+                           for article, analysis in zip(chunk, analyses)]
+            insert_news_items(report_id, item_values, analyses, add_to_rollups=False)
+            for values, analysis in zip(item_values, analyses):
+                aggregator.add(analysis.intents or [], analysis.keywords or [], analysis.sentiment_score,
+                               values['publication_date'])
+            sentiment_totals(item_values, rollup_totals)
+            report_usage = merge_usage_totals(report_usage, usage_totals(item_values))
+            last_summary = analyses[-1].summary or last_summary
+
+            if on_progress is not None:
+                on_progress(items_done, items_failed)
+            db.session.commit()
+
+        # Step 3: Store the aggregates, add the items to the rollups and make the report visible, in one transaction
+        db.session.execute(
+            db.update(AnalysisReport).where(AnalysisReport.id == report_id).values(
+                summary=last_summary or report_name, complete=True, **aggregator.result(), **report_usage)
+        )
+        add_report_totals(report_id, rollup_totals)
+        touch_report(report_id)
+        if on_complete is not None:
+            on_complete(report_id)
+        db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        discard_partial_report(report_id)
+        raise
+
+    return db.session.get(AnalysisReport, report_id, populate_existing=True)
+
+@click.command('ingest-file')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user', 'username', required=True, help='Username that will own the report.')
+@click.option('--name', 'report_name', default=None, help='Report name. Defaults to the file name.')
+@with_appcontext
+def ingest_file_command(path, username, report_name):
+    """Analyze a CSV/JSONL/NDJSON news file (optionally gzipped) into a new report."""
+    user = db.session.scalar(db.select(User).where(User.username == username))
+    if user is None:
+        raise click.BadParameter(f"User '{username}' not found.", param_hint='--user')
+    config = current_app.config
+
+    def on_progress(items_done: int, items_failed: int):
+        click.echo(f"{items_done + items_failed} items analyzed ({items_failed} failed)")
+
+    with open(path, 'rb') as source_file:
+        articles = iter_articles(
+            source_file, path,
+            max_item_tokens=config.get('ANALYSIS_MAX_ITEM_TOKENS', DEFAULT_MAX_ITEM_TOKENS),
+            oversize=config.get('ANALYSIS_OVERSIZE_POLICY', OVERSIZE_SPLIT)
+        )
+        try:
+            report = ingest_articles(user.id, report_name or os.path.basename(path), articles,
+                                     chunk_size=config.get('INGEST_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+                                     analysis_options=analysis_options_from_config(config),
+                                     on_progress=on_progress)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"Created report {report.id} ('{report.name}').")
@@ -0,0 +1,381 @@
+# Background analysis jobs.
+# /api/analysis_jobs stores submissions in the analysis_job table, which acts as a local
+# SQLite-backed queue. One or more `flask analysis-worker` processes claim jobs with a
+# time-limited lease, analyze the items and create the AnalysisReport. A job whose worker
+# dies stops renewing its lease and is picked up again by another worker.
+# Jobs created from an uploaded file (/api/ingest) carry the file's path instead of a
+# payload and are streamed through app.ingest in chunks. Their hidden, partial report is
+# linked to the job as soon as it exists, so a later attempt discards it before starting over.
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import AnalysisJob
+from app.openai_api import iter_text_analyses, analysis_options_from_config, SingleNewsItemAnalysis
+from app.reports import create_analysis_report
+from app.ingest import iter_articles, ingest_articles, discard_partial_report, DEFAULT_CHUNK_SIZE
+from app.text_segmenter import DEFAULT_MAX_ITEM_TOKENS
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+# Minimum seconds between progress writes while a job is running
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker no longer holds the lease on the job it is processing."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def default_worker_id() -> str:
+    """Identifies a worker by host, process and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def enqueue_analysis_job(user_id: int, report_name: str, item_texts: Sequence[str]) -> AnalysisJob:
+    """
+    Adds a new analysis job to the queue.
+
+    Args:
+        user_id (int): ID of the submitting user, who will own the resulting report.
+        report_name (str): Name for the report created when the job completes.
+        item_texts (Sequence[str]): The news items to analyze.
+
+    Returns:
+        AnalysisJob: The committed job, in the 'queued' state.
+    """
+    now = _utcnow()
+    job = AnalysisJob(
+        user_id=user_id,
+        report_name=report_name,
+        status=JOB_QUEUED,
+        payload_json=json.dumps(list(item_texts)),
+        items_total=len(item_texts),
+        items_done=0,
+        items_failed=0,
+        attempts=0,
+        created_at=now,
+        updated_at=now
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def enqueue_ingest_job(user_id: int, report_name: str, source_path: str) -> AnalysisJob:
+    """
+    Adds a job that analyzes an uploaded CSV/JSONL/NDJSON file to the queue.
+
+    Args:
+        user_id (int): ID of the submitting user, who will own the resulting report.
+        report_name (str): Name for the report created when the job completes.
+        source_path (str): Path of the saved upload. The file is deleted once the job completes.
+
+    Returns:
+        AnalysisJob: The committed job, in the 'queued' state. items_total grows as the file is read.
+    """
+    now = _utcnow()
+    job = AnalysisJob(
+        user_id=user_id,
+        report_name=report_name,
+        status=JOB_QUEUED,
+        payload_json=json.dumps([]),
+        source_path=source_path,
+        items_total=0,
+        items_done=0,
+        items_failed=0,
+        attempts=0,
+        created_at=now,
+        updated_at=now
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def _claimable(now: datetime, max_attempts: int):
+    # Queued jobs, and running jobs whose worker let the lease expire
+    return sa.and_(
+        AnalysisJob.attempts < max_attempts,
+        sa.or_(
+            AnalysisJob.status == JOB_QUEUED,
+            sa.and_(AnalysisJob.status == JOB_RUNNING, AnalysisJob.lease_expires_at < now)
+        )
+    )
+
+def fail_exhausted_jobs(max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Marks jobs whose lease expired after `max_attempts` claims as failed, and discards the
+    partial reports and uploaded files their ingests left behind. Returns the count.
+    """
+    now = _utcnow()
+    exhausted = sa.and_(AnalysisJob.status == JOB_RUNNING,
+                        AnalysisJob.lease_expires_at < now,
+                        AnalysisJob.attempts >= max_attempts)
+    abandoned = db.session.execute(
+        sa.select(AnalysisJob.analysis_report_id, AnalysisJob.source_path).where(exhausted)
+    ).all()
+    result = db.session.execute(
+        sa.update(AnalysisJob)
+        .where(exhausted)
+        .values(status=JOB_FAILED, lease_owner=None, lease_expires_at=None, updated_at=now,
+                error=f'Abandoned after {max_attempts} attempts.')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    for report_id, source_path in abandoned:
+        if report_id is not None:
+            discard_partial_report(report_id)
+        _remove_source_file(source_path)
+    return result.rowcount
+
+def claim_next_job(worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                   max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[AnalysisJob]:
+    """
+    Claims the oldest claimable job for `worker_id`.
+
+    The claim is a conditional UPDATE that only succeeds if the job is still claimable,
+    so two workers racing for the same job cannot both win it.
+
+    Returns:
+        Optional[AnalysisJob]: The claimed job, or None if the queue is empty.
+    """
+    fail_exhausted_jobs(max_attempts)
+    # A few retries in case another worker claims the candidate between SELECT and UPDATE
+    for _ in range(5):
+        now = _utcnow()
+        job_id = db.session.scalar(
+            sa.select(AnalysisJob.id).where(_claimable(now, max_attempts)).order_by(AnalysisJob.id).limit(1)
+        )
+        if job_id is None:
+            return None
+        result = db.session.execute(
+            sa.update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, _claimable(now, max_attempts))
+            .values(status=JOB_RUNNING, lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=AnalysisJob.attempts + 1, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return db.session.get(AnalysisJob, job_id, populate_existing=True)
+    return None
+
+def _update_owned_job(job_id: int, worker_id: str, commit: bool = True, **values) -> bool:
+    # Only the worker holding the lease may write to a running job. With commit=False the
+    # update joins the caller's transaction, which the caller commits or rolls back.
+    values['updated_at'] = _utcnow()
+    result = db.session.execute(
+        sa.update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.lease_owner == worker_id, AnalysisJob.status == JOB_RUNNING)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        db.session.commit()
+    return result.rowcount == 1
+
+def renew_lease(job_id: int, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+    """Extends the lease on a job. Returns False if the worker no longer holds it."""
+    return _update_owned_job(job_id, worker_id, lease_expires_at=_utcnow() + timedelta(seconds=lease_seconds))
+
+def update_job_progress(job_id: int, worker_id: str, items_done: int, items_failed: int,
+                        lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+    """Records progress and renews the lease. Returns False if the worker lost the lease."""
+    return _update_owned_job(job_id, worker_id, items_done=items_done, items_failed=items_failed,
+                             lease_expires_at=_utcnow() + timedelta(seconds=lease_seconds))
+
+
+class _LeaseHeartbeat(threading.Thread):
+    """Renews a job's lease periodically while a slow analysis call is in flight."""
+
+    def __init__(self, app, job_id: int, worker_id: str, lease_seconds: int):
+        super().__init__(name=f'lease-heartbeat-{job_id}', daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop_event.wait(interval):
+            with self.app.app_context():
+                if not renew_lease(self.job_id, self.worker_id, self.lease_seconds):
+                    return
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _analyze_job_payload(job: AnalysisJob, worker_id: str, lease_seconds: int):
+    # Analyzes the job's JSON payload of item texts and flushes its report; process_job commits
+    # the report together with the job's completion
+    item_texts: List[str] = json.loads(job.payload_json)
+    analyses: List[Optional[SingleNewsItemAnalysis]] = [None] * len(item_texts)
+    items_done = items_failed = 0
+    last_flush = time.monotonic()
+
+    for index, analysis, error in iter_text_analyses(item_texts, **analysis_options_from_config(current_app.config)):
+        analyses[index] = analysis
+        if error is None:
+            items_done += 1
+        else:
+            items_failed += 1
+        finished = items_done + items_failed == len(item_texts)
+        if finished or time.monotonic() - last_flush >= PROGRESS_FLUSH_INTERVAL:
+            if not update_job_progress(job.id, worker_id, items_done, items_failed, lease_seconds):
+                raise LeaseLostError(f'Lease on job {job.id} lost by {worker_id}')
+            last_flush = time.monotonic()
+
+    return create_analysis_report(job.user_id, job.report_name, item_texts, analyses, commit=False)
+
+def _ingest_job_file(job: AnalysisJob, worker_id: str, lease_seconds: int):
+    # Streams the job's uploaded file through the analyzer chunk by chunk. Every write is
+    # lease-guarded in the same transaction, so a worker that lost the job commits nothing more.
+    config = current_app.config
+    job_id = job.id
+
+    # A previous attempt that died mid-file left its hidden report behind
+    if job.analysis_report_id is not None:
+        discard_partial_report(job.analysis_report_id)
+
+    def on_start(report_id: int):
+        if not _update_owned_job(job_id, worker_id, commit=False, analysis_report_id=report_id):
+            raise LeaseLostError(f'Lease on job {job_id} lost by {worker_id}')
+
+    def on_progress(items_done: int, items_failed: int):
+        # The file's size in articles is only known once it has been read, so items_total grows too
+        if not _update_owned_job(job_id, worker_id, commit=False, items_total=items_done + items_failed,
+                                 items_done=items_done, items_failed=items_failed,
+                                 lease_expires_at=_utcnow() + timedelta(seconds=lease_seconds)):
+            raise LeaseLostError(f'Lease on job {job_id} lost by {worker_id}')
+
+    def on_complete(report_id: int):
+        if not _update_owned_job(job_id, worker_id, commit=False, status=JOB_COMPLETED, analysis_report_id=report_id,
+                                 lease_owner=None, lease_expires_at=None):
+            raise LeaseLostError(f'Lease on job {job_id} lost by {worker_id} before completion')
+
+    with open(job.source_path, 'rb') as source_file:
+        articles = iter_articles(
+            source_file, job.source_path,
+            max_item_tokens=config.get('ANALYSIS_MAX_ITEM_TOKENS', DEFAULT_MAX_ITEM_TOKENS),
+            oversize=config.get('ANALYSIS_OVERSIZE_POLICY', 'split')
+        )
+        return ingest_articles(job.user_id, job.report_name, articles,
+                               chunk_size=config.get('INGEST_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+                               analysis_options=analysis_options_from_config(config),
+                               on_progress=on_progress, on_start=on_start, on_complete=on_complete)
+
+def _remove_source_file(source_path: Optional[str]):
+    # Uploads can be hundreds of MB: delete them as soon as their job is finished either way
+    if source_path and os.path.exists(source_path):
+        os.remove(source_path)
+
+def process_job(job: AnalysisJob, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                heartbeat: bool = True) -> bool:
+    """
+    Analyzes every item (or the uploaded file) of a claimed job, creates its report and
+    marks it completed.
+
+    Args:
+        job (AnalysisJob): A job claimed by `worker_id`.
+        worker_id (str): The worker holding the lease.
+        lease_seconds (int): Lease length used for renewals.
+        heartbeat (bool): Renew the lease from a background thread while items are in flight.
+
+    Returns:
+        bool: True if the job completed, False if it failed or the lease was lost.
+    """
+    heartbeat_thread = None
+    if heartbeat:
+        heartbeat_thread = _LeaseHeartbeat(current_app._get_current_object(), job.id, worker_id, lease_seconds)
+        heartbeat_thread.start()
+
+    source_path = job.source_path
+    try:
+        if source_path:
+            # The ingest completes the job in the transaction that makes its report visible
+            _ingest_job_file(job, worker_id, lease_seconds)
+            _remove_source_file(source_path) # The upload is no longer needed once its report exists
+            return True
+
+        report = _analyze_job_payload(job, worker_id, lease_seconds)
+        # The report and the completion are committed together: a worker that lost its lease
+        # rolls its report back, so a job never ends up with two reports
+        if not _update_owned_job(job.id, worker_id, commit=False, status=JOB_COMPLETED, analysis_report_id=report.id,
+                                 lease_owner=None, lease_expires_at=None):
+            raise LeaseLostError(f'Lease on job {job.id} lost by {worker_id} before completion')
+        db.session.commit()
+        return True
+
+    except LeaseLostError as e:
+        db.session.rollback()
+        current_app.logger.warning(str(e))
+        return False
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Analysis job {job.id} failed: {e}", exc_info=True)
+        # A worker that has lost the job leaves the upload to its new owner
+        if _update_owned_job(job.id, worker_id, status=JOB_FAILED, error=str(e),
+                             lease_owner=None, lease_expires_at=None):
+            _remove_source_file(source_path)
+        return False
+
+    finally:
+        if heartbeat_thread is not None:
+            heartbeat_thread.stop()
+
+def run_worker(worker_id: Optional[str] = None, poll_interval: float = 2.0, once: bool = False):
+    """
+    Claims and processes jobs until stopped. Must run inside an application context.
+
+    Args:
+        worker_id (str, optional): Lease owner name. Defaults to host:pid:random.
+        poll_interval (float): Seconds to sleep when the queue is empty.
+        once (bool): Return as soon as the queue is empty instead of polling forever.
+    """
+    worker_id = worker_id or default_worker_id()
+    lease_seconds = current_app.config.get('ANALYSIS_JOB_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+    max_attempts = current_app.config.get('ANALYSIS_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    current_app.logger.info(f"Analysis worker {worker_id} started.")
+
+    while True:
+        job = claim_next_job(worker_id, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        current_app.logger.info(f"Worker {worker_id} processing analysis job {job.id} ({job.items_total} items).")
+        process_job(job, worker_id, lease_seconds=lease_seconds)
+        db.session.remove() # Start each job with a fresh session
+
+@click.command('analysis-worker')
+@click.option('--poll-interval', default=2.0, show_default=True,
+              help='Seconds to wait between polls when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling forever.')
+@with_appcontext
+def analysis_worker_command(poll_interval, once):
+    """Process queued analysis jobs. Start the command several times to run more workers."""
+    run_worker(poll_interval=poll_interval, once=once)
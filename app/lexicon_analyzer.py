@@ -0,0 +1,255 @@
+# Local, dependency-free analyzer backend.
+# Scores sentiment with a weighted word lexicon (with negation and intensifier handling),
+# extracts keywords by term frequency and tags intents with keyword rules. It needs no
+# network access, so it serves air-gapped deployments, load tests and as the fallback
+# when the OpenAI API is unavailable. Lookups are plain dict/set operations, so a typical
+# news item takes well under a millisecond on one core.
+
+import datetime
+import math
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional
+
+from app.analyzer_backend import AnalyzerBackend
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+
+# Bump whenever the lexicons or rules below change
+LEXICON_VERSION = "1"
+
+# Word valences from -3.0 (very negative) to +3.0 (very positive), tuned for news and finance text
+SENTIMENT_LEXICON: Dict[str, float] = {
+    # Positive
+    'gain': 1.5, 'gains': 1.5, 'gained': 1.5, 'rise': 1.2, 'rises': 1.2, 'rose': 1.2, 'rising': 1.2,
+    'surge': 2.0, 'surges': 2.0, 'surged': 2.0, 'soar': 2.2, 'soared': 2.2, 'soaring': 2.2,
+    'rally': 1.8, 'rallied': 1.8, 'rallies': 1.8, 'jump': 1.5, 'jumped': 1.5, 'climb': 1.2, 'climbed': 1.2,
+    'growth': 1.5, 'grow': 1.2, 'grew': 1.2, 'growing': 1.2, 'boost': 1.6, 'boosted': 1.6,
+    'profit': 1.5, 'profits': 1.5, 'profitable': 1.8, 'record': 1.0, 'strong': 1.6, 'stronger': 1.6,
+    'success': 2.2, 'successful': 2.2, 'win': 2.0, 'wins': 2.0, 'won': 2.0, 'winning': 2.0,
+    'improve': 1.6, 'improved': 1.6, 'improvement': 1.6, 'improving': 1.6, 'recovery': 1.5, 'recover': 1.3,
+    'optimistic': 2.0, 'optimism': 2.0, 'confident': 1.8, 'confidence': 1.5, 'upbeat': 1.8,
+    'positive': 1.8, 'good': 1.8, 'great': 2.5, 'excellent': 2.8, 'outstanding': 2.8, 'best': 2.2,
+    'love': 2.5, 'loved': 2.5, 'happy': 2.2, 'pleased': 1.8, 'excited': 2.0, 'exciting': 2.0,
+    'innovative': 1.8, 'innovation': 1.5, 'breakthrough': 2.2, 'beat': 1.2, 'exceeded': 1.8,
+    'exceeding': 1.8, 'upgrade': 1.5, 'upgraded': 1.5, 'benefit': 1.5, 'benefits': 1.5,
+    'stable': 1.0, 'stability': 1.0, 'secure': 1.2, 'safe': 1.2, 'praise': 2.0, 'praised': 2.0,
+    'welcome': 1.5, 'welcomed': 1.5, 'support': 1.0, 'supported': 1.0, 'agreement': 1.0, 'deal': 0.8,
+    'approve': 1.3, 'approved': 1.3, 'celebrate': 2.2, 'celebrated': 2.2, 'hope': 1.5, 'hopeful': 1.8,
+    'boom': 2.0, 'thrive': 2.2, 'thriving': 2.2, 'robust': 1.6, 'resilient': 1.6, 'efficient': 1.4,
+    # Negative
+    'loss': -1.8, 'losses': -1.8, 'lose': -1.6, 'lost': -1.6, 'fall': -1.3, 'falls': -1.3, 'fell': -1.3,
+    'falling': -1.3, 'drop': -1.3, 'dropped': -1.3, 'drops': -1.3, 'decline': -1.4, 'declined': -1.4,
+    'declines': -1.4, 'slump': -2.0, 'slumped': -2.0, 'plunge': -2.2, 'plunged': -2.2, 'plummet': -2.4,
+    'plummeted': -2.4, 'plummeting': -2.4, 'crash': -2.6, 'crashed': -2.6, 'dive': -1.8, 'slip': -1.0,
+    'slipped': -1.0, 'tumble': -2.0, 'tumbled': -2.0, 'weak': -1.5, 'weaker': -1.5, 'weakness': -1.5,
+    'crisis': -2.5, 'recession': -2.4, 'inflation': -0.8, 'debt': -1.0, 'deficit': -1.2, 'bankrupt': -2.8,
+    'bankruptcy': -2.8, 'layoff': -2.0, 'layoffs': -2.0, 'cut': -1.0, 'cuts': -1.0, 'fraud': -2.8,
+    'scandal': -2.6, 'lawsuit': -1.6, 'fined': -1.6, 'penalty': -1.6, 'risk': -1.0,
+    'risks': -1.0, 'risky': -1.4, 'fear': -2.0, 'fears': -2.0, 'worry': -1.6, 'worries': -1.6,
+    'worried': -1.6, 'concern': -1.2, 'concerns': -1.2, 'uncertain': -1.2, 'uncertainty': -1.4,
+    'volatile': -1.2, 'volatility': -1.2, 'bad': -2.0, 'poor': -1.8, 'worst': -2.6, 'terrible': -2.8,
+    'awful': -2.8, 'disappointing': -2.0, 'disappointed': -2.0, 'disappointment': -2.0, 'fail': -2.2,
+    'failed': -2.2, 'failure': -2.2, 'failing': -2.2, 'problem': -1.4, 'problems': -1.4, 'struggle': -1.6,
+    'struggles': -1.6, 'struggling': -1.6, 'threat': -1.8, 'threats': -1.8, 'attack': -2.2,
+    'war': -2.6, 'conflict': -2.0, 'violence': -2.6, 'death': -2.6, 'dead': -2.6, 'killed': -2.8,
+    'injured': -2.0, 'disaster': -2.8, 'damage': -1.8, 'damaged': -1.8, 'shortage': -1.6,
+    'downgrade': -1.6, 'downgraded': -1.6, 'warning': -1.4, 'warns': -1.4, 'warned': -1.4,
+    'criticism': -1.6, 'criticized': -1.6, 'protest': -1.4, 'protests': -1.4, 'delay': -1.2,
+    'delayed': -1.2, 'angry': -2.2, 'sad': -2.0, 'hate': -2.6, 'complaint': -1.6, 'complaints': -1.6,
+    'outage': -1.8, 'breach': -2.0, 'hack': -2.0, 'hacked': -2.2, 'collapse': -2.6, 'collapsed': -2.6,
+    'pessimistic': -2.0, 'pessimism': -2.0, 'bearish': -1.6, 'bullish': 1.6, 'low': -0.8, 'lower': -0.6,
+}
+
+# Words that flip the valence of the sentiment words that follow them
+NEGATORS: FrozenSet[str] = frozenset({
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'without', 'hardly',
+    'barely', "isn't", "wasn't", "aren't", "weren't", "don't", "doesn't", "didn't", "won't",
+    "can't", "cannot", "couldn't", "shouldn't", "wouldn't", "hasn't", "haven't", "hadn't",
+})
+# How many tokens after a negator are negated
+NEGATION_WINDOW = 3
+# A negated word keeps part of its strength in the opposite direction ("not good" is mildly negative)
+NEGATION_SCALAR = -0.74
+
+# Multipliers applied to the sentiment word that immediately follows
+INTENSIFIERS: Dict[str, float] = {
+    'very': 1.3, 'extremely': 1.5, 'highly': 1.3, 'sharply': 1.4, 'significantly': 1.3, 'strongly': 1.3,
+    'hugely': 1.4, 'massively': 1.5, 'deeply': 1.3, 'really': 1.2, 'incredibly': 1.5, 'major': 1.2,
+    'slightly': 0.6, 'somewhat': 0.7, 'marginally': 0.6, 'modestly': 0.7, 'partly': 0.7,
+}
+
+# Same normalization constant as VADER: maps the raw score sum into (-1, 1)
+NORMALIZATION_ALPHA = 15.0
+# Normalized scores within this distance of zero are labelled Neutral
+NEUTRAL_THRESHOLD = 0.05
+
+STOPWORDS: FrozenSet[str] = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself
+new now of off on once only or other our ours ourselves out over own said same says she should so some
+such than that the their theirs them themselves then there these they this those through to too under
+until up us very was we were what when where which while who whom why will with would you your yours
+yourself yourselves year years today yesterday tomorrow week month according one two three also told
+percent per cent mr mrs ms
+""".split()) | NEGATORS | frozenset(INTENSIFIERS)
+
+MAX_KEYWORDS = 12
+MAX_INTENTS = 5
+
+# Intent tag -> cue words. Every tag must be one of PREDEFINED_INTENT_TAGS.
+INTENT_RULES: Dict[str, FrozenSet[str]] = {
+    'Market Analysis': frozenset({'market', 'markets', 'analysts', 'analyst', 'investors', 'outlook', 'valuation', 'sector'}),
+    'Stock Market Update': frozenset({'stock', 'stocks', 'shares', 'index', 'nasdaq', 'dow', 'ftse', 'asx', 'trading', 'traders'}),
+    'Company Earnings Report': frozenset({'earnings', 'revenue', 'quarter', 'quarterly', 'profit', 'profits', 'eps', 'guidance'}),
+    'Economic Forecast': frozenset({'forecast', 'gdp', 'recession', 'outlook', 'projected', 'growth'}),
+    'Economic Policy Analysis': frozenset({'policy', 'rates', 'rate', 'central', 'treasury', 'fiscal', 'monetary', 'budget'}),
+    'Financial Regulation News': frozenset({'regulator', 'regulators', 'regulation', 'sec', 'compliance', 'fined', 'penalty'}),
+    'International Trade News': frozenset({'tariff', 'tariffs', 'exports', 'imports', 'trade', 'wto', 'sanctions'}),
+    'Cryptocurrency News': frozenset({'bitcoin', 'crypto', 'cryptocurrency', 'ethereum', 'blockchain', 'token', 'tokens'}),
+    'Real Estate Market Trends': frozenset({'housing', 'property', 'mortgage', 'mortgages', 'rent', 'rents', 'homes'}),
+    'Startup Funding Announcement': frozenset({'startup', 'funding', 'raised', 'seed', 'venture', 'series', 'valuation'}),
+    'Technology Update': frozenset({'technology', 'software', 'ai', 'app', 'chip', 'chips', 'device', 'launch', 'update'}),
+    'Product Review': frozenset({'review', 'tested', 'features', 'battery', 'design', 'rating'}),
+    'Political Commentary': frozenset({'government', 'election', 'minister', 'parliament', 'senate', 'president', 'party', 'vote'}),
+    'Health & Wellness': frozenset({'health', 'hospital', 'patients', 'vaccine', 'disease', 'medical', 'doctors'}),
+    'Environmental News': frozenset({'climate', 'emissions', 'environment', 'environmental', 'carbon', 'renewable', 'pollution'}),
+    'Sports Report': frozenset({'match', 'season', 'team', 'coach', 'league', 'goal', 'championship', 'players'}),
+    'Scientific Discovery': frozenset({'scientists', 'researchers', 'study', 'discovery', 'discovered', 'research'}),
+    'Press Release': frozenset({'announced', 'announces', 'announcement', 'spokesperson', 'statement'}),
+    'Event Announcement': frozenset({'event', 'conference', 'festival', 'summit', 'ceremony'}),
+    'Complaint': frozenset({'complaint', 'complaints', 'refund', 'unacceptable', 'terrible'}),
+    'Opinion Piece': frozenset({'opinion', 'believe', 'think', 'should', 'must'}),
+    'Interview': frozenset({'interview', 'asked', 'told'}),
+    'Legal Notice': frozenset({'court', 'lawsuit', 'judge', 'legal', 'ruling', 'sued'}),
+}
+DEFAULT_INTENT = 'News Report'
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9'&-]*")
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?])\s+')
+_MONTHS = {name: index for index, name in enumerate(
+    ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+     'september', 'october', 'november', 'december'], start=1)}
+_MONTH_NAMES = '|'.join(_MONTHS)
+_ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+# "January 5th, 2024" and "5 January 2024"
+_MONTH_FIRST_PATTERN = re.compile(rf'\b({_MONTH_NAMES})\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b', re.IGNORECASE)
+_DAY_FIRST_PATTERN = re.compile(rf'\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES}),?\s+(\d{{4}})\b', re.IGNORECASE)
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases `text` and splits it into word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def score_sentiment(tokens: List[str]) -> float:
+    """
+    Scores a token list from -1.0 (very negative) to +1.0 (very positive).
+
+    Each lexicon word contributes its valence, scaled by an intensifier directly before it
+    and reversed (and dampened) if a negator appears within the previous NEGATION_WINDOW tokens.
+    """
+    total = 0.0
+    negate_until = -1
+    for position, token in enumerate(tokens):
+        if token in NEGATORS:
+            negate_until = position + NEGATION_WINDOW
+            continue
+        valence = SENTIMENT_LEXICON.get(token)
+        if valence is None:
+            continue
+        if position > 0:
+            valence *= INTENSIFIERS.get(tokens[position - 1], 1.0)
+        if position <= negate_until:
+            valence *= NEGATION_SCALAR
+        total += valence
+    if total == 0.0:
+        return 0.0
+    return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+def extract_keywords(tokens: List[str], max_keywords: int = MAX_KEYWORDS) -> List[str]:
+    """Returns the most frequent non-stopword tokens, ties broken by first occurrence."""
+    counts = Counter(token for token in tokens
+                     if len(token) > 2 and token not in STOPWORDS and not token.isdigit())
+    # Counter preserves insertion order, and most_common() is a stable sort
+    return [word for word, _count in counts.most_common(max_keywords)]
+
+def tag_intents(tokens: List[str], max_intents: int = MAX_INTENTS) -> List[str]:
+    """Returns up to `max_intents` intent tags whose cue words occur most often in the text."""
+    token_set = set(tokens)
+    matches = []
+    for intent, cues in INTENT_RULES.items():
+        hits = len(cues & token_set)
+        if hits:
+            matches.append((hits, intent))
+    matches.sort(key=lambda match: -match[0])
+    intents = [intent for _hits, intent in matches[:max_intents - 1]]
+    # Plain news is the baseline, so it is always present unless the text is clearly something else
+    if len(intents) < max_intents and DEFAULT_INTENT not in intents:
+        intents.append(DEFAULT_INTENT)
+    return intents
+
+def extract_publication_date(text: str) -> Optional[str]:
+    """Returns the first valid date found in `text` in YYYY-MM-DD format, or None."""
+    candidates = []
+    match = _ISO_DATE_PATTERN.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(1)), int(match.group(2)), int(match.group(3))))
+    match = _MONTH_FIRST_PATTERN.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(3)), _MONTHS[match.group(1).lower()], int(match.group(2))))
+    match = _DAY_FIRST_PATTERN.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(3)), _MONTHS[match.group(2).lower()], int(match.group(1))))
+    for _start, year, month, day in sorted(candidates):
+        try:
+            return datetime.date(year, month, day).isoformat()
+        except ValueError: # e.g. February 30th
+            continue
+    return None
+
+def summarize(text: str, max_words: int = 10) -> Optional[str]:
+    """Uses the first sentence, cut to `max_words` words, as the headline."""
+    first_sentence = _SENTENCE_END_PATTERN.split(text.strip(), maxsplit=1)[0]
+    words = first_sentence.split()
+    if not words:
+        return None
+    headline = ' '.join(words[:max_words])
+    return headline if len(words) <= max_words else headline.rstrip('.,;:') + '...'
+
+def analyze_text_locally(text: str) -> SingleNewsItemAnalysis:
+    """
+    Analyzes a news text with the lexicon and rules above, without any network access.
+
+    Args:
+        text (str): The news text to analyze.
+
+    Returns:
+        SingleNewsItemAnalysis: Sentiment, intents, keywords, publication date and summary.
+    """
+    tokens = tokenize(text)
+    score = round(score_sentiment(tokens), 4)
+    if score >= NEUTRAL_THRESHOLD:
+        label = SentimentEnum.POSITIVE
+    elif score <= -NEUTRAL_THRESHOLD:
+        label = SentimentEnum.NEGATIVE
+    else:
+        label = SentimentEnum.NEUTRAL
+    return SingleNewsItemAnalysis(
+        sentiment_label=label,
+        sentiment_score=score,
+        intents=tag_intents(tokens),
+        keywords=extract_keywords(tokens),
+        publication_date=extract_publication_date(text),
+        summary=summarize(text)
+    )
+
+
+class LexiconBackend(AnalyzerBackend):
+    """Analyzer backend that runs the local lexicon engine."""
+    name = 'lexicon'
+    model_name = 'lexicon'
+    prompt_version = LEXICON_VERSION
+    # Recomputing is about as cheap as a cache lookup, so results are not cached
+    cacheable = False
+
+    def analyze(self, text: str) -> SingleNewsItemAnalysis:
+        return analyze_text_locally(text)
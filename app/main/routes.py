@@ -1,169 +1,63 @@
 # filepath: c:\Users\Xiao Difu\Desktop\group5505\cits5505-masters-group37\app\main\routes.py
 # Defines the main routes for the application (index, analyze, results dashboards, etc.).
 
-from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app, Response, stream_with_context, make_response, session
 from flask_login import login_required, current_user
 from app import db
 from app.main import bp
-from app.models import AnalysisReport, NewsItem, analysis_report_shares, User
-from app.forms import AnalysisForm, ShareReportForm, ManageSharingForm
-from app.openai_api import analyze_text_data, SingleNewsItemAnalysis, PREDEFINED_INTENT_TAGS, SentimentEnum # Added SentimentEnum here
+from app.models import AnalysisReport, NewsItem, analysis_report_shares, User, AnalysisJob
+from app.forms import AnalysisForm, UploadAnalysisForm, ShareReportForm, ManageSharingForm
+from app.analysis_cache import get_analysis_cache
+from app.openai_api import analyze_texts_concurrently, iter_text_analyses, analysis_options_from_config, SingleNewsItemAnalysis, PREDEFINED_INTENT_TAGS, SentimentEnum # Added SentimentEnum here
+from app.reports import create_analysis_report, append_to_analysis_report, touch_report
+from app.feed import news_feed_page, feed_total, feed_request_params, encode_with_items, DEFAULT_FEED_PAGE_SIZE
+from app.payload_cache import cached_payload, get_payload_cache, invalidate_report_payloads
+from app.http_cache import report_validators, not_modified, with_validators, template_fingerprint
+from app.rollups import user_sentiment_counts
+from app.search import search_news_items, DEFAULT_SEARCH_LIMIT
+from app.analytics import (user_tag_analytics, parse_report_ids, parse_date_bounds, AnalyticsBudgetExceeded,
+                           DEFAULT_KEYWORD_LIMIT, DEFAULT_INTENT_LIMIT, DEFAULT_TIME_BUDGET_MS)
+from app.jobs import enqueue_analysis_job, enqueue_ingest_job
+from app.ingest import detect_format
+from werkzeug.utils import secure_filename
+from app.text_segmenter import split_news_items, DEFAULT_MAX_ITEM_TOKENS
 from sqlalchemy.orm import aliased
 from sqlalchemy import desc, or_, select, func # Ensure select is imported
 from typing import List, Optional, Dict, Any # Added List, Optional
 import json # Added json
+import os
+import uuid # Unique names for uploaded files
 from datetime import datetime, timedelta, timezone # Added timezone
 import re # Added re
 from collections import Counter, defaultdict # Added Counter, defaultdict
 
-# Helper function to parse string dates from OpenAI into datetime objects
-def _parse_publication_date(date_str: Optional[str]) -> Optional[datetime]:
-    if not date_str: 
-        return None
-    try:
-        # Attempt to parse YYYY-MM-DD format
-        return datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-    except ValueError:
-        # Add more formats or more robust parsing if needed
-        print(f"Warning: Could not parse date string: {date_str}")
-        return None
-
-# Helper function to prepare aggregated data for an AnalysisReport
-def _prepare_report_aggregates(news_items: List[NewsItem]) -> Dict[str, Any]:
-    """
-    Processes a list of NewsItem objects to generate aggregated data for dashboard components.
-    Returns a dictionary with keys for aggregated_intents_json, aggregated_keywords_json,
-    sentiment_trend_json, overall_sentiment_label, and overall_sentiment_score.
-    """
-    if not news_items:
-        return {
-            'aggregated_intents_json': json.dumps({}),
-            'aggregated_keywords_json': json.dumps([]),
-            'sentiment_trend_json': json.dumps({'dates': [], 'overall_scores': [], 'keyword_trends': {}}),
-            'overall_sentiment_label': "Neutral",
-            'overall_sentiment_score': 0.0
-        }
-
-    all_intents_flat = []
-    all_keywords_with_sentiment = [] # List of tuples (keyword, sentiment_score)
-    all_sentiment_scores = []
-    # Using defaultdict for easier aggregation
-    daily_sentiment_scores = defaultdict(lambda: {'scores': [], 'keywords': defaultdict(lambda: {'scores': []}) })
-    all_item_keywords = []
-
-    for item in news_items:
-        if item.intents:
-            try:
-                # Intents are stored as a JSON string list in the NewsItem model
-                item_intents = json.loads(item.intents)
-                if isinstance(item_intents, list):
-                    all_intents_flat.extend(item_intents)
-            except json.JSONDecodeError:
-                print(f"Warning: Could not parse intents_json for NewsItem ID {item.id}: {item.intents}")
-        
-        if item.keywords:
-            try:
-                # Keywords are stored as a JSON string list in the NewsItem model
-                item_keywords_list = json.loads(item.keywords)
-                if isinstance(item_keywords_list, list):
-                    all_item_keywords.extend(item_keywords_list) # For overall keyword frequency
-                    for kw in item_keywords_list:
-                        # Associate keyword with the item's overall sentiment score
-                        all_keywords_with_sentiment.append((kw, item.sentiment_score or 0.0))
-            except json.JSONDecodeError:
-                print(f"Warning: Could not parse keywords_json for NewsItem ID {item.id}: {item.keywords}")
-
-        if item.sentiment_score is not None:
-            all_sentiment_scores.append(item.sentiment_score)
-        
-        if item.publication_date and item.sentiment_score is not None:
-            # Ensure publication_date is a datetime object
-            pub_date = item.publication_date
-            if isinstance(pub_date, str): # Should ideally be datetime object from DB
-                pub_date = _parse_publication_date(pub_date)
-
-            if pub_date:
-                date_str = pub_date.strftime('%Y-%m-%d')
-                daily_sentiment_scores[date_str]['scores'].append(item.sentiment_score)
-                if item.keywords: # Check again for safety
-                    try:
-                        item_keywords_list_for_trend = json.loads(item.keywords)
-                        if isinstance(item_keywords_list_for_trend, list):
-                            for kw in item_keywords_list_for_trend:
-                                daily_sentiment_scores[date_str]['keywords'][kw]['scores'].append(item.sentiment_score)
-                    except json.JSONDecodeError:
-                        pass # Already warned above
-
-    # 1. Aggregated Intents (Top 5)
-    intent_counts = Counter(all_intents_flat)
-    top_5_intents = dict(intent_counts.most_common(5))
-    total_intents_counted = sum(top_5_intents.values())
-    intents_share_data = {intent: (count / total_intents_counted * 100) if total_intents_counted > 0 else 0 
-                          for intent, count in top_5_intents.items()}
-
-    # 2. Aggregated Keywords (Top 20 with average sentiment)
-    # use all_item_keywords (extracted topic words) for frequency
-    keyword_occurrences = Counter(all_item_keywords)
-
-    aggregated_keywords_data = []
-    for kw, count in keyword_occurrences.most_common(20):
-        # calculate avg_sentiment as before, but now frequency purely reflects topic prevalence
-        kw_sentiment_scores = [score for k, score in all_keywords_with_sentiment if k == kw]
-        avg_sentiment = sum(kw_sentiment_scores)/len(kw_sentiment_scores) if kw_sentiment_scores else 0.0
-        # Determine color based on average sentiment
-        color = "grey" # Neutral
-        if avg_sentiment > 0.2:
-            color = "green" # Positive
-        elif avg_sentiment < -0.2:
-            color = "red" # Negative
-        aggregated_keywords_data.append({
-            "text": kw,
-            "value": count,
-            "avg_sentiment": round(avg_sentiment,2),
-            "color": color
-        })
+# Helper function to split a submitted form into individual news items
+def _split_submission(form: AnalysisForm) -> List[str]:
+    return split_news_items(
+        form.news_text.data,
+        form.split_mode.data or 'auto',
+        max_item_tokens=current_app.config.get('ANALYSIS_MAX_ITEM_TOKENS', DEFAULT_MAX_ITEM_TOKENS),
+        oversize=current_app.config.get('ANALYSIS_OVERSIZE_POLICY', 'split')
+    )
 
+# Helper function to name reports submitted without a name
+def _default_report_name() -> str:
+    return f"Analysis on {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M')}"
 
-    # 3. Sentiment Trend Over Time
-    sorted_dates = sorted(daily_sentiment_scores.keys())
-    overall_trend_scores = []
-    for date_str in sorted_dates:
-        avg_score_for_date = sum(daily_sentiment_scores[date_str]['scores']) / len(daily_sentiment_scores[date_str]['scores']) if daily_sentiment_scores[date_str]['scores'] else 0
-        overall_trend_scores.append(round(avg_score_for_date, 2))
-    
-    top_3_overall_keywords = [kw for kw, count in Counter(all_item_keywords).most_common(3)]
-    keyword_trends_data = {}
-    for kw in top_3_overall_keywords:
-        keyword_trend_line = []
-        for date_str in sorted_dates:
-            if daily_sentiment_scores[date_str]['keywords'][kw]['scores']:
-                avg_kw_score_for_date = sum(daily_sentiment_scores[date_str]['keywords'][kw]['scores']) / len(daily_sentiment_scores[date_str]['keywords'][kw]['scores'])
-                keyword_trend_line.append(round(avg_kw_score_for_date, 2))
-            else:
-                keyword_trend_line.append(None) # Or 0, or skip point, depending on chart handling
-        keyword_trends_data[kw] = keyword_trend_line
-        
-    sentiment_trend_data = {
-        'dates': sorted_dates,
-        'overall_scores': overall_trend_scores,
-        'keyword_trends': keyword_trends_data
-    }
+# Helper function telling whether a submission is large enough to go to the job queue
+def _should_queue(item_texts: List[str]) -> bool:
+    min_items = current_app.config.get('ANALYSIS_QUEUE_MIN_ITEMS', 0)
+    return bool(min_items) and len(item_texts) >= min_items
 
-    # 4. Overall Sentiment Score and Label for the report
-    overall_avg_score = sum(all_sentiment_scores) / len(all_sentiment_scores) if all_sentiment_scores else 0.0
-    overall_sentiment_label = "Neutral"
-    if overall_avg_score > 0.2:
-        overall_sentiment_label = "Positive"
-    elif overall_avg_score < -0.2:
-        overall_sentiment_label = "Negative"
-
-    return {
-        'aggregated_intents_json': json.dumps(intents_share_data),
-        'aggregated_keywords_json': json.dumps(aggregated_keywords_data), # Now includes avg_sentiment and color
-        'sentiment_trend_json': json.dumps(sentiment_trend_data),
-        'overall_sentiment_label': overall_sentiment_label,
-        'overall_sentiment_score': round(overall_avg_score, 2)
-    }
+# Helper function building the 202 response for a queued job; clients poll its status_url
+def _job_accepted(job: AnalysisJob, **extra):
+    status_url = url_for('main.api_analysis_job_status', job_id=job.id)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url,
+        **extra
+    }), 202, {'Location': status_url}
 
 @bp.route('/')
 @bp.route('/index')
@@ -178,137 +72,42 @@ def analyze():
     analysis_data_for_template = None # Used for non-AJAX responses
 
     if form.validate_on_submit():
-        text_data = form.news_text.data
-        report_name = form.report_name.data or f"Analysis on {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M')}"
+        report_name = form.report_name.data or _default_report_name()
         
-        raw_texts = text_data.split('---NEXT_ITEM---')
-        if not raw_texts or all(not t.strip() for t in raw_texts):
+        item_texts = _split_submission(form)
+        if not item_texts:
             if is_ajax_request():
                 return jsonify({'error': 'No text provided for analysis.'}), 400
             flash('No text provided for analysis.', 'warning')
             return render_template('analyze.html', title='Analyze Text', form=form, analysis_data=analysis_data_for_template)
 
+        # Large submissions are analyzed by a background worker instead of inside the request
+        if _should_queue(item_texts):
+            job = enqueue_analysis_job(current_user.id, report_name, item_texts)
+            message = f'{len(item_texts)} items were queued for analysis. The report will appear in My Results once it is done.'
+            if is_ajax_request():
+                return _job_accepted(job, items_total=job.items_total, message=message)
+            flash(message, 'info')
+            return redirect(url_for('main.results'))
+
         try:
-            # Create all objects but don't commit right away
-            processed_news_items_data = []
-            overall_sentiment_scores = []
-            
-            # Step 1: Process all texts and collect their analysis results
-            for single_text in raw_texts:
-                if not single_text.strip():
-                    continue
-                
-                # Analyze the text
-                analysis_result = analyze_text_data(single_text.strip())
-                
-                # Store processed data
-                processed_news_items_data.append({
-                    "original_text": single_text.strip(),
-                    "sentiment_label": analysis_result.sentiment_label,
-                    "sentiment_score": analysis_result.sentiment_score,
-                    "intents": analysis_result.intents,
-                    "keywords": analysis_result.keywords,
-                    "summary": analysis_result.summary,
-                    "publication_date": analysis_result.publication_date
-                })
-                
-                # Collect scores for overall sentiment calculation
-                if analysis_result.sentiment_score is not None:
-                    overall_sentiment_scores.append(analysis_result.sentiment_score)
-            
-            # Step 2: Validate we have processed items
-            if not processed_news_items_data:
-                if is_ajax_request():
-                    return jsonify({'error': 'No valid text items found for analysis after splitting.'}), 400
-                flash('No valid text items found for analysis after splitting.', 'warning')
-                return render_template('analyze.html', title='Analyze Text', form=form, analysis_data=analysis_data_for_template)
-            
-            # Step 3: Create the AnalysisReport with timestamp
-            report_timestamp = datetime.now(timezone.utc)
-            
-            # Step 4: Calculate overall sentiment score and label
-            overall_sentiment_score = sum(overall_sentiment_scores) / len(overall_sentiment_scores) if overall_sentiment_scores else 0.0
-            overall_sentiment_label = "Neutral"
-            if overall_sentiment_score > 0.2:
-                overall_sentiment_label = "Positive"
-            elif overall_sentiment_score < -0.2:
-                overall_sentiment_label = "Negative"
-                
-            # Step 5: Set the summary (from the last processed item)
-            summary = processed_news_items_data[-1].get('summary') or report_name
-            
-            # Step 6: Create empty placeholders for aggregates (we'll update these later)
-            empty_intents_json = json.dumps({})
-            empty_keywords_json = json.dumps([])
-            empty_trend_json = json.dumps({'dates': [], 'overall_scores': [], 'keyword_trends': {}})
-            
-            # Step 7: Create and save the AnalysisReport
-            new_report = AnalysisReport(
-                name=report_name,
-                author=current_user, # Sets up the relationship
-                user_id=current_user.id,  # Explicitly set user_id for the foreign key
-                timestamp=report_timestamp,
-                summary=summary,
-                overall_sentiment_score=overall_sentiment_score,
-                overall_sentiment_label=overall_sentiment_label,
-                aggregated_intents_json=empty_intents_json,
-                aggregated_keywords_json=empty_keywords_json,
-                sentiment_trend_json=empty_trend_json
-            )
-            
-            db.session.add(new_report)
-            # Commit to save the report and get an ID
-            db.session.commit() # First commit for AnalysisReport
-            
-            # Step 8: Create all NewsItem objects
-            news_items = []
-            for item_data in processed_news_items_data:
-                parsed_date = _parse_publication_date(item_data.get("publication_date"))
-                
-                news_item = NewsItem(
-                    original_text=item_data["original_text"],
-                    sentiment_label=item_data["sentiment_label"],
-                    sentiment_score=item_data["sentiment_score"],
-                    intents=json.dumps(item_data["intents"]),
-                    keywords=json.dumps(item_data["keywords"]),
-                    summary=item_data["summary"],
-                    analysis_report_id=new_report.id,
-                    publication_date=parsed_date
-                )
-                db.session.add(news_item)
-                news_items.append(news_item)
-            
-            # Commit to save all news items
-            db.session.commit()
-            
-            # Step 9: Calculate and update report aggregates using a direct SQL UPDATE
-            # This avoids the StaleDataError by not modifying the ORM object after it's committed
-            aggregates = _prepare_report_aggregates(news_items)
-            
-            # Use direct SQL update instead of modifying the ORM object
-            db.session.execute(
-                db.update(AnalysisReport)
-                .where(AnalysisReport.id == new_report.id)
-                .values(
-                    aggregated_intents_json=aggregates['aggregated_intents_json'],
-                    aggregated_keywords_json=aggregates['aggregated_keywords_json'],
-                    sentiment_trend_json=aggregates['sentiment_trend_json'],
-                    overall_sentiment_label=aggregates['overall_sentiment_label']
-                )
-            )
-            db.session.commit()
-            
-            # Step 10: Prepare response
+            # Step 1: Analyze all texts concurrently; results come back in input order
+            analysis_results = analyze_texts_concurrently(item_texts, **analysis_options_from_config(current_app.config))
+
+            # Step 2: Persist the report, its news items and aggregates
+            new_report = create_analysis_report(current_user.id, report_name, item_texts, analysis_results)
+
+            # Step 3: Prepare response
             if is_ajax_request():
                 # For AJAX, return JSON with details of the first item or a summary
-                first_item = processed_news_items_data[0] if processed_news_items_data else {}
+                first_item = analysis_results[0]
                 return jsonify({
-                    'message': f'Analysis report "{new_report.name}" created successfully! {len(processed_news_items_data)} item(s) processed.',
-                    'sentiment': first_item.get('sentiment_label'),
-                    'sentiment_score': first_item.get('sentiment_score'),
-                    'intents': first_item.get('intents'),
-                    'keywords': first_item.get('keywords'),
-                    'summary': first_item.get('summary'),
+                    'message': f'Analysis report "{new_report.name}" created successfully! {len(analysis_results)} item(s) processed.',
+                    'sentiment': first_item.sentiment_label,
+                    'sentiment_score': first_item.sentiment_score,
+                    'intents': first_item.intents,
+                    'keywords': first_item.keywords,
+                    'summary': first_item.summary,
                     'report_id': new_report.id,
                     'report_url': url_for('main.results_dashboard', report_id=new_report.id)
                 })
@@ -338,6 +137,164 @@ def analyze():
     # Handles GET requests, and non-AJAX POSTs where form validation failed
     return render_template('analyze.html', title='Analyze Text', form=form, analysis_data=analysis_data_for_template)
 
+# Helper function to format one Server-Sent Events message
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Streaming variant of /analyze: pushes each item's result as soon as it is analyzed
+@bp.route('/analyze/stream', methods=['POST'])
+@login_required
+def analyze_stream():
+    form = AnalysisForm()
+    if not form.validate_on_submit():
+        return jsonify({'errors': form.errors}), 400
+
+    item_texts = _split_submission(form)
+    if not item_texts:
+        return jsonify({'error': 'No text provided for analysis.'}), 400
+
+    report_name = form.report_name.data or _default_report_name()
+    # Large submissions are queued rather than streamed; the client polls the job instead
+    if _should_queue(item_texts):
+        job = enqueue_analysis_job(current_user.id, report_name, item_texts)
+        return _job_accepted(job, items_total=job.items_total)
+
+    user_id = current_user.id
+    analysis_options = analysis_options_from_config(current_app.config)
+
+    @stream_with_context
+    def generate():
+        analyses: List[Optional[SingleNewsItemAnalysis]] = [None] * len(item_texts)
+        items_failed = 0
+        yield _sse_event('start', {'items_total': len(item_texts)})
+
+        # Step 1: One 'item' event per news item, in completion order
+        for index, analysis, error in iter_text_analyses(item_texts, **analysis_options):
+            analyses[index] = analysis
+            items_failed += error is not None
+            yield _sse_event('item', {
+                'index': index,
+                'sentiment': analysis.sentiment_label.value,
+                'sentiment_score': analysis.sentiment_score,
+                'intents': analysis.intents,
+                'keywords': analysis.keywords,
+                'summary': analysis.summary,
+                'failed': error is not None
+            })
+
+        # Step 2: Persist the report once every item is done
+        try:
+            report = create_analysis_report(user_id, report_name, item_texts, analyses)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error saving streamed analysis report: {e}", exc_info=True)
+            yield _sse_event('error', {'error': f'An error occurred while saving the report: {str(e)}'})
+            return
+
+        # Step 3: Final event with the report and its aggregates
+        yield _sse_event('done', {
+            'message': f'Analysis report "{report.name}" created successfully! {len(item_texts)} item(s) processed.',
+            'report_id': report.id,
+            'report_url': url_for('main.results_dashboard', report_id=report.id),
+            'items_total': len(item_texts),
+            'items_failed': items_failed,
+            'overall_sentiment_label': report.overall_sentiment_label,
+            'overall_sentiment_score': report.overall_sentiment_score,
+            'aggregated_intents': json.loads(report.aggregated_intents_json or '{}'),
+            'aggregated_keywords': json.loads(report.aggregated_keywords_json or '[]')
+        })
+
+    # Disable proxy buffering so events reach the browser as soon as they are written
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Queue an analysis for a background worker instead of running it inside the request
+@bp.route('/api/analysis_jobs', methods=['POST'])
+@login_required
+def api_create_analysis_job():
+    form = AnalysisForm()
+    if not form.validate_on_submit():
+        return jsonify({'errors': form.errors}), 400
+
+    item_texts = _split_submission(form)
+    if not item_texts:
+        return jsonify({'error': 'No text provided for analysis.'}), 400
+
+    job = enqueue_analysis_job(current_user.id, form.report_name.data or _default_report_name(), item_texts)
+    return _job_accepted(job, items_total=job.items_total)
+
+# Queue an uploaded CSV/JSONL/NDJSON news file (optionally gzipped) for bulk analysis
+@bp.route('/api/ingest', methods=['POST'])
+@login_required
+def api_ingest_file():
+    form = UploadAnalysisForm()
+    if not form.validate_on_submit():
+        return jsonify({'errors': form.errors}), 400
+
+    upload = form.news_file.data
+    filename = secure_filename(upload.filename or '')
+    try:
+        detect_format(filename)
+    except ValueError as e:
+        return jsonify({'errors': {'news_file': [str(e)]}}), 400
+
+    # Save the upload in chunks (werkzeug streams it to disk) for a worker to parse later
+    upload_folder = current_app.config.get('INGEST_UPLOAD_FOLDER') or os.path.join(current_app.instance_path, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    source_path = os.path.join(upload_folder, f"{uuid.uuid4().hex}_{filename}")
+    upload.save(source_path)
+
+    job = enqueue_ingest_job(current_user.id, form.report_name.data or filename, source_path)
+    return _job_accepted(job, source_file=filename)
+
+# Progress of a queued analysis job, including the report URL once it has completed
+@bp.route('/api/analysis_jobs/<int:job_id>')
+@login_required
+def api_analysis_job_status(job_id):
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+
+    job_data = job.to_dict()
+    job_data['report_url'] = (url_for('main.results_dashboard', report_id=job_data['analysis_report_id'])
+                              if job_data['analysis_report_id'] else None)
+    return jsonify(job_data)
+
+# Analyze more news items and append them to one of the current user's reports
+@bp.route('/api/reports/<int:report_id>/items', methods=['POST'])
+@login_required
+def api_append_report_items(report_id):
+    report = db.session.get(AnalysisReport, report_id)
+    if report is None or not report.complete or report.user_id != current_user.id:
+        return jsonify({'error': 'Report not found'}), 404
+
+    form = AnalysisForm() # report_name is ignored; the report keeps its name
+    if not form.validate_on_submit():
+        return jsonify({'errors': form.errors}), 400
+
+    item_texts = _split_submission(form)
+    if not item_texts:
+        return jsonify({'error': 'No text provided for analysis.'}), 400
+
+    try:
+        analysis_results = analyze_texts_concurrently(item_texts, **analysis_options_from_config(current_app.config))
+        report = append_to_analysis_report(report, item_texts, analysis_results)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error appending to analysis report {report_id}: {e}", exc_info=True)
+        return jsonify({'error': f'An error occurred during analysis: {str(e)}'}), 500
+
+    return jsonify({
+        'message': f'{len(item_texts)} item(s) added to analysis report "{report.name}".',
+        'report_id': report.id,
+        'report_url': url_for('main.results_dashboard', report_id=report.id),
+        'items_added': len(item_texts),
+        'overall_sentiment_label': report.overall_sentiment_label,
+        'overall_sentiment_score': report.overall_sentiment_score,
+        'aggregated_intents': json.loads(report.aggregated_intents_json or '{}'),
+        'aggregated_keywords': json.loads(report.aggregated_keywords_json or '[]')
+    })
+
 #  replace request.is_xhr
 def is_ajax_request():
     """Check if the request was made with AJAX."""
@@ -349,7 +306,7 @@ def results():
     # 1) load the current user's reports
     user_reports = db.session.scalars(
         select(AnalysisReport)
-        .where(AnalysisReport.user_id == current_user.id)
+        .where(AnalysisReport.user_id == current_user.id, AnalysisReport.complete)
         .order_by(AnalysisReport.timestamp.desc())
     ).all()
 
@@ -366,20 +323,13 @@ def results():
     for rpt in user_reports:
         rpt.item_count = counts.get(rpt.id, 0)
 
-    # 3) build your sentiment_counts as before...
-    sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-    user_news_items = db.session.scalars(
-        select(NewsItem)
-        .join(NewsItem.analysis_report)
-        .where(AnalysisReport.user_id == current_user.id)
-    ).all()
-    for item in user_news_items:
-        if item.sentiment_label == SentimentEnum.POSITIVE:
-            sentiment_counts['positive'] += 1
-        elif item.sentiment_label == SentimentEnum.NEUTRAL:
-            sentiment_counts['neutral'] += 1
-        elif item.sentiment_label == SentimentEnum.NEGATIVE:
-            sentiment_counts['negative'] += 1
+    # 3) sentiment_counts from the user's daily rollups (one row per day and label, not per item)
+    label_counts = user_sentiment_counts(current_user.id)
+    sentiment_counts = {
+        'positive': label_counts[SentimentEnum.POSITIVE.value],
+        'neutral': label_counts[SentimentEnum.NEUTRAL.value],
+        'negative': label_counts[SentimentEnum.NEGATIVE.value]
+    }
 
     return render_template(
         'results.html',
@@ -393,7 +343,8 @@ def results():
 def results_dashboard(report_id):
     report = db.session.get(AnalysisReport, report_id)
 
-    if report is None:
+    # Reports still being ingested are hidden until complete
+    if report is None or not report.complete:
         flash('Analysis report not found.', 'danger') # Ensure flash message is user-friendly
         return redirect(url_for('main.results')) 
 
@@ -407,64 +358,62 @@ def results_dashboard(report_id):
         flash('You do not have permission to view this report.', 'danger') # User-friendly message
         return redirect(url_for('main.results'))
 
-    # Fetch all news items associated with this report, explicitly ordered
-    # news_items_for_feed = report.news_items.order_by(NewsItem.publication_date.desc().nullslast(), NewsItem.id.desc()).all()
-    # ^^^ This line caused: AttributeError: 'WriteOnlyCollection' object has no attribute 'order_by'
-    
-    # Corrected approach: Build the query explicitly
-    stmt = db.select(NewsItem).where(NewsItem.analysis_report_id == report.id).order_by(
-        NewsItem.publication_date.desc().nullslast(), 
-        NewsItem.id.desc()
-    )
-    news_items_for_feed = db.session.scalars(stmt).all()
-
-    # The aggregated data is already stored in the report model, so we just load it.
-    try:
-        top_5_intents_data = json.loads(report.aggregated_intents_json or '{}')
-        sentiment_trend_data = json.loads(report.sentiment_trend_json or '{}')
-        top_20_keywords_data = json.loads(report.aggregated_keywords_json or '[]')
-    except json.JSONDecodeError:
+    # Conditional GET: an unchanged report is answered with 304 before any item is read.
+    # The page shows the viewer's name and pending flash messages, so those are not served from cache.
+    validators = report_validators(report, current_user.id, template_fingerprint('results_dashboard.html', 'base.html'))
+    if '_flashes' not in session:
+        cached = not_modified(validators)
+        if cached is not None:
+            return cached
+
+    # The first feed page and the decoded aggregates are cached per report version (app/payload_cache.py)
+    def build_dashboard_payload() -> bytes:
+        # Only the first feed page is rendered; the page loads the next ones from
+        # /api/filtered_report_data as the user scrolls, so the page size does not grow with the report
+        first_page = news_feed_page(report.id, per_page=DEFAULT_FEED_PAGE_SIZE, encoded=True, include_usage=is_author)
+        payload = {
+            'next_cursor': first_page['next_cursor'],
+            'per_page': first_page['per_page'],
+            'aggregates_valid': True
+        }
+        # The aggregated data is already stored in the report model, so we just load it.
+        try:
+            payload['top_5_intents'] = json.loads(report.aggregated_intents_json or '{}')
+            payload['sentiment_trend'] = json.loads(report.sentiment_trend_json or '{}')
+            payload['top_20_keywords'] = json.loads(report.aggregated_keywords_json or '[]')
+        except json.JSONDecodeError:
+            payload.update(top_5_intents={}, sentiment_trend={}, top_20_keywords=[], aggregates_valid=False)
+        return encode_with_items(payload, first_page['items'])
+
+    # The author's payload carries the items' usage telemetry, so it is cached separately from the recipients'
+    dashboard = json.loads(cached_payload('dashboard', report, {'per_page': DEFAULT_FEED_PAGE_SIZE, 'usage': is_author},
+                                          build_dashboard_payload))
+    if not dashboard['aggregates_valid']:
         flash('Error decoding analysis data for the report.', 'warning') # User-friendly message
-        top_5_intents_data = {}
-        sentiment_trend_data = {}
-        top_20_keywords_data = []
-    
-    overall_sentiment_score_for_gauge = report.overall_sentiment_score if report.overall_sentiment_score is not None else 0.0
 
-    # Prepare news_items_for_feed as a list of dicts
-    news_items_for_feed_dicts = [item.to_dict() for item in news_items_for_feed]
-
-    # Consolidate all data for JavaScript into a single dictionary
-    flask_to_js_data = {
-        'reportId': report.id,
-        'top5IntentsData': top_5_intents_data,
-        'sentimentTrendData': sentiment_trend_data,
-        'top20KeywordsData': top_20_keywords_data,
-        'entityOverviewScore': overall_sentiment_score_for_gauge,
-        'initialNewsItems': news_items_for_feed_dicts
-    }
+    overall_sentiment_score_for_gauge = report.overall_sentiment_score if report.overall_sentiment_score is not None else 0.0
 
-    return render_template(
+    return with_validators(make_response(render_template(
         'results_dashboard.html',
         title=f"Dashboard: {report.name}",
         report=report,
-        # Pass the consolidated data object to the template
-        flask_to_js_data_json=json.dumps(flask_to_js_data), 
-        # Keep individual variables if they are used elsewhere in the template directly
-        news_items_for_feed=news_items_for_feed_dicts, 
-        top_5_intents=top_5_intents_data,
-        sentiment_trend_chart_data=sentiment_trend_data,
-        top_20_keywords_data=top_20_keywords_data,
+        news_items_for_feed=dashboard['news_items'],
+        feed_next_cursor=dashboard['next_cursor'],
+        feed_per_page=dashboard['per_page'],
+        top_5_intents=dashboard['top_5_intents'],
+        sentiment_trend_chart_data=dashboard['sentiment_trend'],
+        top_20_keywords_data=dashboard['top_20_keywords'],
         entity_overview_score=overall_sentiment_score_for_gauge,
-        results_exist=(True if news_items_for_feed_dicts else False)
-    )
+        results_exist=bool(dashboard['news_items'])
+    )), validators)
 
 # API endpoint for fetching filtered data for the dashboard
-@bp.route('/api/filtered_report_data/<int:report_id>', methods=['POST'])
+# GET takes the filters as query parameters and supports conditional requests; POST takes a JSON body
+@bp.route('/api/filtered_report_data/<int:report_id>', methods=['GET', 'POST'])
 @login_required
 def api_filtered_report_data(report_id):
     report = db.session.get(AnalysisReport, report_id)
-    if report is None:
+    if report is None or not report.complete:
         return jsonify({'error': 'Report not found'}), 404
 
     is_author = report.user_id == current_user.id
@@ -474,70 +423,217 @@ def api_filtered_report_data(report_id):
     if not is_author and not is_shared_with_current_user:
         return jsonify({'error': 'Permission denied'}), 403
 
-    filters = request.json
-    if not filters:
-        return jsonify({'error': 'No filters provided'}), 400
+    if request.method == 'GET':
+        filters = request.args.to_dict()
+        filters['include_total'] = filters.get('include_total', '').lower() in ('1', 'true')
+    else:
+        filters = request.json
+        if not filters:
+            return jsonify({'error': 'No filters provided'}), 400
+
+    # The response depends only on the report version, the page/filter parameters and whether
+    # the viewer is the author (who also gets the items' usage telemetry)
+    params = dict(feed_request_params(filters), usage=is_author)
+    validators = report_validators(report, params)
+    cached = not_modified(validators)
+    if cached is not None:
+        return cached
+
+    # Keyset pagination: 'cursor' is the next_cursor/prev_cursor of a previous response
+    # (omitted for the first page), so deep pages cost the same as the first one.
+    # The total is only counted when asked for ('include_total'), and is cached.
+    # The encoded response is cached per report version (app/payload_cache.py).
+    def build_feed_payload() -> bytes:
+        page = news_feed_page(report.id, filters, cursor=filters.get('cursor'),
+                              per_page=filters.get('per_page', DEFAULT_FEED_PAGE_SIZE), encoded=True,
+                              include_usage=is_author)
+        total_items = feed_total(report, filters) if filters.get('include_total') else None
+        response = {
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor'],
+            'has_next': page['has_next'],
+            'has_prev': page['has_prev'],
+            'per_page': page['per_page']
+        }
+        if total_items is not None:
+            response['total_items'] = total_items
+        # The items' stored JSON is spliced in as is
+        return encode_with_items(response, page['items'])
+
+    try:
+        body = cached_payload('feed', report, params, build_feed_payload)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return with_validators(current_app.response_class(body, mimetype=current_app.json.mimetype), validators)
 
-    # Base query for news items of the current report
-    query = report.news_items # This is a BaseQuery object because of lazy='dynamic'
+# API endpoint for one news item with its full text (list endpoints leave the text out)
+@bp.route('/api/news_item/<int:item_id>')
+@login_required
+def api_news_item(item_id):
+    item = db.session.get(NewsItem, item_id)
+    if item is None or not item.analysis_report.complete:
+        return jsonify({'error': 'News item not found'}), 404
+    report = item.analysis_report
+    if report.user_id != current_user.id and current_user not in report.shared_with_recipients:
+        return jsonify({'error': 'Permission denied'}), 403
+    return jsonify(item.to_dict(include_text=True, include_usage=report.user_id == current_user.id))
 
-    # Apply filters
-    # Date range filter
-    date_range_str = filters.get('date_range')
-    if date_range_str:
-        try:
-            start_date_str, end_date_str = date_range_str.split(' to ')
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1) # end_date is exclusive
-            query = query.filter(NewsItem.publication_date >= start_date, NewsItem.publication_date < end_date)
-        except ValueError:
-            return jsonify({'error': 'Invalid date range format. Use YYYY-MM-DD to YYYY-MM-DD'}), 400
-
-    # Sentiment range filter (e.g., from -1 to +1)
-    sentiment_min = filters.get('sentiment_min')
-    sentiment_max = filters.get('sentiment_max')
-    if sentiment_min is not None:
-        query = query.filter(NewsItem.sentiment_score >= float(sentiment_min))
-    if sentiment_max is not None:
-        query = query.filter(NewsItem.sentiment_score <= float(sentiment_max))
-    
-    # Intent filter (exact match for now, could be 'contains' if intents are stored differently)
-    # Assuming intents are stored as a JSON list string: '["News Report", "Opinion"]'
-    intent_filter = filters.get('intent')
-    if intent_filter:
-        # This requires a LIKE query or a more advanced JSON query if DB supports it.
-        # For SQLite, LIKE is the most straightforward for JSON arrays stored as strings.
-        query = query.filter(NewsItem.intents.like(f'%"{intent_filter}"%'))
-
-    # Keyword filter (search in keywords JSON list string)
-    keyword_filter = filters.get('keyword')
-    if keyword_filter:
-        query = query.filter(NewsItem.keywords.like(f'%"{keyword_filter}"%'))
-    
-    # Source/Author filter (NewsItem doesn't have author/source field yet, this is a placeholder)
-    # source_filter = filters.get('source')
-    # if source_filter:
-    #     query = query.filter(NewsItem.source.ilike(f'%{source_filter}%'))
 
+# Cache counters are process-wide operational data, not any one user's: the stats endpoints
+# only exist in debug mode or when CACHE_STATS_ENABLED is set
+def cache_stats_enabled() -> bool:
+    return current_app.debug or current_app.config.get('CACHE_STATS_ENABLED', False)
+
+# API endpoint exposing analysis cache counters (hits, misses, evictions)
+@bp.route('/api/analysis_cache/stats')
+@login_required
+def api_analysis_cache_stats():
+    if not cache_stats_enabled():
+        return jsonify({'error': 'Not found'}), 404
+    cache = get_analysis_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats()})
+
+# API endpoint exposing report payload cache counters (hit ratio, per-tier entries and bytes)
+@bp.route('/api/payload_cache/stats')
+@login_required
+def api_payload_cache_stats():
+    if not cache_stats_enabled():
+        return jsonify({'error': 'Not found'}), 404
+    cache = get_payload_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats()})
+
+# API endpoint summarizing the current user's analysis API usage (tokens, cost, latency, retries)
+@bp.route('/api/usage_summary')
+@login_required
+def api_usage_summary():
+    days = request.args.get('days', type=int) # Optional look-back window
+    top = min(max(request.args.get('top', 5, type=int), 1), 50)
+
+    # Step 1: Restrict to the user's own reports, optionally within the window
+    report_filter = [AnalysisReport.user_id == current_user.id, AnalysisReport.complete]
+    if days:
+        report_filter.append(AnalysisReport.timestamp >= datetime.now(timezone.utc) - timedelta(days=days))
+
+    # Step 2: Totals from the report rollups
+    totals = db.session.execute(
+        select(
+            func.count(AnalysisReport.id),
+            func.coalesce(func.sum(AnalysisReport.total_prompt_tokens), 0),
+            func.coalesce(func.sum(AnalysisReport.total_completion_tokens), 0),
+            func.coalesce(func.sum(AnalysisReport.total_cached_tokens), 0),
+            func.coalesce(func.sum(AnalysisReport.total_retries), 0),
+            func.coalesce(func.sum(AnalysisReport.total_cost_usd), 0.0),
+            func.coalesce(func.sum(AnalysisReport.total_latency_ms), 0)
+        ).where(*report_filter)
+    ).one()
+    report_count, prompt_tokens, completion_tokens, cached_tokens, retries, cost_usd, latency_ms = totals
+
+    # Step 3: Per-model breakdown from the items
+    item_join = select(NewsItem).join(AnalysisReport).where(*report_filter).subquery()
+    by_model = db.session.execute(
+        select(
+            item_join.c.usage_model,
+            func.count(),
+            func.sum(item_join.c.prompt_tokens),
+            func.sum(item_join.c.completion_tokens),
+            func.sum(item_join.c.cost_usd),
+            func.avg(item_join.c.latency_ms)
+        ).group_by(item_join.c.usage_model)
+    ).all()
+    item_count = sum(row[1] for row in by_model)
+
+    # Step 4: Outliers, to spot pathological inputs
+    slowest_items = db.session.execute(
+        select(NewsItem.id, NewsItem.analysis_report_id, NewsItem.latency_ms, NewsItem.prompt_tokens,
+               NewsItem.completion_tokens, NewsItem.retries)
+        .join(AnalysisReport).where(*report_filter)
+        .order_by(desc(NewsItem.latency_ms)).limit(top)
+    ).all()
+    # The texts are stored compressed, so their lengths are measured on the few outliers only
+    text_lengths = {item_id: len(text) for item_id, text in db.session.execute(
+        select(NewsItem.id, NewsItem.original_text).where(NewsItem.id.in_([row[0] for row in slowest_items]))
+    )}
+    costliest_reports = db.session.scalars(
+        select(AnalysisReport).where(*report_filter).order_by(desc(AnalysisReport.total_cost_usd)).limit(top)
+    ).all()
 
-    # Pagination
-    page = filters.get('page', 1)
-    per_page = filters.get('per_page', 10)
-    
-    # Order by publication date (descending, newest first), then by ID as a fallback
-    paginated_news_items = query.order_by(NewsItem.publication_date.desc().nullslast(), NewsItem.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    
-    news_items_data = [item.to_dict() for item in paginated_news_items.items]
-    
     return jsonify({
-        'news_items': news_items_data,
-        'total_items': paginated_news_items.total,
-        'current_page': paginated_news_items.page,
-        'total_pages': paginated_news_items.pages,
-        'has_next': paginated_news_items.has_next,
-        'has_prev': paginated_news_items.has_prev
+        'days': days,
+        'reports': report_count,
+        'items': item_count,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': cached_tokens,
+        'retries': retries,
+        'cost_usd': round(cost_usd, 6),
+        'total_latency_ms': latency_ms,
+        'avg_item_latency_ms': round(latency_ms / item_count, 1) if item_count else 0.0,
+        'by_model': [{
+            'model': model or 'unknown',
+            'items': items,
+            'prompt_tokens': model_prompt_tokens or 0,
+            'completion_tokens': model_completion_tokens or 0,
+            'cost_usd': round(model_cost or 0.0, 6),
+            'avg_latency_ms': round(avg_latency or 0.0, 1)
+        } for model, items, model_prompt_tokens, model_completion_tokens, model_cost, avg_latency in by_model],
+        'slowest_items': [{
+            'id': item_id,
+            'analysis_report_id': report_id,
+            'latency_ms': item_latency,
+            'prompt_tokens': item_prompt_tokens,
+            'completion_tokens': item_completion_tokens,
+            'retries': item_retries,
+            'text_length': text_lengths.get(item_id, 0)
+        } for item_id, report_id, item_latency, item_prompt_tokens, item_completion_tokens, item_retries in slowest_items],
+        'costliest_reports': [{
+            'id': report.id,
+            'name': report.name,
+            'cost_usd': round(report.total_cost_usd, 6),
+            'prompt_tokens': report.total_prompt_tokens,
+            'completion_tokens': report.total_completion_tokens,
+            'max_item_latency_ms': report.max_item_latency_ms
+        } for report in costliest_reports]
     })
 
+# API endpoint for ranked full-text search across the reports the user owns or has been shared
+@bp.route('/api/search')
+@login_required
+def api_search():
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'No search query provided.'}), 400
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    results = search_news_items(current_user.id, query, limit=limit, offset=offset)
+    for result in results:
+        result['report_url'] = url_for('main.results_dashboard', report_id=result['analysis_report_id'])
+    return jsonify({'query': query, 'offset': offset, 'results': results})
+
+
+# API endpoint for top keywords and intents across the user's own and shared reports
+@bp.route('/api/analytics/tags')
+@login_required
+def api_tag_analytics():
+    try:
+        report_ids = parse_report_ids(request.args.get('report_ids'))
+        start, end = parse_date_bounds(request.args.get('start_date'), request.args.get('end_date'))
+        result = user_tag_analytics(
+            current_user.id, report_ids=report_ids, start=start, end=end,
+            keyword_limit=request.args.get('keyword_limit', DEFAULT_KEYWORD_LIMIT, type=int),
+            intent_limit=request.args.get('intent_limit', DEFAULT_INTENT_LIMIT, type=int),
+            time_budget_ms=current_app.config.get('ANALYTICS_TIME_BUDGET_MS', DEFAULT_TIME_BUDGET_MS)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except AnalyticsBudgetExceeded as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(result)
+
 
 # --- Sharing Routes (Updated for AnalysisReport) ---
 @bp.route('/share_report/<int:report_id>', methods=['GET', 'POST'])
@@ -550,7 +646,7 @@ def share_report(report_id):
 
     report = db.session.get(AnalysisReport, report_id)
     
-    if not report:
+    if not report or not report.complete:
         # --- BEGIN DEBUG LOGGING ---
         current_app.logger.warning(f"[SHARE_REPORT_DEBUG] Report with ID {report_id} NOT FOUND in database.")
         # --- END DEBUG LOGGING ---
@@ -596,7 +692,9 @@ def share_report(report_id):
             flash(f'Report already shared with {user_to_share_with.username}.', 'info')
         else:
             report.shared_with_recipients.append(user_to_share_with)
+            touch_report(report.id)
             db.session.commit()
+            invalidate_report_payloads(report.id)
             flash(f'Report shared successfully with {user_to_share_with.username}.', 'success')
         return redirect(url_for('main.share_report', report_id=report_id))
     
@@ -620,7 +718,7 @@ def manage_report_sharing(report_id):
     according to the selected user IDs, then redirect back.
     """
     report = db.session.get(AnalysisReport, report_id)
-    if not report or report.author.id != current_user.id:
+    if not report or not report.complete or report.author.id != current_user.id:
         flash('Report not found or permission denied.', 'danger')
         return redirect(url_for('main.share_report', report_id=report_id))
 
@@ -649,7 +747,12 @@ def manage_report_sharing(report_id):
             if user:
                 report.shared_with_recipients.remove(user)
 
+        changed = selected_ids != current_ids
+        if changed:
+            touch_report(report.id)
         db.session.commit()
+        if changed:
+            invalidate_report_payloads(report.id)
         flash('Sharing settings updated.', 'success')
     else:
         flash('Failed to update sharing settings.', 'danger')
@@ -671,7 +774,7 @@ def shared_with_me():
 @login_required
 def shared_report_details(report_id):
     report = db.session.get(AnalysisReport, report_id)
-    if not report:
+    if not report or not report.complete:
         flash('Analysis report not found.', 'danger')
         return redirect(url_for('main.shared_with_me'))
 
@@ -690,7 +793,7 @@ def shared_report_details(report_id):
 def visualization():
     # Fetch all analysis reports for current user (trend by report)
     reports = AnalysisReport.query \
-        .filter_by(user_id=current_user.id) \
+        .filter_by(user_id=current_user.id, complete=True) \
         .order_by(AnalysisReport.timestamp) \
         .all()
     dates = [r.timestamp.strftime('%Y-%m-%d %H:%M') for r in reports]
@@ -701,15 +804,12 @@ def visualization():
         for r in reports
     ]
 
-    # Compute overall sentiment counts from news items
-    items = db.session.query(NewsItem) \
-        .join(NewsItem.analysis_report) \
-        .filter(AnalysisReport.user_id == current_user.id) \
-        .all()
+    # Overall sentiment counts from the user's daily rollups
+    label_counts = user_sentiment_counts(current_user.id)
     sentiment_counts_list = [
-        sum(1 for i in items if i.sentiment_label.lower() == 'positive'),
-        sum(1 for i in items if i.sentiment_label.lower() == 'neutral'),
-        sum(1 for i in items if i.sentiment_label.lower() == 'negative'),
+        label_counts[SentimentEnum.POSITIVE.value],
+        label_counts[SentimentEnum.NEUTRAL.value],
+        label_counts[SentimentEnum.NEGATIVE.value],
     ]
 
     return render_template(
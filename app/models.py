@@ -2,21 +2,25 @@
 # Includes models for Users, their sentiment analysis reports (AnalysisReport),
 # and individual news items within those reports (NewsItem).
 
-from datetime import datetime, timezone # Import datetime for timestamping
-from typing import Optional, List # For type hinting optional relationships and lists
+from datetime import date, datetime, timezone # Import datetime for timestamping
+from typing import Any, Callable, Dict, Optional, List # For type hinting optional relationships and lists
 import sqlalchemy as sa # Core SQLAlchemy library
 import sqlalchemy.orm as so # SQLAlchemy ORM components
 from werkzeug.security import generate_password_hash, check_password_hash # For password hashing
 from flask_login import UserMixin # Provides default implementations for Flask-Login user methods
 import json # For handling JSON data in text fields
+import os # For the basename of uploaded source files
 
 # Import the db instance initialized in app/__init__.py
 from app import db, login_manager
+from app.text_compression import CompressedText # Compressed column type for NewsItem.original_text
 
 # Association table for AnalysisReport sharing
 analysis_report_shares = db.Table('analysis_report_shares',
     db.Column('analysis_report_id', sa.Integer, db.ForeignKey('analysis_report.id'), primary_key=True),
-    db.Column('recipient_id', sa.Integer, db.ForeignKey('user.id'), primary_key=True)
+    db.Column('recipient_id', sa.Integer, db.ForeignKey('user.id'), primary_key=True),
+    # The primary key leads with analysis_report_id; "shared with me" lookups go by recipient
+    sa.Index('ix_analysis_report_shares_recipient', 'recipient_id', 'analysis_report_id')
 )
 
 class User(UserMixin, db.Model):
@@ -66,10 +70,14 @@ class AnalysisReport(db.Model):
     Represents a single sentiment analysis report/session.
     This report aggregates data from multiple NewsItem entries.
     """
+    __table_args__ = (
+        # A user's reports in timestamp order (/results, /visualization); also serves user_id lookups
+        sa.Index('ix_analysis_report_user_timestamp', 'user_id', 'timestamp'),
+    )
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     name: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128)) # Optional name for the report
     timestamp: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(timezone.utc)) # Added timestamp
-    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('user.id'), index=True) # Added user_id
+    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('user.id')) # Added user_id (indexed by ix_analysis_report_user_timestamp)
 
     author: so.Mapped['User'] = so.relationship(back_populates='authored_analysis_reports') # Added author relationship
 
@@ -90,6 +98,17 @@ class AnalysisReport(db.Model):
     # Add the missing 'shared' column
     shared: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False, nullable=False)
 
+    # False while app.ingest is still adding the report's items: such a report is left out of every
+    # listing, search and rollup, and its routes answer as if it did not exist
+    complete: so.Mapped[bool] = so.mapped_column(sa.Boolean, nullable=False, default=True, server_default='1')
+
+    # Version stamp, bumped with every change to the report's items, aggregates or sharing
+    # (reports.touch_report); the dashboard and feed API derive their ETag and Last-Modified from it
+    version: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=1, server_default='1')
+    updated_at: so.Mapped[Optional[datetime]] = so.mapped_column(
+        sa.DateTime(timezone=True), nullable=True, default=lambda: datetime.now(timezone.utc)
+    ) # NULL on reports from before the version stamp: their timestamp applies
+
     # Aggregated sentiment data for the entire report
     overall_sentiment_label: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64)) # e.g., 'Positive', 'Neutral', 'Mixed'
     overall_sentiment_score: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
@@ -104,11 +123,31 @@ class AnalysisReport(db.Model):
     aggregated_keywords_json: so.Mapped[Optional[str]] = so.mapped_column(sa.Text) # Added field
     # Stores data for sentiment trend chart: e.g., '{"overall": [{"date": "YYYY-MM-DD", "score": 0.5}, ...], "keyword1": [...] }'
     sentiment_trend_json: so.Mapped[Optional[str]] = so.mapped_column(sa.Text) # Added field
+    # Running counts and score sums behind the three fields above (see reports.ReportAggregator),
+    # so appended items update the aggregates without reprocessing the existing ones
+    aggregate_state_json: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True, deferred=True)
+
+    # API usage rolled up from the report's news items
+    total_prompt_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    total_completion_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    total_cached_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    total_retries: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    total_cost_usd: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False, default=0.0, server_default='0')
+    total_latency_ms: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0') # Sum over items
+    max_item_latency_ms: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
 
 
 class NewsItem(db.Model):
+    __table_args__ = (
+        # A report's feed, newest first: the index order matches ORDER BY publication_date DESC, id DESC,
+        # so pages are read without a sort. sentiment_score is carried along so sentiment range filters
+        # and counts are answered from the index. Also serves analysis_report_id lookups.
+        sa.Index('ix_news_item_report_feed', 'analysis_report_id', 'publication_date', 'id', 'sentiment_score'),
+    )
+
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    original_text: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)
+    # Stored compressed and deferred: loaded (and decompressed) only when accessed, see app/text_compression.py
+    original_text: so.Mapped[str] = so.mapped_column(CompressedText, nullable=False, deferred=True)
     # Sentiment analysis results from OpenAI
     sentiment_label: so.Mapped[str] = so.mapped_column(sa.String(64), nullable=False) # Positive, Neutral, Negative
     sentiment_score: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False, default=0.0)
@@ -116,14 +155,38 @@ class NewsItem(db.Model):
     intents: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True) # Should store JSON string of a list
     keywords: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True) # Should store JSON string of a list
     summary: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True) # Add summary column
+    source: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256), nullable=True) # Publisher/feed name from bulk uploads
+
+    # Usage telemetry of the analysis call that produced this item (see openai_api.AnalysisUsage)
+    usage_model: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64), nullable=True)
+    prompt_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    completion_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    cached_tokens: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    latency_ms: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    retries: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    cost_usd: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False, default=0.0, server_default='0')
 
-    analysis_report_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('analysis_report.id'), index=True)
+    analysis_report_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('analysis_report.id')) # Indexed by ix_news_item_report_feed
     analysis_report: so.Mapped['AnalysisReport'] = so.relationship(back_populates='news_items')
 
-    def to_dict(self) -> dict:
-        """Serializes the NewsItem object to a dictionary."""
-        # Helper to parse JSON safely from text fields
+    # to_dict() without 'id', JSON-encoded when the item is written (see json_fragment), so feed
+    # responses concatenate it instead of re-serializing the item. Deferred: only the feed reads it.
+    # The owner-only usage block is not part of it (see usage_json).
+    feed_json: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True, deferred=True)
+
+    # Normalized copies of the intents/keywords JSON lists, used for filtering and counting
+    keyword_tags: so.Mapped[List['NewsItemKeyword']] = so.relationship(
+        back_populates='news_item', cascade="all, delete-orphan", lazy='select'
+    )
+    intent_tags: so.Mapped[List['NewsItemIntent']] = so.relationship(
+        back_populates='news_item', cascade="all, delete-orphan", lazy='select'
+    )
+
+    @staticmethod
+    def _json_fields(get: Callable[[str], Any]) -> dict:
+        # The to_dict() fields other than 'id', from an item's attributes or from column values
         def parse_json_list(json_str: Optional[str]) -> list:
+            # Parses a JSON list stored as text; anything else yields []
             if not json_str:
                 return []
             try:
@@ -132,16 +195,198 @@ class NewsItem(db.Model):
             except json.JSONDecodeError:
                 return []
 
+        publication_date = get('publication_date')
+        summary = get('summary')
+        if not summary:
+            text = get('original_text')
+            summary = (text[:200] + "...") if len(text) > 200 else text
+        return {
+            'summary': summary,
+            'sentiment_label': get('sentiment_label'),
+            'sentiment_score': get('sentiment_score'),
+            'publication_date': publication_date.isoformat() if publication_date else None,
+            'intents': parse_json_list(get('intents')),
+            'keywords': parse_json_list(get('keywords')),
+            'source': get('source'),
+            'analysis_report_id': get('analysis_report_id')
+        }
+
+    @staticmethod
+    def _usage_fields(get: Callable[[str], Any]) -> dict:
+        # The usage telemetry of an item (model, tokens, latency, cost), shown to the report's author only
+        return {
+            'model': get('usage_model'),
+            'prompt_tokens': get('prompt_tokens'),
+            'completion_tokens': get('completion_tokens'),
+            'cached_tokens': get('cached_tokens'),
+            'latency_ms': get('latency_ms'),
+            'retries': get('retries'),
+            'cost_usd': get('cost_usd')
+        }
+
+    @staticmethod
+    def usage_json(values: Any) -> str:
+        """Encodes the 'usage' object of to_dict(include_usage=True) from a row with the usage columns."""
+        return json.dumps(NewsItem._usage_fields(lambda name: getattr(values, name)), separators=(',', ':'))
+
+    @staticmethod
+    def json_fragment(values: Dict[str, Any]) -> str:
+        """
+        Encodes the feed_json of an item from the column values it is inserted with (including
+        analysis_report_id). SQLite reads datetimes back naive, as the wall time they were
+        written with, so the publication date is encoded the same way.
+        """
+        publication_date = values.get('publication_date')
+        if publication_date is not None:
+            values = dict(values, publication_date=publication_date.replace(tzinfo=None))
+        return json.dumps(NewsItem._json_fields(values.get), separators=(',', ':'))
+
+    def to_dict(self, include_text: bool = False, include_usage: bool = False) -> dict:
+        """
+        Serializes the NewsItem object to a dictionary. The full text is only included with
+        include_text, so lists of items never load it (it is only read as the fallback summary).
+        The usage telemetry is only included with include_usage, i.e. for the report's author:
+        recipients of a shared report do not see its costs.
+        """
+        data = {'id': self.id, **self._json_fields(lambda name: getattr(self, name))}
+        if include_usage:
+            data['usage'] = self._usage_fields(lambda name: getattr(self, name))
+        if include_text:
+            data['original_text'] = self.original_text
+        return data
+
+# Full-text index over NewsItem.original_text and summary (SQLite FTS5, see app/search.py).
+# An external-content table: it stores only the index and is kept in sync by triggers, so every
+# write path (ORM or bulk SQL) updates it. Its content is the news_item_fts_content view, which
+# decompresses the stored text with the news_item_text() SQL function (app/text_compression.py).
+NEWS_ITEM_FTS_DDL = [
+    "CREATE VIEW IF NOT EXISTS news_item_fts_content AS "
+    "SELECT id, news_item_text(original_text) AS original_text, summary FROM news_item",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS news_item_fts USING fts5("
+    "original_text, summary, content='news_item_fts_content', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ai AFTER INSERT ON news_item BEGIN "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) "
+    "VALUES (new.id, news_item_text(new.original_text), new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ad AFTER DELETE ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, news_item_text(old.original_text), old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_au AFTER UPDATE OF original_text, summary ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, news_item_text(old.original_text), old.summary); "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) "
+    "VALUES (new.id, news_item_text(new.original_text), new.summary); END",
+]
+NEWS_ITEM_FTS_DROP_DDL = ["DROP TABLE IF EXISTS news_item_fts", "DROP VIEW IF EXISTS news_item_fts_content"]
+
+for statement in NEWS_ITEM_FTS_DDL:
+    sa.event.listen(NewsItem.__table__, 'after_create', sa.DDL(statement).execute_if(dialect='sqlite'))
+for statement in NEWS_ITEM_FTS_DROP_DDL:
+    sa.event.listen(NewsItem.__table__, 'before_drop', sa.DDL(statement).execute_if(dialect='sqlite'))
+
+# Tag values compare case-insensitively on SQLite, like the LIKE filters they replace
+TAG_MAX_LENGTH = 128
+TagString = sa.String(TAG_MAX_LENGTH).with_variant(sa.String(TAG_MAX_LENGTH, collation='NOCASE'), 'sqlite')
+
+class NewsItemKeyword(db.Model):
+    """
+    One keyword of a NewsItem (normalized from NewsItem.keywords, which remains as a read cache).
+    analysis_report_id is copied from the item so report-level filters and counts use one index.
+    """
+    __tablename__ = 'news_item_keyword'
+    __table_args__ = (
+        sa.Index('ix_news_item_keyword_report_keyword', 'analysis_report_id', 'keyword', 'news_item_id'),
+        sa.Index('ix_news_item_keyword_keyword', 'keyword', 'analysis_report_id'),
+    )
+
+    news_item_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('news_item.id', ondelete='CASCADE'), primary_key=True)
+    keyword: so.Mapped[str] = so.mapped_column(TagString, primary_key=True)
+    analysis_report_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('analysis_report.id', ondelete='CASCADE'), nullable=False)
+
+    news_item: so.Mapped['NewsItem'] = so.relationship(back_populates='keyword_tags')
+
+
+class NewsItemIntent(db.Model):
+    """One intent tag of a NewsItem (normalized from NewsItem.intents). See NewsItemKeyword."""
+    __tablename__ = 'news_item_intent'
+    __table_args__ = (
+        sa.Index('ix_news_item_intent_report_intent', 'analysis_report_id', 'intent', 'news_item_id'),
+        sa.Index('ix_news_item_intent_intent', 'intent', 'analysis_report_id'),
+    )
+
+    news_item_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('news_item.id', ondelete='CASCADE'), primary_key=True)
+    intent: so.Mapped[str] = so.mapped_column(TagString, primary_key=True)
+    analysis_report_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('analysis_report.id', ondelete='CASCADE'), nullable=False)
+
+    news_item: so.Mapped['NewsItem'] = so.relationship(back_populates='intent_tags')
+
+
+class UserDailySentiment(db.Model):
+    """
+    Daily sentiment rollup of a user's news items: per UTC day of the report timestamp and
+    sentiment label, the number of items and the sum of their scores. Kept up to date in the
+    transaction that writes or deletes the items (see app/rollups.py), so /results and
+    /visualization read one row per day and label instead of every item.
+    """
+    __tablename__ = 'user_daily_sentiment'
+
+    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    day: so.Mapped[date] = so.mapped_column(sa.Date, primary_key=True)
+    sentiment_label: so.Mapped[str] = so.mapped_column(sa.String(64), primary_key=True)
+    item_count: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    score_sum: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False, default=0.0, server_default='0')
+
+
+class AnalysisJob(db.Model):
+    """
+    A queued /analyze submission processed in the background by an analysis worker.
+    Workers claim a job by taking a time-limited lease; a job whose lease expires
+    (e.g. because its worker crashed) becomes claimable again.
+    """
+    __tablename__ = 'analysis_job'
+    __table_args__ = (
+        # Used by workers to find queued jobs and jobs with expired leases
+        sa.Index('ix_analysis_job_status_lease', 'status', 'lease_expires_at'),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('user.id'), index=True)
+    report_name: so.Mapped[str] = so.mapped_column(sa.String(128), nullable=False)
+    status: so.Mapped[str] = so.mapped_column(sa.String(16), nullable=False, default='queued') # queued, running, completed, failed
+    payload_json: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False) # JSON list of item texts
+    # Uploaded CSV/JSONL file to ingest instead of payload_json (see app/ingest.py)
+    source_path: so.Mapped[Optional[str]] = so.mapped_column(sa.String(512), nullable=True)
+
+    # Progress counters
+    items_total: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    items_done: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    items_failed: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+
+    # Lease held by the worker currently processing the job
+    lease_owner: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128), nullable=True)
+    lease_expires_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime(timezone=True), nullable=True)
+    attempts: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+
+    analysis_report_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('analysis_report.id'), nullable=True)
+    error: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True)
+    created_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(timezone.utc))
+    updated_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self) -> dict:
+        """Serializes the job's status and progress."""
         return {
-            'id': self.id,
-            'original_text': self.original_text,
-            'summary': self.summary or ((self.original_text[:200] + "...") if len(self.original_text) > 200 else self.original_text),
-            'sentiment_label': self.sentiment_label,
-            'sentiment_score': self.sentiment_score,
-            'publication_date': self.publication_date.isoformat() if self.publication_date else None,
-            'intents': parse_json_list(self.intents),
-            'keywords': parse_json_list(self.keywords),
-            'analysis_report_id': self.analysis_report_id
+            'job_id': self.id,
+            'status': self.status,
+            'report_name': self.report_name,
+            'items_total': self.items_total,
+            'items_done': self.items_done,
+            'items_failed': self.items_failed,
+            'attempts': self.attempts,
+            'source_file': os.path.basename(self.source_path) if self.source_path else None,
+            # An ingest job links its report while the report is still hidden; it is only published once completed
+            'analysis_report_id': self.analysis_report_id if self.status == 'completed' else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 @login_manager.user_loader
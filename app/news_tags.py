@@ -0,0 +1,77 @@
+# Normalized keyword and intent tags of news items.
+# NewsItem.keywords/intents keep the JSON lists returned by the analyzer (a read cache for
+# serialization); the news_item_keyword and news_item_intent tables hold one indexed row per
+# tag and back the filters and tag counts.
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import NewsItem, NewsItemKeyword, NewsItemIntent, TAG_MAX_LENGTH
+
+
+def unique_tags(values: Optional[Iterable[Any]]) -> List[str]:
+    """
+    Returns the distinct, non-empty string tags in `values`, in their original order.
+    Tags are trimmed to TAG_MAX_LENGTH and compared case-insensitively, like the tag columns.
+    """
+    tags, seen = [], set()
+    for value in values or []:
+        if not isinstance(value, str):
+            continue
+        tag = value.strip()[:TAG_MAX_LENGTH]
+        if tag and tag.casefold() not in seen:
+            seen.add(tag.casefold())
+            tags.append(tag)
+    return tags
+
+def keyword_tag_rows(news_item_id: int, report_id: int, keywords: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+    """Builds the news_item_keyword rows for an item's keywords, for a bulk INSERT."""
+    return [{'news_item_id': news_item_id, 'analysis_report_id': report_id, 'keyword': kw}
+            for kw in unique_tags(keywords)]
+
+def intent_tag_rows(news_item_id: int, report_id: int, intents: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+    """Builds the news_item_intent rows for an item's intents, for a bulk INSERT."""
+    return [{'news_item_id': news_item_id, 'analysis_report_id': report_id, 'intent': intent}
+            for intent in unique_tags(intents)]
+
+def has_keyword(keyword: str, report_id: Optional[int] = None):
+    """Filter clause for news items tagged with `keyword`, optionally within one report."""
+    matches = sa.select(NewsItemKeyword.news_item_id).where(NewsItemKeyword.keyword == keyword.strip())
+    if report_id is not None:
+        matches = matches.where(NewsItemKeyword.analysis_report_id == report_id)
+    return NewsItem.id.in_(matches)
+
+def has_intent(intent: str, report_id: Optional[int] = None):
+    """Filter clause for news items tagged with `intent`, optionally within one report."""
+    matches = sa.select(NewsItemIntent.news_item_id).where(NewsItemIntent.intent == intent.strip())
+    if report_id is not None:
+        matches = matches.where(NewsItemIntent.analysis_report_id == report_id)
+    return NewsItem.id.in_(matches)
+
+def keyword_stats(report_ids, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Most frequent keywords across the given reports (IDs, or a SELECT of IDs), with their
+    item counts and the items' average sentiment score.
+    """
+    return _tag_stats(NewsItemKeyword, NewsItemKeyword.keyword, report_ids, limit)
+
+def intent_stats(report_ids, limit: int = 5) -> List[Dict[str, Any]]:
+    """Most frequent intents across the given reports, like keyword_stats()."""
+    return _tag_stats(NewsItemIntent, NewsItemIntent.intent, report_ids, limit)
+
+def _tag_stats(tag_model, tag_column, report_ids, limit: int) -> List[Dict[str, Any]]:
+    # Tag rows are unique per item, so count() counts items; the join reads each item by primary key
+    count = sa.func.count()
+    if not isinstance(report_ids, sa.Select):
+        report_ids = list(report_ids)
+    rows = db.session.execute(
+        sa.select(tag_column, count, sa.func.avg(NewsItem.sentiment_score))
+        .join(NewsItem, NewsItem.id == tag_model.news_item_id)
+        .where(tag_model.analysis_report_id.in_(report_ids))
+        .group_by(tag_column)
+        .order_by(count.desc(), tag_column)
+        .limit(limit)
+    ).all()
+    return [{'text': tag, 'count': n, 'avg_sentiment': round(avg or 0.0, 4)} for tag, n, avg in rows]
@@ -2,10 +2,31 @@
 
 from enum import Enum
 from pydantic import BaseModel, ValidationError, Field
-from openai import OpenAI, OpenAIError
+from openai import OpenAIError
 import os
-from typing import List, Optional
+import json # For encoding batched prompts
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed # For concurrent per-item analysis
 import datetime # For date parsing attempt
+import time # For per-call latency telemetry
+from app.analyzer_backend import AnalyzerBackend, get_analyzer, get_fallback_analyzer
+from app.openai_client import get_openai_client_manager
+
+# Model used for news item analysis
+OPENAI_MODEL = "gpt-4.1-nano"
+# Bump whenever the system prompt or expected response schema changes, so cached results
+# produced by an older prompt are not reused.
+PROMPT_VERSION = "1"
+
+# USD per million tokens as (prompt, cached prompt, completion), used for cost telemetry.
+# Models without an entry are reported with zero cost.
+MODEL_PRICING = {
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+# Default cap on how many analysis requests may be in flight at once for a single submission.
+# Overridden by the ANALYSIS_MAX_CONCURRENCY config value.
+DEFAULT_MAX_CONCURRENCY = 8
 
 # Define the allowed sentiment values using an Enum for strict validation
 class SentimentEnum(str, Enum):
@@ -35,6 +56,24 @@ class KeywordSentiment(BaseModel):
     # If direct keyword sentiment is crucial and achievable, this model can be expanded.
     # sentiment_score: Optional[float] = Field(default=None, description="Sentiment score of the keyword itself, if determinable.")
 
+class AnalysisUsage(BaseModel):
+    """Token usage, latency and retries of the call that produced one analysis result."""
+    model: str = Field(description="Model or backend that produced the result.")
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0 # Prompt tokens served from the provider's prompt cache
+    latency_ms: int = 0 # Wall time including retries and rate-limit waits
+    retries: int = 0
+    cache_hit: bool = False # Served from the local analysis cache without calling the backend
+
+    @property
+    def cost_usd(self) -> float:
+        """Estimated cost of the call according to MODEL_PRICING."""
+        prompt_price, cached_price, completion_price = MODEL_PRICING.get(self.model, (0.0, 0.0, 0.0))
+        uncached_prompt_tokens = max(0, self.prompt_tokens - self.cached_tokens)
+        return (uncached_prompt_tokens * prompt_price + self.cached_tokens * cached_price
+                + self.completion_tokens * completion_price) / 1_000_000
+
 class SingleNewsItemAnalysis(BaseModel):
     sentiment_label: SentimentEnum = Field(description="Overall sentiment label of the text (Positive, Neutral, or Negative).")
     sentiment_score: float = Field(description="Overall sentiment score from -1.0 (very negative) to +1.0 (very positive). Ensure this is a numeric value.")
@@ -42,39 +81,121 @@ class SingleNewsItemAnalysis(BaseModel):
     keywords: Optional[List[str]] = Field(default_factory=list, description="List of up to 10-15 most relevant extracted keywords from the text. These should be single words or short multi-word phrases.") # Changed from KeywordSentiment for now
     publication_date: Optional[str] = Field(default=None, description="Estimated publication date of the news item in YYYY-MM-DD format. Return null if not found or ambiguous.")
     summary: Optional[str] = Field(default=None, description="A concise news-style headline (max 10 words).")
+    # Telemetry attached after the call; never part of the model's response schema or the cache payload
+    usage: Optional[AnalysisUsage] = Field(default=None, exclude=True)
 
-def analyze_text_data(text: str) -> SingleNewsItemAnalysis:
+def _default_analysis() -> SingleNewsItemAnalysis:
+    """Returns the neutral placeholder result used when an item cannot be analyzed."""
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=[], keywords=[], publication_date=None)
+
+def _get_cached_analysis(text: str, backend: Optional[AnalyzerBackend] = None) -> Optional[SingleNewsItemAnalysis]:
+    """Returns the cached analysis for `text` under the backend's model and prompt, if any."""
+    from app.analysis_cache import get_analysis_cache, make_cache_key
+    backend = backend or get_analyzer()
+    cache = get_analysis_cache()
+    if cache is None or not backend.cacheable:
+        return None
+    return cache.get(make_cache_key(text, backend.model_name, backend.prompt_version))
+
+def _store_cached_analysis(text: str, analysis: SingleNewsItemAnalysis, backend: Optional[AnalyzerBackend] = None):
+    """Stores a validated analysis for `text` in the process-wide cache, if enabled."""
+    from app.analysis_cache import get_analysis_cache, make_cache_key
+    backend = backend or get_analyzer()
+    cache = get_analysis_cache()
+    if cache is not None and backend.cacheable:
+        cache.set(make_cache_key(text, backend.model_name, backend.prompt_version), analysis)
+
+def _token_count(value) -> int:
+    # Usage fields are missing or None for some responses
+    return value if isinstance(value, int) else 0
+
+def _usage_from_response(response, latency_seconds: float, retries: int) -> AnalysisUsage:
+    """Builds the telemetry record for one chat completion from its `usage` block."""
+    usage = getattr(response, 'usage', None)
+    prompt_details = getattr(usage, 'prompt_tokens_details', None)
+    return AnalysisUsage(
+        model=OPENAI_MODEL,
+        prompt_tokens=_token_count(getattr(usage, 'prompt_tokens', 0)),
+        completion_tokens=_token_count(getattr(usage, 'completion_tokens', 0)),
+        cached_tokens=_token_count(getattr(prompt_details, 'cached_tokens', 0)),
+        latency_ms=int(latency_seconds * 1000),
+        retries=retries
+    )
+
+def _split_usage(usage: AnalysisUsage, weights: Sequence[int]) -> List[AnalysisUsage]:
     """
-    Analyzes the sentiment, intents, keywords, and publication date of the provided text 
-    using the OpenAI API's structured output parsing feature with Pydantic validation.
+    Divides the usage of one batched completion among its items in proportion to `weights`
+    (their estimated prompt tokens). Every item keeps the batch's latency and retries.
+    """
+    total_weight = sum(weights) or len(weights)
+    shares = []
+    for weight in weights:
+        fraction = (weight or (total_weight / len(weights))) / total_weight
+        shares.append(usage.model_copy(update={
+            'prompt_tokens': round(usage.prompt_tokens * fraction),
+            'completion_tokens': round(usage.completion_tokens * fraction),
+            'cached_tokens': round(usage.cached_tokens * fraction),
+        }))
+    return shares
+
+def _mark_cache_hit(analysis: SingleNewsItemAnalysis, backend: AnalyzerBackend) -> SingleNewsItemAnalysis:
+    # A cached result costs nothing, whatever the original call used
+    analysis.usage = AnalysisUsage(model=backend.model_name, cache_hit=True)
+    return analysis
+
+def _is_too_short(text: str) -> bool:
+    """Texts under 10 characters are not worth sending to the model."""
+    return not text or len(text.strip()) < 10
+
+def _request_text_analysis(text: str) -> SingleNewsItemAnalysis:
+    """
+    Analyzes a single text with the active analyzer backend, using the analysis cache.
+
+    Unlike analyze_text_data, errors are raised to the caller so that batch runners
+    can tell a failed item apart from a genuinely neutral one.
 
     Args:
         text (str): The news text to analyze.
 
     Returns:
-        SingleNewsItemAnalysis: A Pydantic model containing sentiment label, sentiment score,
-                                a list of intents, and a list of keywords. Returns an instance 
-                                with default/empty values and neutral sentiment if analysis 
-                                or validation fails or input text is too short.
+        SingleNewsItemAnalysis: The validated analysis result.
+
+    Raises:
+        ValidationError: If the response does not match the expected schema.
+        OpenAIError: If the API call fails.
+        ValueError: If the API returns an empty response.
     """
     # Add a check for empty or very short input text
-    if not text or len(text.strip()) < 10: # Minimum 10 characters for meaningful analysis
-        print(f"Input text is too short or empty. Skipping OpenAI analysis. Text (first 50 chars): '{text[:50]}...'")
-        return SingleNewsItemAnalysis(
-            sentiment_label=SentimentEnum.NEUTRAL,
-            sentiment_score=0.0,
-            intents=[],
-            keywords=[],
-            publication_date=None
-        )
-    
+    if _is_too_short(text): # Minimum 10 characters for meaningful analysis
+        print(f"Input text is too short or empty. Skipping analysis. Text (first 50 chars): '{text[:50]}...'")
+        return _default_analysis()
+
+    backend = get_analyzer()
+    # Return a previously stored result for identical text without calling the backend
+    cached_analysis = _get_cached_analysis(text, backend)
+    if cached_analysis is not None:
+        return _mark_cache_hit(cached_analysis, backend)
+
+    started = time.monotonic()
+    analysis_data = backend.analyze(text)
+    if analysis_data.usage is None: # Backends without token accounting still report latency
+        analysis_data.usage = AnalysisUsage(model=backend.model_name, latency_ms=int((time.monotonic() - started) * 1000))
+    # Only validated responses are cached; fallbacks are never stored
+    _store_cached_analysis(text, analysis_data, backend)
+    return analysis_data
+
+def _request_openai_analysis(text: str) -> SingleNewsItemAnalysis:
+    """
+    Sends a single text to the OpenAI API and validates the structured response.
+
+    Raises:
+        ValidationError: If the response does not match the expected schema.
+        OpenAIError: If the API call fails.
+        ValueError: If the API returns an empty response.
+    """
     # Ensure OPENAI_API_KEY is set, otherwise raise an error or handle appropriately
     # For example, by checking os.environ.get("OPENAI_API_KEY")
     # This part is assumed to be handled by the app's configuration.
-    
-    # Initialize OpenAI client (consider initializing it once globally in your app)
-    # client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    client = OpenAI() # Assuming API key is set in environment variables
 
     system_prompt = f"""
     Analyze the sentiment of the following text and return a structured JSON response with the following fields:
@@ -89,42 +210,368 @@ def analyze_text_data(text: str) -> SingleNewsItemAnalysis:
     Ensure the output is valid JSON and that "intents" contains no more than 5 items.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-nano",
+    # The shared client reuses pooled connections; the manager paces and retries the call
+    started = time.monotonic()
+    response, retries = get_openai_client_manager().call_with_retries(
+        lambda client: client.chat.completions.create(
+            model=OPENAI_MODEL,
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": text}
             ]
-        )
-        
-        response_content = response.choices[0].message.content
-        if response_content is None:
-            # Handle cases where response_content is None, perhaps log an error or return a default object
-            print("OpenAI response content is None.")
-            return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=[], keywords=[], publication_date=None)
+        ),
+        estimated_tokens=estimate_tokens(system_prompt) + estimate_tokens(text) + BATCH_OUTPUT_TOKENS_PER_ITEM
+    )
+    
+    response_content = response.choices[0].message.content
+    if response_content is None:
+        raise ValueError("OpenAI response content is None.")
 
-        analysis_data = SingleNewsItemAnalysis.model_validate_json(response_content)
-        return analysis_data
+    analysis_data = SingleNewsItemAnalysis.model_validate_json(response_content)
+    analysis_data.usage = _usage_from_response(response, time.monotonic() - started, retries)
+    return analysis_data
+
+def _analyze_with_fallback(text: str, error: Exception,
+                           fallback_backend: Optional[AnalyzerBackend]) -> Tuple[SingleNewsItemAnalysis, Optional[Exception]]:
+    """
+    Re-analyzes a failed item with the fallback backend (degraded mode).
+
+    Returns:
+        Tuple[SingleNewsItemAnalysis, Optional[Exception]]: The fallback result and None, or the
+            neutral default and the original error if there is no fallback or it failed too.
+            The fallback result's usage names the fallback backend, which marks the item as
+            analyzed in degraded mode.
+    """
+    if fallback_backend is None or _is_too_short(text):
+        return _default_analysis(), error
+    try:
+        started = time.monotonic()
+        analysis = fallback_backend.analyze(text)
+        analysis.usage = AnalysisUsage(model=fallback_backend.model_name,
+                                       latency_ms=int((time.monotonic() - started) * 1000))
+        return analysis, None
+    except Exception as fallback_error:
+        print(f"Fallback analyzer {fallback_backend.name} failed: {fallback_error}")
+        return _default_analysis(), error
+
+def analyze_text_data(text: str) -> SingleNewsItemAnalysis:
+    """
+    Analyzes the sentiment, intents, keywords, and publication date of the provided text 
+    using the active analyzer backend (by default the OpenAI API's structured output
+    parsing feature with Pydantic validation). If the backend fails, the fallback
+    backend is tried before giving up.
+
+    Args:
+        text (str): The news text to analyze.
+
+    Returns:
+        SingleNewsItemAnalysis: A Pydantic model containing sentiment label, sentiment score,
+                                a list of intents, and a list of keywords. Returns an instance 
+                                with default/empty values and neutral sentiment if analysis 
+                                or validation fails or input text is too short.
+    """
+    try:
+        return _request_text_analysis(text)
 
     except ValidationError as ve:
         # Log the validation error details for debugging
         print(f"Pydantic Validation Error: {ve.errors()}")
-        # Fallback to a neutral default if validation fails
-        return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=[], keywords=[], publication_date=None)
+        # Fallback to the degraded-mode backend, or a neutral default, if validation fails
+        return _analyze_with_fallback(text, ve, get_fallback_analyzer())[0]
 
     except OpenAIError as e:
         # Log the OpenAI API error
         print(f"OpenAI API Error: {e}")
-        # Fallback to a neutral default
-        return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=[], keywords=[], publication_date=None)
+        # Fallback to the degraded-mode backend, or a neutral default
+        return _analyze_with_fallback(text, e, get_fallback_analyzer())[0]
 
     except Exception as e:
         # Log any other unexpected errors
-        print(f"Unexpected error during OpenAI analysis: {e}")
-        # Fallback to a neutral default
-        return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=[], keywords=[], publication_date=None)
+        print(f"Unexpected error during analysis: {e}")
+        # Fallback to the degraded-mode backend, or a neutral default
+        return _analyze_with_fallback(text, e, get_fallback_analyzer())[0]
+
+# --- Batched analysis: several news items per chat completion ---
+
+# Rough number of completion tokens the model needs to describe one item in a batch response.
+# Counted against the token budget together with the item's own prompt tokens.
+BATCH_OUTPUT_TOKENS_PER_ITEM = 200
+# Hard cap on items per batch, regardless of how short they are
+DEFAULT_BATCH_MAX_ITEMS = 20
+
+class IndexedNewsItemAnalysis(SingleNewsItemAnalysis):
+    index: int = Field(description="Zero-based index of the news item this analysis belongs to.")
+
+class BatchAnalysisResponse(BaseModel):
+    items: List[IndexedNewsItemAnalysis] = Field(description="One analysis per input news item.")
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)."""
+    return (len(text or '') + 3) // 4
+
+def pack_batches(texts: Sequence[str], token_budget: int,
+                 max_items: int = DEFAULT_BATCH_MAX_ITEMS) -> List[List[int]]:
+    """
+    Groups text indices into batches whose estimated token cost stays within `token_budget`.
+
+    Items keep their input order. An item that exceeds the budget on its own is placed in a
+    batch by itself rather than being dropped.
+
+    Args:
+        texts (Sequence[str]): The texts to pack.
+        token_budget (int): Maximum estimated prompt plus completion tokens per batch.
+        max_items (int): Maximum number of items per batch.
+
+    Returns:
+        List[List[int]]: Batches of indices into `texts`.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        cost = estimate_tokens(text) + BATCH_OUTPUT_TOKENS_PER_ITEM
+        if current and (current_tokens + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _request_batch_analysis(texts: Sequence[str]) -> List[SingleNewsItemAnalysis]:
+    """
+    Analyzes several texts with a single chat completion.
+
+    Raises:
+        ValidationError: If the response does not match BatchAnalysisResponse.
+        ValueError: If the response is empty or its indices do not map one-to-one to the inputs.
+        OpenAIError: If the API call fails.
+    """
+    system_prompt = f"""
+    You will receive a JSON list of news items, each with an "index" and a "text".
+    Analyze EACH item independently and return a JSON object {{"items": [...]}} with exactly one entry per input item.
+    Every entry must contain:
+    - "index": The index of the input item it describes.
+    - "sentiment_label": Overall sentiment (Positive, Neutral, or Negative).
+    - "sentiment_score": A score from -1.0 (very negative) to +1.0 (very positive).
+    - "intents": A list of AT MOST 5 most relevant intent tags from: {PREDEFINED_INTENT_TAGS}.
+    - "keywords": A list of 10-15 single words or short phrases that capture the main topics/themes of the text.
+      Do NOT include generic sentiment adjectives unless they are central to the topic.
+    - "publication_date": The estimated publication date in YYYY-MM-DD format or null.
+    - "summary": A concise news-style headline in no more than 10 words.
+
+    Ensure the output is valid JSON and that "intents" contains no more than 5 items per entry.
+    """
+    user_content = json.dumps([{"index": i, "text": text} for i, text in enumerate(texts)], ensure_ascii=False)
+
+    started = time.monotonic()
+    response, retries = get_openai_client_manager().call_with_retries(
+        lambda client: client.chat.completions.create(
+            model=OPENAI_MODEL,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ]
+        ),
+        estimated_tokens=estimate_tokens(system_prompt) + estimate_tokens(user_content)
+                         + BATCH_OUTPUT_TOKENS_PER_ITEM * len(texts)
+    )
+
+    response_content = response.choices[0].message.content
+    if response_content is None:
+        raise ValueError("OpenAI batch response content is None.")
+
+    batch = BatchAnalysisResponse.model_validate_json(response_content)
+    by_index = {entry.index: entry for entry in batch.items}
+    if len(batch.items) != len(texts) or set(by_index) != set(range(len(texts))):
+        raise ValueError(f"Batch response indices {sorted(by_index)} do not match {len(texts)} inputs.")
+    analyses = [SingleNewsItemAnalysis.model_validate(by_index[i].model_dump(exclude={'index'})) for i in range(len(texts))]
+    usage_shares = _split_usage(_usage_from_response(response, time.monotonic() - started, retries),
+                                [estimate_tokens(text) for text in texts])
+    for analysis, usage in zip(analyses, usage_shares):
+        analysis.usage = usage
+    return analyses
+
+def _analyze_batch_with_split(texts: Sequence[str]) -> List[Union[SingleNewsItemAnalysis, Exception]]:
+    """
+    Analyzes a batch, splitting it in half and retrying each half whenever the batched
+    response fails validation. A single item that still fails is retried with the
+    single-item prompt; if that fails too, its error takes its place in the results, so
+    one bad item never costs the rest of the batch. An API error on the whole batch
+    propagates to the caller; after a split it only takes the place of the failing half.
+    """
+    if len(texts) == 1:
+        try:
+            return [_request_openai_analysis(texts[0])]
+        except Exception as e:
+            print(f"Item failed on its own after splitting its batch: {e}")
+            return [e]
+    try:
+        return _request_batch_analysis(texts)
+    except (ValidationError, ValueError) as e:
+        print(f"Batch of {len(texts)} items failed validation, splitting: {e}")
+    middle = len(texts) // 2
+    results: List[Union[SingleNewsItemAnalysis, Exception]] = []
+    for half in (texts[:middle], texts[middle:]):
+        try:
+            results += _analyze_batch_with_split(half)
+        except Exception as e: # API error: keep the results of the other half
+            print(f"Half batch of {len(half)} items failed: {e}")
+            results += [e] * len(half)
+    return results
+
+class OpenAIBackend(AnalyzerBackend):
+    """Analyzer backend that calls the OpenAI chat completions API."""
+    name = 'openai'
+    model_name = OPENAI_MODEL
+    prompt_version = PROMPT_VERSION
+    supports_batching = True
+
+    def analyze(self, text: str) -> SingleNewsItemAnalysis:
+        return _request_openai_analysis(text)
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Union[SingleNewsItemAnalysis, Exception]]:
+        return _analyze_batch_with_split(texts)
+
+def _iter_batched_analyses(texts: Sequence[str], max_workers: int, token_budget: int,
+                           max_items: int = DEFAULT_BATCH_MAX_ITEMS,
+                           analyze_batch_fn: Optional[Callable[[Sequence[str]], List[Union[SingleNewsItemAnalysis, Exception]]]] = None,
+                           fallback_backend: Optional[AnalyzerBackend] = None
+                           ) -> Iterator[Tuple[int, SingleNewsItemAnalysis, Optional[Exception]]]:
+    """Batched counterpart of iter_text_analyses; see that function for the yielded values."""
+    backend = get_analyzer()
+    analyze_batch_fn = analyze_batch_fn or backend.analyze_batch
+
+    # Serve cached and trivially short items directly; only the rest are sent to the model
+    pending: List[int] = []
+    for index, text in enumerate(texts):
+        if _is_too_short(text):
+            yield index, _default_analysis(), None
+            continue
+        cached_analysis = _get_cached_analysis(text, backend)
+        if cached_analysis is not None:
+            yield index, _mark_cache_hit(cached_analysis, backend), None
+        else:
+            pending.append(index)
+    if not pending:
+        return
+
+    batches = [[pending[i] for i in batch] for batch in
+               pack_batches([texts[i] for i in pending], token_budget, max_items=max_items)]
+    worker_count = max(1, min(int(max_workers or 1), len(batches)))
+
+    with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='analysis-batch') as executor:
+        futures = {executor.submit(analyze_batch_fn, [texts[i] for i in batch]): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                analyses = future.result()
+            except Exception as e:
+                print(f"Batch analysis failed for items {batch}: {e}")
+                for index in batch:
+                    yield (index, *_analyze_with_fallback(texts[index], e, fallback_backend))
+                continue
+            for index, analysis in zip(batch, analyses):
+                if isinstance(analysis, Exception): # Only this item failed
+                    yield (index, *_analyze_with_fallback(texts[index], analysis, fallback_backend))
+                    continue
+                _store_cached_analysis(texts[index], analysis, backend)
+                yield index, analysis, None
+
+def analysis_options_from_config(config) -> dict:
+    """
+    Reads the concurrency and batching settings from a Flask config mapping and returns
+    them as keyword arguments for iter_text_analyses / analyze_texts_concurrently.
+    The fallback backend itself is selected by create_app() via configure_analyzer().
+    """
+    return {
+        'fallback_backend': get_fallback_analyzer(),
+        'max_workers': config.get('ANALYSIS_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY),
+        # Batched prompts are only used when enabled; None selects one prompt per item
+        'batch_token_budget': config.get('ANALYSIS_BATCH_TOKEN_BUDGET') if config.get('ANALYSIS_BATCH_MODE') else None,
+        'batch_max_items': config.get('ANALYSIS_BATCH_MAX_ITEMS', DEFAULT_BATCH_MAX_ITEMS),
+    }
+
+def iter_text_analyses(texts: Sequence[str],
+                       max_workers: int = DEFAULT_MAX_CONCURRENCY,
+                       analyze_fn: Optional[Callable[[str], SingleNewsItemAnalysis]] = None,
+                       batch_token_budget: Optional[int] = None,
+                       batch_max_items: int = DEFAULT_BATCH_MAX_ITEMS,
+                       fallback_backend: Optional[AnalyzerBackend] = None
+                       ) -> Iterator[Tuple[int, SingleNewsItemAnalysis, Optional[Exception]]]:
+    """
+    Analyzes several texts concurrently and yields each result as soon as it finishes.
+
+    At most `max_workers` analyses are in flight at any time. A failing item yields the
+    neutral default together with the exception instead of aborting the whole batch,
+    and a slow item only delays its own result. If a fallback backend is given, failed
+    items are re-analyzed with it and count as successful when it succeeds.
+
+    Args:
+        texts (Sequence[str]): The texts to analyze.
+        max_workers (int): Upper bound on concurrent analysis requests.
+        analyze_fn (Callable, optional): Function used to analyze one text. Must raise on
+                                         failure. Defaults to the active analyzer backend.
+        batch_token_budget (int, optional): When set, items are packed into multi-item
+                                            prompts of at most this many estimated tokens.
+                                            Ignored if the backend cannot batch.
+        batch_max_items (int): Maximum number of items per batched prompt.
+        fallback_backend (AnalyzerBackend, optional): Degraded-mode backend for failed items.
+
+    Yields:
+        Tuple[int, SingleNewsItemAnalysis, Optional[Exception]]: The input index of the item,
+            its analysis result, and the error that occurred (None on success),
+            in completion order.
+    """
+    if not texts:
+        return
+    if batch_token_budget and get_analyzer().supports_batching:
+        yield from _iter_batched_analyses(texts, max_workers, batch_token_budget, max_items=batch_max_items,
+                                          fallback_backend=fallback_backend)
+        return
+
+    analyze_fn = analyze_fn or _request_text_analysis
+    worker_count = max(1, min(int(max_workers or 1), len(texts)))
+
+    with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix='analysis') as executor:
+        futures = {executor.submit(analyze_fn, text): index for index, text in enumerate(texts)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result(), None
+            except Exception as e:
+                print(f"Analysis failed for item {index}: {e}")
+                yield (index, *_analyze_with_fallback(texts[index], e, fallback_backend))
+
+def analyze_texts_concurrently(texts: Sequence[str],
+                               max_workers: int = DEFAULT_MAX_CONCURRENCY,
+                               batch_token_budget: Optional[int] = None,
+                               batch_max_items: int = DEFAULT_BATCH_MAX_ITEMS,
+                               fallback_backend: Optional[AnalyzerBackend] = None) -> List[SingleNewsItemAnalysis]:
+    """
+    Analyzes several texts concurrently and returns the results in input order.
+
+    Args:
+        texts (Sequence[str]): The texts to analyze.
+        max_workers (int): Upper bound on concurrent analysis requests.
+        batch_token_budget (int, optional): Enables batched prompts; see iter_text_analyses.
+        batch_max_items (int): Maximum number of items per batched prompt.
+        fallback_backend (AnalyzerBackend, optional): Degraded-mode backend for failed items.
+
+    Returns:
+        List[SingleNewsItemAnalysis]: One result per input text, in the same order.
+                                      Failed items are replaced by the neutral default.
+    """
+    results: List[Optional[SingleNewsItemAnalysis]] = [None] * len(texts)
+    for index, analysis, _error in iter_text_analyses(texts, max_workers=max_workers,
+                                                      batch_token_budget=batch_token_budget,
+                                                      batch_max_items=batch_max_items,
+                                                      fallback_backend=fallback_backend):
+        results[index] = analysis
+    return results
 
 # The original `AnalysisOutput` class is replaced by `SingleNewsItemAnalysis`.
 # The `analyze_sentiment` function can be kept for simple sentiment label retrieval if needed,
@@ -0,0 +1,344 @@
+# Process-wide OpenAI client manager.
+# All analysis requests share one OpenAI client (and so one keep-alive HTTP connection pool)
+# and pass through the same pacing and retry logic:
+# - a token bucket keeps requests and tokens per minute within the account's rate limits,
+# - 429 and 5xx responses are retried with jittered exponential backoff, honouring Retry-After,
+# - an AIMD limiter lowers the number of in-flight requests when latency or errors rise,
+#   and slowly raises it again while requests succeed.
+
+import email.utils
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple, TypeVar
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient, APIConnectionError, APIStatusError, RateLimitError
+
+T = TypeVar('T')
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 30.0
+# Requests and tokens per minute; 0 disables the corresponding limit
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200_000
+# Upper bound on requests in flight across the whole process
+DEFAULT_MAX_IN_FLIGHT = 16
+# Average latency above which the in-flight limit is reduced
+DEFAULT_LATENCY_TARGET_SECONDS = 10.0
+
+
+class TokenBucket:
+    """
+    Paces requests against a requests-per-minute and a tokens-per-minute budget.
+
+    Both buckets start full and refill continuously. acquire() blocks until the request
+    and its estimated tokens fit; pause() stops all callers, e.g. after a 429 response.
+    """
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_allowance = min(float(self.requests_per_minute),
+                                          self._request_allowance + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._token_allowance = min(float(self.tokens_per_minute),
+                                        self._token_allowance + elapsed * self.tokens_per_minute / 60.0)
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        wait = max(0.0, self._paused_until - now)
+        if self.requests_per_minute and self._request_allowance < 1.0:
+            wait = max(wait, (1.0 - self._request_allowance) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute and self._token_allowance < tokens:
+            wait = max(wait, (tokens - self._token_allowance) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Blocks until one request with `tokens` estimated tokens may be sent.
+
+        Returns:
+            float: Total seconds spent waiting.
+        """
+        # A single request larger than the whole budget only has to wait for a full bucket
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._request_allowance -= 1.0
+                    self._token_allowance -= tokens
+                    return waited
+            self._sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """Holds back every caller for `seconds`, e.g. while the provider is throttling us."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps in-flight requests with an additive-increase / multiplicative-decrease limit.
+
+    Each success raises the limit by 1/limit (about +1 per round of requests). A throttled
+    or failed request, or an average latency above `latency_target`, halves it.
+    """
+
+    def __init__(self, max_limit: int = DEFAULT_MAX_IN_FLIGHT, min_limit: int = 1,
+                 latency_target: float = DEFAULT_LATENCY_TARGET_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self._clock = clock
+        self._limit = float(self.max_limit)
+        self._in_flight = 0
+        self._latency_average: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def slot(self):
+        """Waits for a free slot under the current limit and holds it for the block."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def record(self, latency: float, overloaded: bool = False):
+        """
+        Feeds back the outcome of one request.
+
+        Args:
+            latency (float): Seconds the request took.
+            overloaded (bool): True for throttling, server errors and timeouts.
+        """
+        with self._condition:
+            # Exponentially weighted moving average, so one slow call does not trigger a decrease
+            if self._latency_average is None:
+                self._latency_average = latency
+            else:
+                self._latency_average = 0.8 * self._latency_average + 0.2 * latency
+
+            if overloaded or self._latency_average > self.latency_target:
+                now = self._clock()
+                # Decrease at most once per average latency, since in-flight requests report the same congestion
+                if now - self._last_decrease >= min(self._latency_average, self.latency_target):
+                    self._limit = max(float(self.min_limit), self._limit / 2)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    # The API sends Retry-After as seconds or an HTTP date, and sometimes retry-after-ms
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_date.timestamp() - time.time()) if retry_date else None
+
+def is_retryable_error(error: Exception) -> bool:
+    """Throttling, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(error, (RateLimitError, APIConnectionError)): # APITimeoutError is an APIConnectionError
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 408 or error.status_code >= 500)
+
+
+class OpenAIClientManager:
+    """
+    Owns the shared OpenAI client and runs every API call through pacing, retries and
+    adaptive concurrency. Safe to use from many threads at once.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX_SECONDS,
+                 requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 latency_target: float = DEFAULT_LATENCY_TARGET_SECONDS,
+                 client_factory: Callable[..., OpenAI] = OpenAI,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client_factory = client_factory # Class used to create the shared client
+        self._sleep = sleep
+        self.rate_limiter = TokenBucket(requests_per_minute, tokens_per_minute, sleep=sleep)
+        self.concurrency = AdaptiveConcurrencyLimiter(max_limit=max_in_flight, latency_target=latency_target)
+        self._client = None
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failures': 0, 'rate_limit_wait_seconds': 0.0}
+
+    def get_client(self) -> OpenAI:
+        """
+        Returns the shared client, creating it on first use.
+
+        The client keeps its HTTP connections alive between requests and has the SDK's own
+        retries disabled, since call() retries with pacing instead.
+        """
+        with self._lock:
+            if self._client is None:
+                http_client = DefaultHttpxClient(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections),
+                    timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+                )
+                self._client = self.client_factory(http_client=http_client, max_retries=0,
+                                                   timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout))
+            return self._client
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def call(self, request: Callable[[OpenAI], T], estimated_tokens: int = 0) -> T:
+        """
+        Runs `request(client)` under the rate limits, retrying transient failures.
+
+        Args:
+            request (Callable): Performs the API call with the shared client and returns its result.
+            estimated_tokens (int): Prompt plus completion tokens counted against the token budget.
+
+        Returns:
+            The value returned by `request`.
+
+        Raises:
+            OpenAIError: The last error once retries are exhausted, or any non-retryable error.
+        """
+        return self.call_with_retries(request, estimated_tokens)[0]
+
+    def call_with_retries(self, request: Callable[[OpenAI], T], estimated_tokens: int = 0) -> Tuple[T, int]:
+        """Like call(), but also returns how many retries the successful attempt needed."""
+        client = self.get_client()
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire(estimated_tokens)
+            if waited:
+                self._count('rate_limit_wait_seconds', waited)
+            with self.concurrency.slot():
+                self._count('requests')
+                started = time.monotonic()
+                try:
+                    result = request(client)
+                except Exception as e:
+                    retryable = is_retryable_error(e)
+                    self.concurrency.record(time.monotonic() - started, overloaded=retryable)
+                    if not retryable or attempt >= self.max_retries:
+                        self._count('failures')
+                        raise
+                    retry_after = _retry_after_seconds(e)
+                    if isinstance(e, RateLimitError):
+                        self._count('throttled')
+                        # Hold back every thread, not just this one, so retries do not pile up
+                        if retry_after:
+                            self.rate_limiter.pause(retry_after)
+                    delay = self.backoff_delay(attempt, retry_after)
+                    print(f"OpenAI request failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                else:
+                    self.concurrency.record(time.monotonic() - started)
+                    return result, attempt
+            # Sleep outside the concurrency slot so waiting retries do not block other requests
+            self._count('retries')
+            self._sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        """Returns request, retry and throttling counters plus the current concurrency limit."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['concurrency_limit'] = self.concurrency.limit
+        stats['in_flight'] = self.concurrency.in_flight
+        return stats
+
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        with self._lock:
+            if self._client is not None and hasattr(self._client, 'close'):
+                self._client.close()
+            self._client = None
+
+
+# Process-wide manager, configured by create_app()
+_client_manager: Optional[OpenAIClientManager] = None
+
+def configure_openai_client(**options) -> OpenAIClientManager:
+    """Replaces the process-wide client manager; see OpenAIClientManager for the options."""
+    global _client_manager
+    if _client_manager is not None:
+        _client_manager.close()
+    _client_manager = OpenAIClientManager(**options)
+    return _client_manager
+
+def get_openai_client_manager() -> OpenAIClientManager:
+    """Returns the process-wide client manager, creating one with default settings if needed."""
+    global _client_manager
+    if _client_manager is None:
+        _client_manager = OpenAIClientManager()
+    return _client_manager
@@ -0,0 +1,314 @@
+# Cache of computed report payloads (dashboard data and feed API responses).
+# Payloads are stored as encoded JSON bytes, keyed by the report's ID and version stamp (see
+# reports.touch_report) and the request parameters, so a changed report never hits an old entry,
+# in this process or any other. invalidate_report_payloads() frees the old entries right away.
+# Tiers are pluggable PayloadCacheBackends, consulted in order: by default a byte-bounded
+# in-process LRU in front of a SQLite file shared by every worker process.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.models import AnalysisReport
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+ENTRY_OVERHEAD_BYTES = 128 # Rough per-entry cost of the key, dict slot and bookkeeping
+
+
+def make_payload_key(kind: str, report: AnalysisReport, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key of a payload of `report`. updated_at is hashed in too, so a database that was
+    recreated (reusing report IDs and versions) never reads another database's entries.
+    """
+    updated = report.updated_at or report.timestamp
+    digest = hashlib.sha256(json.dumps([updated.isoformat() if updated else None, params or {}],
+                                       sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+    return f"{kind}:{report.id}:{report.version}:{digest[:32]}"
+
+
+class PayloadCacheBackend(ABC):
+    """
+    One tier of the payload cache. Implementations must be thread-safe and may drop entries at
+    any time (a miss only costs a rebuild).
+    """
+    # Name of the tier in the stats
+    name: str = ''
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """The payload stored under `key`, or None."""
+
+    @abstractmethod
+    def set(self, key: str, report_id: int, payload: bytes):
+        """Stores a payload of report `report_id`."""
+
+    @abstractmethod
+    def invalidate_report(self, report_id: int) -> int:
+        """Drops every payload of a report and returns how many were dropped."""
+
+    @abstractmethod
+    def clear(self):
+        """Drops every payload."""
+
+    def stats(self) -> dict:
+        """Size figures of the tier (entries, bytes)."""
+        return {}
+
+
+class MemoryPayloadBackend(PayloadCacheBackend):
+    """In-process LRU bounded by the total size of its payloads."""
+    name = 'memory'
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries = OrderedDict() # key -> (report_id, payload)
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(key: str, payload: bytes) -> int:
+        return len(key) + len(payload) + ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, report_id: int, payload: bytes):
+        size = self._size(key, payload)
+        if size > self.max_bytes:
+            return # Would evict everything else
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(key, old[1])
+            self._entries[key] = (report_id, payload)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, (_, old_payload) = self._entries.popitem(last=False)
+                self._bytes -= self._size(old_key, old_payload)
+                self._evictions += 1
+
+    def invalidate_report(self, report_id: int) -> int:
+        with self._lock:
+            keys = [key for key, (entry_report_id, _) in self._entries.items() if entry_report_id == report_id]
+            for key in keys:
+                self._bytes -= self._size(key, self._entries.pop(key)[1])
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'evictions': self._evictions}
+
+
+class SQLitePayloadBackend(PayloadCacheBackend):
+    """
+    A SQLite file shared by every process pointing at the same `db_path`. Entries expire after
+    `ttl_seconds`; when the payloads outgrow `max_bytes`, the least recently stored go first.
+    """
+    name = 'shared'
+    # Expired and excess entries are purged every this many stores
+    PURGE_INTERVAL = 64
+
+    def __init__(self, db_path: str, max_bytes: int = 8 * DEFAULT_MAX_BYTES, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_seconds = int(ttl_seconds)
+        self._local = threading.local() # One SQLite connection per thread
+        self._stores = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL") # Readers in other processes never wait for a writer
+            conn.execute("PRAGMA synchronous=NORMAL") # Losing the last entries in a crash only costs rebuilds
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS payload_cache ("
+            " cache_key TEXT PRIMARY KEY,"
+            " report_id INTEGER NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_payload_cache_report_id ON payload_cache (report_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_payload_cache_stored_at ON payload_cache (stored_at)")
+        conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT payload FROM payload_cache WHERE cache_key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key: str, report_id: int, payload: bytes):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO payload_cache (cache_key, report_id, payload, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, report_id, payload, now, now + self.ttl_seconds)
+        )
+        conn.commit()
+        with self._lock:
+            self._stores += 1
+            purge = self._stores % self.PURGE_INTERVAL == 0
+        if purge:
+            self.purge()
+
+    def purge(self) -> int:
+        """Deletes expired entries, then the oldest ones while the payloads exceed max_bytes."""
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM payload_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        excess = conn.execute("SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM payload_cache").fetchone()[0] - self.max_bytes
+        if excess > 0:
+            # The oldest entries, up to the first one whose running size total covers the excess
+            removed += conn.execute(
+                "DELETE FROM payload_cache WHERE cache_key IN ("
+                " SELECT cache_key FROM (SELECT cache_key, LENGTH(payload) AS size,"
+                " SUM(LENGTH(payload)) OVER (ORDER BY stored_at, cache_key) AS running FROM payload_cache)"
+                " WHERE running - size < ?)",
+                (excess,)
+            ).rowcount
+        conn.commit()
+        return removed
+
+    def invalidate_report(self, report_id: int) -> int:
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM payload_cache WHERE report_id = ?", (report_id,)).rowcount
+        conn.commit()
+        return removed
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM payload_cache")
+        conn.commit()
+
+    def stats(self) -> dict:
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM payload_cache").fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes, 'ttl_seconds': self.ttl_seconds}
+
+
+class PayloadCache:
+    """
+    Looks payloads up in each tier in turn. A hit in a later tier is copied into the earlier
+    ones; a built payload is stored in every tier. All methods are thread-safe.
+    """
+
+    def __init__(self, tiers: Sequence[PayloadCacheBackend]):
+        self.tiers: List[PayloadCacheBackend] = list(tiers)
+        self._lock = threading.Lock()
+        self._counters = {'misses': 0, 'stores': 0, 'invalidations': 0,
+                          **{f'{tier.name}_hits': 0 for tier in self.tiers}}
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def get(self, key: str, report_id: int) -> Optional[bytes]:
+        for i, tier in enumerate(self.tiers):
+            payload = tier.get(key)
+            if payload is not None:
+                for earlier in self.tiers[:i]:
+                    earlier.set(key, report_id, payload)
+                self._count(f'{tier.name}_hits')
+                return payload
+        self._count('misses')
+        return None
+
+    def set(self, key: str, report_id: int, payload: bytes):
+        for tier in self.tiers:
+            tier.set(key, report_id, payload)
+        self._count('stores')
+
+    def get_or_build(self, key: str, report_id: int, build: Callable[[], bytes]) -> bytes:
+        """The cached payload under `key`, or the one `build` returns, which is then stored."""
+        payload = self.get(key, report_id)
+        if payload is None:
+            payload = build()
+            self.set(key, report_id, payload)
+        return payload
+
+    def invalidate_report(self, report_id: int) -> int:
+        removed = sum(tier.invalidate_report(report_id) for tier in self.tiers)
+        self._count('invalidations')
+        return removed
+
+    def clear(self):
+        """Removes every payload from every tier. Counters are kept."""
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> dict:
+        """Returns hit and miss counters, the hit ratio and the size of every tier."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['hits'] = sum(stats[f'{tier.name}_hits'] for tier in self.tiers)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['tiers'] = {tier.name: tier.stats() for tier in self.tiers}
+        return stats
+
+
+# Process-wide cache instance, configured by create_app()
+_payload_cache: Optional[PayloadCache] = None
+
+def configure_payload_cache(enabled: bool = True, max_bytes: int = DEFAULT_MAX_BYTES, db_path: Optional[str] = None,
+                            shared_max_bytes: int = 8 * DEFAULT_MAX_BYTES, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                            tiers: Optional[Sequence[PayloadCacheBackend]] = None) -> Optional[PayloadCache]:
+    """
+    Creates (or disables) the process-wide payload cache: an in-process LRU of `max_bytes`
+    (0 leaves it out) in front of a SQLite tier at `db_path` (None leaves it out), unless
+    other `tiers` are given.
+    """
+    global _payload_cache
+    if tiers is None:
+        tiers = []
+        if max_bytes:
+            tiers.append(MemoryPayloadBackend(max_bytes))
+        if db_path:
+            tiers.append(SQLitePayloadBackend(db_path, max_bytes=shared_max_bytes, ttl_seconds=ttl_seconds))
+    _payload_cache = PayloadCache(tiers) if enabled and tiers else None
+    return _payload_cache
+
+def get_payload_cache() -> Optional[PayloadCache]:
+    """Returns the process-wide payload cache, or None if caching is disabled."""
+    return _payload_cache
+
+def cached_payload(kind: str, report: AnalysisReport, params: Optional[Dict[str, Any]],
+                   build: Callable[[], bytes]) -> bytes:
+    """The `kind` payload of `report` for `params`, from the cache or built by `build`."""
+    cache = _payload_cache
+    if cache is None:
+        return build()
+    return cache.get_or_build(make_payload_key(kind, report, params), report.id, build)
+
+def invalidate_report_payloads(report_id: int) -> None:
+    """Drops the cached payloads of a report, after it changed."""
+    if _payload_cache is not None:
+        _payload_cache.invalidate_report(report_id)
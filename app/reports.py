@@ -0,0 +1,425 @@
+# Builds and persists AnalysisReport objects from analyzed news items.
+# Shared by the synchronous /analyze route and the background analysis workers.
+
+from typing import List, Optional, Dict, Any, Iterable, Sequence
+import json
+from datetime import datetime, timezone
+from collections import Counter
+
+from app import db
+from app.models import AnalysisReport, NewsItem, NewsItemKeyword, NewsItemIntent
+from app.openai_api import SingleNewsItemAnalysis, AnalysisUsage
+from app.news_tags import keyword_tag_rows, intent_tag_rows
+from app.feed import invalidate_feed_totals
+from app.payload_cache import invalidate_report_payloads
+from app.rollups import add_report_items
+
+# Helper function to parse string dates from OpenAI into datetime objects
+def parse_publication_date(date_str: Optional[str]) -> Optional[datetime]:
+    if not date_str: 
+        return None
+    try:
+        # Attempt to parse YYYY-MM-DD format
+        return datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        pass
+    try:
+        # Full ISO 8601 timestamps, as found in uploaded feeds (e.g. 2024-05-01T08:30:00Z)
+        parsed = datetime.fromisoformat(date_str.strip())
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    except ValueError:
+        # Add more formats or more robust parsing if needed
+        print(f"Warning: Could not parse date string: {date_str}")
+        return None
+
+# Helper function to label an average sentiment score
+def sentiment_label_for(score: float) -> str:
+    if score > 0.2:
+        return "Positive"
+    if score < -0.2:
+        return "Negative"
+    return "Neutral"
+
+# Helper function to read a JSON list stored in a NewsItem text column
+def _json_list(json_str: Optional[str], item_id: Any, field: str) -> List[Any]:
+    if not json_str:
+        return []
+    try:
+        data = json.loads(json_str)
+    except json.JSONDecodeError:
+        print(f"Warning: Could not parse {field} for NewsItem ID {item_id}: {json_str}")
+        return []
+    return data if isinstance(data, list) else []
+
+
+class ReportAggregator:
+    """
+    Single-pass accumulator for the dashboard aggregates of a report.
+
+    Each item updates running counts and score sums (intents, keywords, per-day scores
+    and per-day keyword scores), so building the aggregates is linear in the number of
+    items and keyword occurrences. result() turns the sums into the JSON columns stored
+    on AnalysisReport. The sums themselves are stored too (see to_state()), so items
+    appended to a report later are merged into them without reprocessing older items.
+    """
+
+    def __init__(self):
+        self.intent_counts: Counter = Counter()
+        self.keyword_counts: Counter = Counter()
+        self.keyword_score_sums: Dict[str, float] = {}
+        self.score_sum = 0.0
+        self.score_count = 0
+        # date -> [score sum, item count], and date -> keyword -> [score sum, item count]
+        self.daily_scores: Dict[str, List[float]] = {}
+        self.daily_keyword_scores: Dict[str, Dict[str, List[float]]] = {}
+
+    @classmethod
+    def from_state(cls, state_json: Optional[str]) -> Optional['ReportAggregator']:
+        """Restores an aggregator saved by to_state(). Returns None if there is no usable state."""
+        if not state_json:
+            return None
+        try:
+            state = json.loads(state_json)
+            aggregator = cls()
+            aggregator.intent_counts = Counter(state['intent_counts'])
+            aggregator.keyword_counts = Counter(state['keyword_counts'])
+            aggregator.keyword_score_sums = dict(state['keyword_score_sums'])
+            aggregator.score_sum = float(state['score_sum'])
+            aggregator.score_count = int(state['score_count'])
+            aggregator.daily_scores = dict(state['daily_scores'])
+            aggregator.daily_keyword_scores = dict(state['daily_keyword_scores'])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            print(f"Warning: Could not parse aggregate state: {state_json[:200]}")
+            return None
+        return aggregator
+
+    def to_state(self) -> str:
+        """Serializes the running counts and sums for AnalysisReport.aggregate_state_json."""
+        return json.dumps({
+            'intent_counts': self.intent_counts,
+            'keyword_counts': self.keyword_counts,
+            'keyword_score_sums': self.keyword_score_sums,
+            'score_sum': self.score_sum,
+            'score_count': self.score_count,
+            'daily_scores': self.daily_scores,
+            'daily_keyword_scores': self.daily_keyword_scores
+        })
+
+    def add(self, intents: Sequence[str], keywords: Sequence[str], sentiment_score: Optional[float],
+            publication_date: Optional[datetime] = None) -> None:
+        """Adds one analyzed news item."""
+        self.intent_counts.update(intents)
+        self.keyword_counts.update(keywords)
+        keyword_score = sentiment_score or 0.0 # Keywords take the item's overall score
+        for kw in keywords:
+            self.keyword_score_sums[kw] = self.keyword_score_sums.get(kw, 0.0) + keyword_score
+
+        if sentiment_score is None:
+            return
+        self.score_sum += sentiment_score
+        self.score_count += 1
+
+        if isinstance(publication_date, str): # Should ideally be datetime object from DB
+            publication_date = parse_publication_date(publication_date)
+        if publication_date:
+            date_str = publication_date.strftime('%Y-%m-%d')
+            day = self.daily_scores.setdefault(date_str, [0.0, 0])
+            day[0] += sentiment_score
+            day[1] += 1
+            day_keywords = self.daily_keyword_scores.setdefault(date_str, {})
+            for kw in keywords:
+                kw_day = day_keywords.setdefault(kw, [0.0, 0])
+                kw_day[0] += sentiment_score
+                kw_day[1] += 1
+
+    def add_item(self, item: Any) -> None:
+        """Adds a NewsItem, or any row with its intents, keywords, sentiment_score and publication_date columns."""
+        self.add(_json_list(item.intents, item.id, 'intents_json'),
+                 _json_list(item.keywords, item.id, 'keywords_json'),
+                 item.sentiment_score, item.publication_date)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns a dictionary with keys for aggregated_intents_json, aggregated_keywords_json,
+        sentiment_trend_json, overall_sentiment_label, overall_sentiment_score and
+        aggregate_state_json.
+        """
+        # 1. Aggregated Intents (Top 5, as a share of the top 5)
+        top_5_intents = dict(self.intent_counts.most_common(5))
+        total_intents_counted = sum(top_5_intents.values())
+        intents_share_data = {intent: (count / total_intents_counted * 100) if total_intents_counted > 0 else 0
+                              for intent, count in top_5_intents.items()}
+
+        # 2. Aggregated Keywords (Top 20 with average sentiment); frequency reflects topic prevalence
+        aggregated_keywords_data = []
+        for kw, count in self.keyword_counts.most_common(20):
+            avg_sentiment = self.keyword_score_sums[kw] / count
+            # Determine color based on average sentiment
+            color = "grey" # Neutral
+            if avg_sentiment > 0.2:
+                color = "green" # Positive
+            elif avg_sentiment < -0.2:
+                color = "red" # Negative
+            aggregated_keywords_data.append({
+                "text": kw,
+                "value": count,
+                "avg_sentiment": round(avg_sentiment, 2),
+                "color": color
+            })
+
+        # 3. Sentiment Trend Over Time, overall and for the top 3 keywords
+        sorted_dates = sorted(self.daily_scores)
+        overall_trend_scores = [round(self.daily_scores[d][0] / self.daily_scores[d][1], 2) for d in sorted_dates]
+        keyword_trends_data = {}
+        for kw, _ in self.keyword_counts.most_common(3):
+            keyword_trend_line = []
+            for date_str in sorted_dates:
+                kw_day = self.daily_keyword_scores[date_str].get(kw)
+                # None leaves a gap in the chart on days the keyword did not appear
+                keyword_trend_line.append(round(kw_day[0] / kw_day[1], 2) if kw_day else None)
+            keyword_trends_data[kw] = keyword_trend_line
+
+        sentiment_trend_data = {
+            'dates': sorted_dates,
+            'overall_scores': overall_trend_scores,
+            'keyword_trends': keyword_trends_data
+        }
+
+        # 4. Overall Sentiment Score and Label for the report
+        overall_avg_score = self.score_sum / self.score_count if self.score_count else 0.0
+
+        return {
+            'aggregated_intents_json': json.dumps(intents_share_data),
+            'aggregated_keywords_json': json.dumps(aggregated_keywords_data), # Includes avg_sentiment and color
+            'sentiment_trend_json': json.dumps(sentiment_trend_data),
+            'overall_sentiment_label': sentiment_label_for(overall_avg_score),
+            'overall_sentiment_score': round(overall_avg_score, 2),
+            'aggregate_state_json': self.to_state()
+        }
+
+
+# Helper function to prepare aggregated data for an AnalysisReport
+def prepare_report_aggregates(news_items: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Processes NewsItem objects (or rows with the same columns) in a single pass to generate
+    aggregated data for dashboard components. See ReportAggregator.result() for the keys.
+    """
+    aggregator = ReportAggregator()
+    for item in news_items:
+        aggregator.add_item(item)
+    return aggregator.result()
+
+# Helper function to turn an item's usage telemetry into NewsItem column values
+def usage_columns(usage: Optional[AnalysisUsage]) -> Dict[str, Any]:
+    if usage is None:
+        return {'usage_model': None, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0,
+                'latency_ms': 0, 'retries': 0, 'cost_usd': 0.0}
+    return {
+        'usage_model': usage.model,
+        'prompt_tokens': usage.prompt_tokens,
+        'completion_tokens': usage.completion_tokens,
+        'cached_tokens': usage.cached_tokens,
+        'latency_ms': usage.latency_ms,
+        'retries': usage.retries,
+        'cost_usd': usage.cost_usd
+    }
+
+# Helper function to roll item usage up to the AnalysisReport totals
+def usage_totals(item_usages: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'total_prompt_tokens': sum(u['prompt_tokens'] for u in item_usages),
+        'total_completion_tokens': sum(u['completion_tokens'] for u in item_usages),
+        'total_cached_tokens': sum(u['cached_tokens'] for u in item_usages),
+        'total_retries': sum(u['retries'] for u in item_usages),
+        'total_cost_usd': sum(u['cost_usd'] for u in item_usages),
+        'total_latency_ms': sum(u['latency_ms'] for u in item_usages),
+        'max_item_latency_ms': max((u['latency_ms'] for u in item_usages), default=0)
+    }
+
+# Helper function to add the usage totals of newly stored items to a report's running totals
+def merge_usage_totals(totals: Dict[str, Any], added: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {name: totals[name] + added[name] for name in totals if name != 'max_item_latency_ms'}
+    merged['max_item_latency_ms'] = max(totals['max_item_latency_ms'], added['max_item_latency_ms'])
+    return merged
+
+# Helper function to build the NewsItem column values for one analyzed text
+def news_item_values(item_text: str, analysis: SingleNewsItemAnalysis,
+                     publication_date: Optional[datetime] = None, source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Builds the column values of a NewsItem from an analysis result, for insert_news_items().
+
+    Args:
+        item_text (str): The analyzed text.
+        analysis (SingleNewsItemAnalysis): Its analysis result.
+        publication_date (datetime, optional): Known publication date; takes precedence over
+                                               the date extracted by the analyzer.
+        source (str, optional): Publisher or feed the item came from.
+    """
+    return {
+        'original_text': item_text,
+        'sentiment_label': analysis.sentiment_label,
+        'sentiment_score': analysis.sentiment_score,
+        'intents': json.dumps(analysis.intents),
+        'keywords': json.dumps(analysis.keywords),
+        'summary': analysis.summary,
+        'source': source,
+        'publication_date': publication_date or parse_publication_date(analysis.publication_date),
+        **usage_columns(analysis.usage)
+    }
+
+# Marks a report as changed, so that clients holding its dashboard or feed pages revalidate them
+def touch_report(report_id: int) -> None:
+    """Bumps the report's version stamp and updated_at (see app/http_cache.py). The caller commits."""
+    db.session.execute(
+        db.update(AnalysisReport).where(AnalysisReport.id == report_id)
+        .values(version=AnalysisReport.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+
+# Bulk-inserts news items, their keyword/intent tags and sentiment rollups, without committing
+def insert_news_items(report_id: int, item_values: Sequence[Dict[str, Any]],
+                      analyses: Sequence[SingleNewsItemAnalysis], add_to_rollups: bool = True) -> List[int]:
+    """
+    Inserts the items with executemany-style INSERTs (batched by SQLAlchemy's insertmanyvalues)
+    instead of flushing one ORM object at a time. The caller commits.
+
+    Args:
+        report_id (int): ID of the AnalysisReport the items belong to.
+        item_values (Sequence[dict]): Column values from news_item_values().
+        analyses (Sequence[SingleNewsItemAnalysis]): The analyses the values were built from, for the tags.
+        add_to_rollups (bool): Add the items to the user's daily sentiment rollups. A report that is
+                               still hidden (see AnalysisReport.complete) adds them when it completes.
+
+    Returns:
+        List[int]: The new NewsItem IDs, in input order.
+    """
+    if not item_values:
+        return []
+    # New rowids are handed out in VALUES order, so the sorted IDs line up with item_values.
+    # (RETURNING rows themselves are unordered, and sort_by_parameter_order would make
+    # SQLite fall back to one INSERT per row.) The table is inserted into directly: an ORM bulk
+    # INSERT starts a new batch wherever the pattern of None values (e.g. undated items) changes.
+    rows = [dict(values, analysis_report_id=report_id) for values in item_values]
+    for row in rows:
+        row['feed_json'] = NewsItem.json_fragment(row) # Encoded once here, concatenated by every feed response
+    item_ids = sorted(db.session.scalars(db.insert(NewsItem.__table__).returning(NewsItem.id), rows).all())
+
+    keyword_rows, intent_rows = [], []
+    for item_id, analysis in zip(item_ids, analyses):
+        keyword_rows.extend(keyword_tag_rows(item_id, report_id, analysis.keywords))
+        intent_rows.extend(intent_tag_rows(item_id, report_id, analysis.intents))
+    if keyword_rows:
+        db.session.execute(db.insert(NewsItemKeyword), keyword_rows)
+    if intent_rows:
+        db.session.execute(db.insert(NewsItemIntent), intent_rows)
+
+    # The user's daily sentiment rollups and the report's version change in the same transaction as the items
+    if add_to_rollups:
+        add_report_items(report_id, item_values)
+    touch_report(report_id)
+    return item_ids
+
+# Helper function to accumulate the aggregates of the news items stored for a report
+def stored_items_aggregator(report_id: int) -> ReportAggregator:
+    """Streams only the columns the aggregates need, so the item texts are never loaded."""
+    item_rows = db.session.execute(
+        db.select(NewsItem.id, NewsItem.intents, NewsItem.keywords,
+                  NewsItem.sentiment_score, NewsItem.publication_date)
+        .where(NewsItem.analysis_report_id == report_id)
+        .execution_options(yield_per=1000)
+    )
+    aggregator = ReportAggregator()
+    for row in item_rows:
+        aggregator.add_item(row)
+    return aggregator
+
+# Creates an AnalysisReport with one NewsItem per analyzed text and stores its aggregates
+def create_analysis_report(user_id: int, report_name: str, item_texts: Sequence[str],
+                           analyses: Sequence[SingleNewsItemAnalysis], commit: bool = True) -> AnalysisReport:
+    """
+    Persists a new AnalysisReport for `user_id` together with its NewsItems and aggregates.
+
+    Args:
+        user_id (int): ID of the report's author.
+        report_name (str): Display name of the report.
+        item_texts (Sequence[str]): The analyzed texts, one per news item.
+        analyses (Sequence[SingleNewsItemAnalysis]): Analysis results in the same order as item_texts.
+        commit (bool): Commit the report. With False the rows are only flushed, so the caller can
+                       write further changes (e.g. a job's completion) in the same transaction and commits.
+
+    Returns:
+        AnalysisReport: The committed (or flushed) report.
+    """
+    # Step 1: Build the item rows and compute the aggregates before writing anything
+    item_values = [news_item_values(item_text, analysis) for item_text, analysis in zip(item_texts, analyses)]
+    aggregator = ReportAggregator()
+    for values, analysis in zip(item_values, analyses):
+        aggregator.add(analysis.intents or [], analysis.keywords or [], analysis.sentiment_score,
+                       values['publication_date'])
+
+    # Step 2: Set the summary (from the last processed item)
+    summary = analyses[-1].summary or report_name
+
+    # Step 3: Roll up the API usage of every item
+    item_usages = [usage_columns(a.usage) for a in analyses]
+
+    # Step 4: Insert the report, then bulk-insert its items, in a single transaction
+    new_report = AnalysisReport(
+        name=report_name,
+        user_id=user_id,
+        timestamp=datetime.now(timezone.utc),
+        summary=summary,
+        **aggregator.result(),
+        **usage_totals(item_usages)
+    )
+    db.session.add(new_report)
+    db.session.flush() # Assigns the report ID without committing
+    insert_news_items(new_report.id, item_values, analyses)
+
+    # Step 5: One commit, so a half-built report is never visible
+    if commit:
+        db.session.commit()
+    return new_report
+
+# Adds newly analyzed texts to an existing AnalysisReport and updates its aggregates
+def append_to_analysis_report(report: AnalysisReport, item_texts: Sequence[str],
+                              analyses: Sequence[SingleNewsItemAnalysis]) -> AnalysisReport:
+    """
+    Appends one NewsItem per analyzed text to `report` and updates its aggregates incrementally.
+
+    The new items are merged into the report's stored aggregate state, so the work is
+    proportional to the number of new items. Reports created before the state was stored
+    are rebuilt from their items once.
+
+    Args:
+        report (AnalysisReport): The report to extend.
+        item_texts (Sequence[str]): The analyzed texts, one per news item.
+        analyses (Sequence[SingleNewsItemAnalysis]): Analysis results in the same order as item_texts.
+
+    Returns:
+        AnalysisReport: The updated report.
+    """
+    report_id = report.id
+
+    # Step 1: Restore the mergeable aggregate state (or rebuild it for older reports)
+    aggregator = ReportAggregator.from_state(report.aggregate_state_json) or stored_items_aggregator(report_id)
+
+    # Step 2: Insert the NewsItems and merge them into the state
+    item_values = [news_item_values(item_text, analysis) for item_text, analysis in zip(item_texts, analyses)]
+    insert_news_items(report_id, item_values, analyses)
+    for values, analysis in zip(item_values, analyses):
+        aggregator.add(analysis.intents or [], analysis.keywords or [], analysis.sentiment_score,
+                       values['publication_date'])
+
+    # Step 3: Add the new items' API usage to the report totals
+    report_totals = {name: getattr(report, name) for name in usage_totals([])}
+    values = dict(aggregator.result(), **merge_usage_totals(report_totals, usage_totals(item_values)))
+
+    # Step 4: Save the items and the updated report in one transaction (direct UPDATE, as in create_analysis_report)
+    db.session.execute(
+        db.update(AnalysisReport).where(AnalysisReport.id == report_id).values(**values)
+    )
+    db.session.commit()
+    invalidate_feed_totals(report_id)
+    invalidate_report_payloads(report_id)
+    db.session.refresh(report)
+    return report
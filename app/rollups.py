@@ -0,0 +1,113 @@
+# Per-user daily sentiment rollups (the user_daily_sentiment table).
+# Item writes add their label counts and score sums to the row of the report's user, day and
+# label in the same transaction, so the rollups always agree with the committed items. A bulk
+# ingest adds its items when the report completes (see AnalysisReport.complete).
+# rebuild_sentiment_rollups() recomputes them from the items.
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import click
+import sqlalchemy as sa
+from flask.cli import with_appcontext
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import AnalysisReport, NewsItem, UserDailySentiment
+
+SENTIMENT_LABELS = ('Positive', 'Neutral', 'Negative')
+
+
+def rollup_day(timestamp: datetime) -> date:
+    """The rollup day of a report: the (UTC) date of its timestamp."""
+    return timestamp.date()
+
+def _label(value: Any) -> str:
+    return getattr(value, 'value', value) # SentimentEnum members or plain strings
+
+def _upsert_statement():
+    # INSERT ... ON CONFLICT DO UPDATE, adding the new counts and sums to an existing row
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    stmt = insert(UserDailySentiment)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDailySentiment.user_id, UserDailySentiment.day, UserDailySentiment.sentiment_label],
+        set_={'item_count': UserDailySentiment.item_count + stmt.excluded.item_count,
+              'score_sum': UserDailySentiment.score_sum + stmt.excluded.score_sum}
+    )
+
+def _apply(user_id: int, day: date, deltas: Iterable[Tuple[str, int, float]]) -> None:
+    rows = [{'user_id': user_id, 'day': day, 'sentiment_label': label, 'item_count': count, 'score_sum': score_sum}
+            for label, count, score_sum in deltas if count]
+    if rows:
+        db.session.execute(_upsert_statement(), rows)
+
+def _report_owner_and_day(report_id: int) -> Tuple[int, date]:
+    user_id, timestamp = db.session.execute(
+        sa.select(AnalysisReport.user_id, AnalysisReport.timestamp).where(AnalysisReport.id == report_id)
+    ).one()
+    return user_id, rollup_day(timestamp)
+
+def sentiment_totals(item_values: Iterable[Dict[str, Any]],
+                     totals: Optional[Dict[str, List[float]]] = None) -> Dict[str, List[float]]:
+    """
+    Adds the label counts and score sums of items (column values as for insert_news_items) to
+    `totals` ({label: [count, score_sum]}, a new dict if None) and returns it.
+    """
+    totals = totals if totals is not None else {}
+    for values in item_values:
+        label_totals = totals.setdefault(_label(values['sentiment_label']), [0, 0.0])
+        label_totals[0] += 1
+        label_totals[1] += values['sentiment_score'] or 0.0
+    return totals
+
+def add_report_totals(report_id: int, totals: Dict[str, List[float]]) -> None:
+    """Adds totals from sentiment_totals() for items of a report to the rollups."""
+    if totals:
+        _apply(*_report_owner_and_day(report_id), ((label, n, s) for label, (n, s) in totals.items()))
+
+def add_report_items(report_id: int, item_values: Iterable[Dict[str, Any]]) -> None:
+    """Adds items being inserted into a report (column values as for insert_news_items) to the rollups."""
+    add_report_totals(report_id, sentiment_totals(item_values))
+
+def user_sentiment_counts(user_id: int) -> Dict[str, int]:
+    """Number of items per sentiment label across all of a user's reports (every label present)."""
+    # One row per day and label, read in primary key order; summing them here avoids a GROUP BY sort
+    counts = dict.fromkeys(SENTIMENT_LABELS, 0)
+    for label, item_count in db.session.execute(
+            sa.select(UserDailySentiment.sentiment_label, UserDailySentiment.item_count)
+            .where(UserDailySentiment.user_id == user_id)):
+        counts[label] = counts.get(label, 0) + item_count
+    return counts
+
+def rebuild_sentiment_rollups(user_id: Optional[int] = None) -> int:
+    """
+    Recomputes the rollups of one user (or of everyone) from the stored items, in one
+    INSERT ... SELECT. The caller commits.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    delete = sa.delete(UserDailySentiment)
+    totals = (
+        sa.select(AnalysisReport.user_id, sa.func.date(AnalysisReport.timestamp), NewsItem.sentiment_label,
+                  sa.func.count(), sa.func.coalesce(sa.func.sum(NewsItem.sentiment_score), 0.0))
+        .join(NewsItem, NewsItem.analysis_report_id == AnalysisReport.id)
+        .where(AnalysisReport.complete) # Reports still being ingested are added when they complete
+        .group_by(AnalysisReport.user_id, sa.func.date(AnalysisReport.timestamp), NewsItem.sentiment_label)
+    )
+    if user_id is not None:
+        delete = delete.where(UserDailySentiment.user_id == user_id)
+        totals = totals.where(AnalysisReport.user_id == user_id)
+    db.session.execute(delete)
+    result = db.session.execute(sa.insert(UserDailySentiment).from_select(
+        ['user_id', 'day', 'sentiment_label', 'item_count', 'score_sum'], totals))
+    return result.rowcount
+
+@click.command('rebuild-sentiment-rollups')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user\'s rollups.')
+@with_appcontext
+def rebuild_sentiment_rollups_command(user_id):
+    """Backfill or repair the daily sentiment rollups from the stored news items."""
+    rows = rebuild_sentiment_rollups(user_id)
+    db.session.commit()
+    click.echo(f"Wrote {rows} daily sentiment rollup rows.")
@@ -0,0 +1,93 @@
+# Full-text search over news items.
+# Queries the news_item_fts FTS5 index (defined next to NewsItem in app/models.py), ranks
+# matches with BM25 and returns highlighted snippets, limited to the reports a user owns
+# or has been shared.
+
+import html
+import re
+from typing import Any, Dict, List, Optional
+
+import sqlalchemy as sa
+
+from app import db
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SNIPPET_TOKENS = 24
+
+# Private-use markers around matches; the snippets are HTML-escaped before they become <mark> tags
+_MATCH_START = '\ue000'
+_MATCH_END = '\ue001'
+_TERM_RE = re.compile(r'\w+\*?')
+
+# BM25 weights: a match in the summary (headline) counts twice as much as one in the text
+_SEARCH_SQL = sa.text(f"""
+    SELECT news_item.id, news_item.analysis_report_id, analysis_report.name,
+           news_item.sentiment_label, news_item.sentiment_score, news_item.publication_date,
+           snippet(news_item_fts, 0, '{_MATCH_START}', '{_MATCH_END}', '...', {SNIPPET_TOKENS}),
+           snippet(news_item_fts, 1, '{_MATCH_START}', '{_MATCH_END}', '...', {SNIPPET_TOKENS}),
+           bm25(news_item_fts, 1.0, 2.0) AS rank
+    FROM news_item_fts
+    JOIN news_item ON news_item.id = news_item_fts.rowid
+    JOIN analysis_report ON analysis_report.id = news_item.analysis_report_id
+    WHERE news_item_fts MATCH :match
+      AND analysis_report.complete
+      AND (analysis_report.user_id = :user_id
+           OR analysis_report.id IN (SELECT analysis_report_id FROM analysis_report_shares
+                                     WHERE recipient_id = :user_id))
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""").columns(publication_date=sa.DateTime(timezone=True))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query matching items that contain every word.
+    Each word is quoted, so FTS5 operators and punctuation in the input cannot cause syntax
+    errors; a trailing * keeps prefix matching (e.g. infla*). Returns None if there are no words.
+    """
+    terms = []
+    for term in _TERM_RE.findall(query or ''):
+        word = term.rstrip('*')
+        terms.append(f'"{word}"*' if term.endswith('*') else f'"{word}"')
+    return ' '.join(terms) or None
+
+def _highlight(snippet: Optional[str]) -> str:
+    # Escape the stored text, then turn the match markers into <mark> tags
+    return html.escape(snippet or '').replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+def search_news_items(user_id: int, query: str, limit: int = DEFAULT_SEARCH_LIMIT,
+                      offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Searches the text and summary of every news item in the reports `user_id` can view.
+
+    Args:
+        user_id (int): The searching user; results cover their own and shared reports.
+        query (str): Free-text query; all words must match.
+        limit (int): Maximum number of results (capped at MAX_SEARCH_LIMIT).
+        offset (int): Number of results to skip, for paging.
+
+    Returns:
+        List[Dict[str, Any]]: Matches, best first, with HTML-safe highlighted snippets.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    rows = db.session.execute(_SEARCH_SQL, {
+        'match': match,
+        'user_id': user_id,
+        'limit': min(max(limit, 1), MAX_SEARCH_LIMIT),
+        'offset': max(offset, 0)
+    }).all()
+    return [{
+        'id': item_id,
+        'analysis_report_id': report_id,
+        'report_name': report_name,
+        'sentiment_label': sentiment_label,
+        'sentiment_score': sentiment_score,
+        'publication_date': publication_date.isoformat() if publication_date else None,
+        'text_snippet': _highlight(text_snippet),
+        'summary_snippet': _highlight(summary_snippet),
+        'rank': round(rank, 4)
+    } for item_id, report_id, report_name, sentiment_label, sentiment_score, publication_date,
+          text_snippet, summary_snippet, rank in rows]
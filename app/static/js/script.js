@@ -32,6 +32,9 @@
             HIGHLIGHT_DURATION: 1500, // Added for highlight animation duration
             BUTTON_TRANSITION_DURATION: '0.3s' // Added for button transition duration
         },
+        JOBS: {
+            POLL_INTERVAL: 2000 // How often a queued analysis job's status is polled (ms)
+        },
         TILT: {
             MAX_WIDTH: 600,
             SETTINGS: {
@@ -546,88 +549,208 @@
     }
 
     /**
-     * Sets up AJAX submission for the main analysis form.
+     * Escapes text for safe insertion into HTML strings
+     * @param {*} value - Value to escape
+     * @returns {string} - Escaped text
+     */
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        return div.innerHTML;
+    }
+
+    /**
+     * Reads a Server-Sent Events response body and calls onEvent for every complete event
+     * @param {Response} response - A fetch response with a text/event-stream body
+     * @param {Function} onEvent - Called with (eventName, parsedData)
+     */
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line; keep any incomplete tail in the buffer
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = 'message';
+                let dataLines = [];
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+                });
+                if (dataLines.length) onEvent(eventName, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+
+    /**
+     * Sets up streaming submission for the main analysis form.
+     * Results are rendered item by item as the server finishes analyzing them.
      */
     function setupAjaxFormSubmissions() {
         const form = DOM.get(CONFIG.SELECTORS.analysisForm);
         const loadingIndicator = DOM.get(CONFIG.SELECTORS.loadingIndicator);
         const resultDisplay = DOM.get(CONFIG.SELECTORS.resultDisplay);
 
-        if (form) {
+        if (form && resultDisplay) {
             form.addEventListener('submit', async function(event) {
                 event.preventDefault();
+                const submitBtn = form.querySelector('[type="submit"]');
+                if (submitBtn) submitBtn.disabled = true;
                 DOM.show(loadingIndicator);
                 resultDisplay.innerHTML = '';
 
+                // Accumulated stream state, re-rendered after every event
+                const results = { itemsTotal: 0, items: [], done: null };
+
                 try {
                     const formData = new FormData(form);
-
-                    // ← REMOVE these lines if your input isn't named "text"
-                    // const textInput = formData.get('text');
-                    // if (!textInput || textInput.trim().length < 10) {
-                    //   throw new Error('Please enter at least 10 characters for analysis.');
-                    // }
-
-                    const response = await fetch(form.action, {
+                    const response = await fetch(form.dataset.streamUrl || form.action, {
                         method: 'POST',
                         body: formData,
-                        headers: { 'X-Requested-With': 'XMLHttpRequest' }
+                        headers: { 'X-Requested-With': 'XMLHttpRequest', 'Accept': 'text/event-stream' }
                     });
-                    DOM.hide(loadingIndicator);
 
-                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
-                    const data = await response.json();
+                    if (!response.ok) {
+                        // Validation errors come back as JSON before any event is streamed
+                        const errorData = await response.json().catch(() => ({}));
+                        const fieldErrors = Object.values(errorData.errors || {}).flat();
+                        const message = errorData.error || fieldErrors.join(' ') || `HTTP ${response.status}`;
+                        resultDisplay.innerHTML = `<div class="alert alert-warning mt-3">${escapeHtml(message)}</div>`;
+                        return;
+                    }
 
-                    displayAnalysisResult(data, resultDisplay);
+                    // Large submissions are queued for a background worker: poll the job instead
+                    if (response.status === 202) {
+                        DOM.hide(loadingIndicator);
+                        await pollAnalysisJob((await response.json()).status_url, resultDisplay);
+                        return;
+                    }
+
+                    await readEventStream(response, (eventName, data) => {
+                        if (eventName === 'start') {
+                            results.itemsTotal = data.items_total;
+                        } else if (eventName === 'item') {
+                            results.items.push(data);
+                            DOM.hide(loadingIndicator); // The first result replaces the spinner
+                        } else if (eventName === 'done') {
+                            results.done = data;
+                        } else if (eventName === 'error') {
+                            throw new Error(data.error);
+                        }
+                        displayAnalysisResult(results, resultDisplay);
+                    });
+
+                    if (!results.done) throw new Error('The analysis stream ended unexpectedly.');
                 } catch (error) {
                     ErrorHandler.handle(error, 'Analysis failed. Please try again.');
-                    resultDisplay.innerHTML =
-                      `<div class="alert alert-danger">Analysis failed. Please try again.</div>`;
+                    resultDisplay.insertAdjacentHTML('beforeend',
+                      `<div class="alert alert-danger mt-3">Analysis failed. Please try again.</div>`);
                 } finally {
                     DOM.hide(loadingIndicator);
+                    if (submitBtn) submitBtn.disabled = false;
                 }
             });
         }
     }
-    
+
     /**
-     * Displays analysis result with proper formatting and animations
-     * @param {Object} data - The result data from the server
+     * Polls a queued analysis job until it completes or fails, showing its progress
+     * @param {string} statusUrl - The job's status endpoint, from the 202 response
+     * @param {HTMLElement} container - The container to display the progress in
+     */
+    async function pollAnalysisJob(statusUrl, container) {
+        while (true) {
+            const response = await fetch(statusUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } });
+            if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+            const job = await response.json();
+
+            let resultHtml = `<h2>Analysis Queued</h2>`;
+            resultHtml += `<p class="text-muted">${job.items_done + job.items_failed} of ${job.items_total} item(s) analyzed</p>`;
+            if (job.status === 'completed') {
+                resultHtml += `<a href="${escapeHtml(job.report_url)}" class="btn btn-primary btn-sm mb-3">View Report</a>`;
+            } else if (job.status === 'failed') {
+                resultHtml += `<div class="alert alert-danger">${escapeHtml(job.error || 'Analysis failed.')}</div>`;
+            }
+            container.innerHTML = resultHtml;
+            container.className = 'result mt-4 p-4 border rounded';
+
+            if (job.status === 'completed' || job.status === 'failed') return;
+            await new Promise(resolve => setTimeout(resolve, CONFIG.JOBS.POLL_INTERVAL));
+        }
+    }
+
+    /**
+     * Returns the Bootstrap badge class for a sentiment label
+     * @param {string} sentiment - 'Positive', 'Neutral' or 'Negative'
+     * @returns {string} - Badge class
+     */
+    function sentimentBadgeClass(sentiment) {
+        if (sentiment === 'Positive') return 'bg-success';
+        if (sentiment === 'Negative') return 'bg-danger';
+        return 'bg-secondary';
+    }
+
+    /**
+     * Displays streamed analysis results with proper formatting and animations
+     * @param {Object} data - Stream state: {itemsTotal, items (in arrival order), done (final event or null)}
      * @param {HTMLElement} container - The container to display results in
      */
     function displayAnalysisResult(data, container) {
         if (!container) return;
-        
+        const isFirstRender = !container.classList.contains('result');
+
         let resultHtml = `<h2>Analysis Result:</h2>`;
-        // Fallback to 'N/A' if sentiment is not directly available
-        resultHtml += `<p class="result-sentiment"><strong>${data.sentiment || 'N/A'}</strong></p>`;
-        
-        // Add badge based on sentiment
-        let badgeClass = 'bg-secondary'; // Default badge class
-        let sentimentText = data.sentiment || 'Neutral'; // Default sentiment text for badge
-
-        if (data.sentiment === 'Positive') {
-            badgeClass = 'bg-success';
-        } else if (data.sentiment === 'Negative') {
-            badgeClass = 'bg-danger';
+        resultHtml += `<p class="text-muted">${data.items.length} of ${data.itemsTotal} item(s) analyzed</p>`;
+
+        if (data.done) {
+            // Final event: overall sentiment for the whole report
+            const overall = data.done.overall_sentiment_label || 'Neutral';
+            resultHtml += `<p class="result-sentiment"><strong>Overall:</strong> `;
+            resultHtml += `<span class="badge ${sentimentBadgeClass(overall)} mb-2">${escapeHtml(overall)}</span></p>`;
+            resultHtml += `<p><small>${escapeHtml(data.done.message)}</small></p>`;
+            resultHtml += `<a href="${escapeHtml(data.done.report_url)}" class="btn btn-primary btn-sm mb-3">View Report</a>`;
         }
-        // If data.sentiment was undefined, sentimentText is 'Neutral'. Otherwise, it's the actual sentiment.
-        resultHtml += `<span class="badge ${badgeClass} mb-3">${sentimentText}</span>`;
-        
-        if (data.message) {
-            resultHtml += `<p><small>${data.message}</small></p>`;
-        }
-        
+
+        resultHtml += `<ul class="list-group">`;
+        data.items.forEach(item => {
+            resultHtml += `
+                <li class="list-group-item">
+                    <strong class="d-block mb-1">${escapeHtml(item.summary || `Item ${item.index + 1}`)}</strong>
+                    <small class="me-1">Sentiment:</small>
+                    <span class="badge ${sentimentBadgeClass(item.sentiment)} me-2">${escapeHtml(item.sentiment)}</span>
+                    <small class="text-muted">${Number(item.sentiment_score).toFixed(2)}</small>`;
+            if (item.keywords && item.keywords.length > 0) {
+                resultHtml += `<div class="mt-1"><small class="me-1">Keywords:</small>`;
+                item.keywords.slice(0, 8).forEach(keyword => {
+                    resultHtml += `<span class="badge bg-light text-dark border me-1">${escapeHtml(keyword)}</span>`;
+                });
+                resultHtml += `</div>`;
+            }
+            resultHtml += `</li>`;
+        });
+        resultHtml += `</ul>`;
+
         container.innerHTML = resultHtml;
         container.className = 'result mt-4 p-4 border rounded'; // Base classes
-        
-        // Add tilt effect to the result
-        if (typeof VanillaTilt !== 'undefined' && container.offsetWidth < CONFIG.TILT.MAX_WIDTH) {
-            VanillaTilt.init(container, CONFIG.TILT.SETTINGS);
+
+        if (isFirstRender) {
+            // Add tilt effect to the result
+            if (typeof VanillaTilt !== 'undefined' && container.offsetWidth < CONFIG.TILT.MAX_WIDTH) {
+                VanillaTilt.init(container, CONFIG.TILT.SETTINGS);
+            }
+
+            // Add fade-in animation using a CSS class.
+            DOM.addClass(container, 'animate-fadeInUp');
         }
-        
-        // Add fade-in animation using a CSS class.
-        DOM.addClass(container, 'animate-fadeInUp');
     }
 
     /**
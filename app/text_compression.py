@@ -0,0 +1,222 @@
+# Compressed storage for NewsItem.original_text.
+# Article bodies are stored as raw deflate streams, compressed against a zlib preset dictionary
+# trained on our own articles (flask train-text-dictionary), behind the CompressedText column
+# type, so code reading and writing NewsItem.original_text only sees strings. SQL that needs the
+# text (the FTS index, see app/models.py) decodes it with the news_item_text() function that
+# configure_text_compression() registers on every SQLite connection.
+#
+# Stored value: one format byte, then
+#   FORMAT_RAW:  the UTF-8 text (texts too short to gain from compression),
+#   FORMAT_ZLIB: one dictionary ID byte (0 = no dictionary) and the deflate stream.
+# Dictionaries are files named <id>.zdict in the dictionary directory. They are never changed or
+# deleted once written: stored texts refer to them by ID. New texts use the highest ID.
+
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+
+FORMAT_RAW = 0
+FORMAT_ZLIB = 1
+DEFAULT_DICTIONARY_DIR = os.path.join(os.path.dirname(__file__), 'text_dictionaries')
+DEFAULT_COMPRESSION_LEVEL = 6
+DICTIONARY_SIZE = 32 * 1024 # zlib only looks back 32 KiB, so a larger dictionary is never used
+MIN_COMPRESSED_LENGTH = 64 # Shorter texts are stored raw
+SQL_FUNCTION_NAME = 'news_item_text'
+
+_DICTIONARY_FILE_RE = re.compile(r'^(\d+)\.zdict$')
+_TOKEN_RE = re.compile(r'\S+\s*')
+
+
+def _compressor(level: int, zdict: Optional[bytes]):
+    if zdict:
+        return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+def _decompressor(zdict: Optional[bytes]):
+    return zlib.decompressobj(-zlib.MAX_WBITS, zdict=zdict) if zdict else zlib.decompressobj(-zlib.MAX_WBITS)
+
+
+class TextCodec:
+    """
+    Encodes texts into the stored format and back. New texts are compressed with the dictionary
+    of the highest ID; stored texts are decoded with the dictionary they name. Thread-safe
+    (instances are immutable).
+    """
+
+    def __init__(self, dictionaries: Optional[Dict[int, bytes]] = None, level: int = DEFAULT_COMPRESSION_LEVEL):
+        self.dictionaries = dict(dictionaries or {})
+        self.level = level
+        self.dictionary_id = max(self.dictionaries, default=0)
+        if not 0 <= self.dictionary_id <= 255:
+            raise ValueError('Text dictionary IDs must be between 1 and 255.')
+
+    def encode(self, text: str) -> bytes:
+        raw = text.encode('utf-8')
+        if len(raw) >= MIN_COMPRESSED_LENGTH:
+            compressor = _compressor(self.level, self.dictionaries.get(self.dictionary_id))
+            packed = compressor.compress(raw) + compressor.flush()
+            if len(packed) + 1 < len(raw):
+                return bytes((FORMAT_ZLIB, self.dictionary_id)) + packed
+        return bytes((FORMAT_RAW,)) + raw
+
+    def decode(self, value) -> str:
+        if isinstance(value, str): # Written before compression was enabled
+            return value
+        value = bytes(value)
+        if not value:
+            return ''
+        if value[0] == FORMAT_RAW:
+            return value[1:].decode('utf-8')
+        if value[0] == FORMAT_ZLIB:
+            dictionary_id = value[1]
+            if dictionary_id and dictionary_id not in self.dictionaries:
+                raise LookupError(f'Text dictionary {dictionary_id} is missing; restore {dictionary_id}.zdict.')
+            decompressor = _decompressor(self.dictionaries.get(dictionary_id))
+            return (decompressor.decompress(value[2:]) + decompressor.flush()).decode('utf-8')
+        raise ValueError(f'Unknown stored text format {value[0]}.')
+
+    def is_current(self, value) -> bool:
+        """True if a stored value is already encoded as encode() would encode it now."""
+        if isinstance(value, str):
+            return False
+        value = bytes(value)
+        return bool(value) and (value[0] == FORMAT_RAW or value[:2] == bytes((FORMAT_ZLIB, self.dictionary_id)))
+
+
+_codec = TextCodec()
+_codec_lock = threading.Lock()
+
+def get_text_codec() -> TextCodec:
+    """The process-wide codec (no dictionaries until configure_text_compression() runs)."""
+    return _codec
+
+def encode_text(text: str) -> bytes:
+    return _codec.encode(text)
+
+def decode_text(value) -> Optional[str]:
+    return None if value is None else _codec.decode(value)
+
+def load_dictionaries(directory: str) -> Dict[int, bytes]:
+    """Reads the <id>.zdict files of a directory; a missing directory has none."""
+    dictionaries = {}
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = _DICTIONARY_FILE_RE.match(name)
+            if match:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    dictionaries[int(match.group(1))] = f.read()
+    return dictionaries
+
+def configure_text_compression(engine: sa.engine.Engine, dictionary_dir: Optional[str] = None,
+                               level: int = DEFAULT_COMPRESSION_LEVEL) -> TextCodec:
+    """
+    Loads the dictionaries into the process-wide codec and registers news_item_text() on every
+    connection `engine` opens (SQLite only).
+    """
+    global _codec
+    with _codec_lock:
+        _codec = TextCodec(load_dictionaries(dictionary_dir or DEFAULT_DICTIONARY_DIR), level)
+    if engine.dialect.name == 'sqlite':
+        @sa.event.listens_for(engine, 'connect')
+        def _register_functions(dbapi_connection, connection_record):
+            dbapi_connection.create_function(SQL_FUNCTION_NAME, 1, decode_text, deterministic=True)
+    return _codec
+
+
+class CompressedText(sa.types.TypeDecorator):
+    """A text column stored compressed (see TextCodec); reads and writes plain strings."""
+    impl = sa.LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode_text(value)
+
+    def result_processor(self, dialect, coltype):
+        # Decode the DBAPI value directly; LargeBinary's processor rejects texts stored uncompressed
+        return decode_text
+
+
+def train_dictionary(texts: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Builds a zlib preset dictionary from sample texts: the runs of one to three words that occur
+    in the most samples, weighted by length. The most valuable runs go last, where zlib reaches
+    them with the shortest match distances.
+    """
+    document_counts = Counter()
+    for text in texts:
+        tokens = _TOKEN_RE.findall(text)
+        runs = set()
+        for n in (1, 2, 3):
+            runs.update(''.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        document_counts.update(runs)
+    candidates = sorted(((count * len(run), run) for run, count in document_counts.items() if count > 1), reverse=True)
+    chosen, used = [], 0
+    for _, run in candidates:
+        encoded = run.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b''.join(reversed(chosen))
+
+
+def _dictionary_dir() -> str:
+    return current_app.config.get('TEXT_DICTIONARY_DIR') or DEFAULT_DICTIONARY_DIR
+
+@click.command('train-text-dictionary')
+@click.option('--sample-size', type=int, default=2000, show_default=True, help='Number of recent news items to train on.')
+@with_appcontext
+def train_text_dictionary_command(sample_size):
+    """Train a compression dictionary on the stored news texts and save it as the next <id>.zdict."""
+    from app.models import NewsItem
+    texts = db.session.scalars(sa.select(NewsItem.original_text).order_by(NewsItem.id.desc()).limit(sample_size)).all()
+    if not texts:
+        raise click.ClickException('There are no news items to train on.')
+    directory = _dictionary_dir()
+    existing = load_dictionaries(directory)
+    dictionary_id = max(existing, default=0) + 1
+    zdict = train_dictionary(texts)
+    plain, trained = TextCodec(level=_codec.level), TextCodec({dictionary_id: zdict}, level=_codec.level)
+    raw_size = sum(len(text.encode('utf-8')) for text in texts)
+    plain_size = sum(len(plain.encode(text)) for text in texts)
+    trained_size = sum(len(trained.encode(text)) for text in texts)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{dictionary_id}.zdict')
+    with open(path, 'wb') as f:
+        f.write(zdict)
+    click.echo(f"Wrote {path} ({len(zdict)} bytes). On {len(texts)} texts ({raw_size} bytes): "
+               f"{plain_size} bytes without a dictionary, {trained_size} bytes with it. "
+               "Deploy the file with the app, then run 'flask recompress-news-text'.")
+
+@click.command('recompress-news-text')
+@click.option('--batch-size', type=int, default=500, show_default=True)
+@with_appcontext
+def recompress_news_text_command(batch_size):
+    """Re-encode stored news texts that do not use the newest dictionary."""
+    from app.models import NewsItem
+    table = NewsItem.__table__
+    raw_text = sa.type_coerce(table.c.original_text, sa.types.NullType()) # The stored value, undecoded
+    update = sa.update(table).where(table.c.id == sa.bindparam('item_id')).values(original_text=sa.bindparam('text'))
+    last_id, rewritten = 0, 0
+    while True:
+        rows = db.session.execute(sa.select(table.c.id, raw_text).where(table.c.id > last_id)
+                                  .order_by(table.c.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        stale = [{'item_id': item_id, 'text': _codec.decode(value)} for item_id, value in rows if not _codec.is_current(value)]
+        if stale:
+            db.session.execute(update, stale)
+            db.session.commit()
+            rewritten += len(stale)
+    click.echo(f"Re-encoded {rewritten} news texts with dictionary {_codec.dictionary_id}.")
@@ -0,0 +1,158 @@
+# Splits a submitted block of text into the news items that are sent for analysis.
+# Segmentation is a generator pipeline: the text is scanned line by line, so no list of
+# every line or item is built up front. Along the way, oversized items are split (or
+# trimmed) to a token limit, and duplicates and fragments too short to analyze are dropped
+# before they cost an API call.
+
+import io
+import re
+from typing import Iterator, List, Optional
+
+from app.analysis_cache import normalize_text
+from app.openai_api import estimate_tokens
+
+# Literal separator between items in 'marker' mode
+ITEM_MARKER = '---NEXT_ITEM---'
+
+SPLIT_AUTO = 'auto'
+SPLIT_MARKER = 'marker'
+SPLIT_BLANK_LINE = 'blank'
+SPLIT_LINE = 'line'
+SPLIT_MODES = (SPLIT_AUTO, SPLIT_MARKER, SPLIT_BLANK_LINE, SPLIT_LINE)
+
+OVERSIZE_SPLIT = 'split'
+OVERSIZE_TRIM = 'trim'
+
+# Items shorter than this are skipped by the analyzer anyway, so they are dropped up front
+MIN_ITEM_CHARS = 10
+# Default per-item limit; an average news article is well under 1,500 tokens
+DEFAULT_MAX_ITEM_TOKENS = 2000
+# estimate_tokens() assumes about four characters per token
+CHARS_PER_TOKEN = 4
+
+_BLANK_LINE_PATTERN = re.compile(r'\n[ \t]*\r?\n')
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+def detect_split_mode(text: str) -> str:
+    """
+    Picks a split mode for `text`: the marker if present, otherwise blank-line separation
+    if the text has blank lines, otherwise one item per line.
+    """
+    if ITEM_MARKER in text:
+        return SPLIT_MARKER
+    if _BLANK_LINE_PATTERN.search(text):
+        return SPLIT_BLANK_LINE
+    return SPLIT_LINE
+
+def _iter_marker_segments(text: str) -> Iterator[str]:
+    start = 0
+    while True:
+        end = text.find(ITEM_MARKER, start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + len(ITEM_MARKER)
+
+def _iter_blank_line_segments(text: str) -> Iterator[str]:
+    paragraph: List[str] = []
+    for line in io.StringIO(text):
+        if line.strip():
+            paragraph.append(line)
+        elif paragraph:
+            yield ''.join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield ''.join(paragraph)
+
+def _iter_line_segments(text: str) -> Iterator[str]:
+    # StringIO yields one line at a time instead of building the list text.splitlines() would
+    yield from io.StringIO(text)
+
+def iter_raw_segments(text: str, mode: str = SPLIT_AUTO) -> Iterator[str]:
+    """Yields the unfiltered segments of `text` for the given split mode."""
+    if mode == SPLIT_AUTO:
+        mode = detect_split_mode(text)
+    if mode == SPLIT_MARKER:
+        return _iter_marker_segments(text)
+    if mode == SPLIT_BLANK_LINE:
+        return _iter_blank_line_segments(text)
+    if mode == SPLIT_LINE:
+        return _iter_line_segments(text)
+    raise ValueError(f"Unknown split mode '{mode}'. Expected one of {SPLIT_MODES}.")
+
+def _cut_point(text: str, max_chars: int) -> int:
+    # Prefer the last sentence end, then the last whitespace, before max_chars
+    window = text[:max_chars + 1]
+    sentence_ends = [match.start() for match in _SENTENCE_END_PATTERN.finditer(window)]
+    if sentence_ends and sentence_ends[-1] > max_chars // 2:
+        return sentence_ends[-1]
+    space = window.rfind(' ')
+    return space if space > max_chars // 2 else max_chars
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Shortens `text` to about `max_tokens` tokens, ending at a sentence or word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:_cut_point(text, max_tokens * CHARS_PER_TOKEN)].rstrip()
+
+def split_to_tokens(text: str, max_tokens: int) -> Iterator[str]:
+    """Splits `text` into consecutive parts of at most about `max_tokens` tokens each."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    while estimate_tokens(text) > max_tokens:
+        cut = _cut_point(text, max_chars)
+        yield text[:cut].rstrip()
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+def limit_item_tokens(text: str, max_item_tokens: Optional[int] = DEFAULT_MAX_ITEM_TOKENS,
+                      oversize: str = OVERSIZE_SPLIT) -> Iterator[str]:
+    """
+    Applies the per-item token limit to one item.
+
+    Yields the item unchanged if it is within `max_item_tokens` (or the limit is None),
+    otherwise its parts ('split') or its beginning ('trim').
+    """
+    if not max_item_tokens or estimate_tokens(text) <= max_item_tokens:
+        yield text
+    elif oversize == OVERSIZE_SPLIT:
+        yield from split_to_tokens(text, max_item_tokens)
+    else:
+        yield trim_to_tokens(text, max_item_tokens)
+
+def iter_news_items(text: str, mode: str = SPLIT_AUTO,
+                    max_item_tokens: Optional[int] = DEFAULT_MAX_ITEM_TOKENS,
+                    oversize: str = OVERSIZE_SPLIT,
+                    min_chars: int = MIN_ITEM_CHARS) -> Iterator[str]:
+    """
+    Splits a submission into news items ready for analysis.
+
+    Args:
+        text (str): The submitted text.
+        mode (str): One of SPLIT_MODES. 'auto' detects the mode from the text.
+        max_item_tokens (int, optional): Estimated token limit per item. None disables the limit.
+        oversize (str): 'split' turns an oversized item into several items; 'trim' keeps only
+                        its beginning.
+        min_chars (int): Items shorter than this after stripping are dropped.
+
+    Yields:
+        str: Stripped, unique items in submission order.
+    """
+    seen = set()
+    for segment in iter_raw_segments(text or '', mode):
+        segment = segment.strip()
+        if len(segment) < min_chars:
+            continue
+        for part in limit_item_tokens(segment, max_item_tokens, oversize):
+            if len(part) < min_chars:
+                continue
+            key = normalize_text(part)
+            if key in seen: # Exact duplicates (ignoring whitespace) would only repeat the same result
+                continue
+            seen.add(key)
+            yield part
+
+def split_news_items(text: str, mode: str = SPLIT_AUTO, **options) -> List[str]:
+    """List-returning convenience wrapper around iter_news_items."""
+    return list(iter_news_items(text, mode, **options))
@@ -7,6 +7,63 @@ load_dotenv(os.path.join(basedir, '.env')) # Load .env file from the project roo
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-very-secret-key'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Maximum number of news items analyzed concurrently for a single submission
+    ANALYSIS_MAX_CONCURRENCY = int(os.environ.get('ANALYSIS_MAX_CONCURRENCY') or 8)
+    # Batched analysis: pack several news items into one prompt, up to this many estimated tokens
+    ANALYSIS_BATCH_MODE = os.environ.get('ANALYSIS_BATCH_MODE', 'false').lower() == 'true'
+    ANALYSIS_BATCH_TOKEN_BUDGET = int(os.environ.get('ANALYSIS_BATCH_TOKEN_BUDGET') or 6000)
+    ANALYSIS_BATCH_MAX_ITEMS = int(os.environ.get('ANALYSIS_BATCH_MAX_ITEMS') or 20)
+    # Background analysis jobs: how long a worker's lease lasts and how often a job may be claimed
+    ANALYSIS_JOB_LEASE_SECONDS = int(os.environ.get('ANALYSIS_JOB_LEASE_SECONDS') or 120)
+    ANALYSIS_JOB_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_JOB_MAX_ATTEMPTS') or 3)
+    # Submissions of at least this many items are queued for a worker instead of analyzed in the request (0 = never)
+    ANALYSIS_QUEUE_MIN_ITEMS = int(os.environ.get('ANALYSIS_QUEUE_MIN_ITEMS') or 50)
+    # Analysis result cache: in-process LRU size, shared SQLite tier location and entry lifetime
+    ANALYSIS_CACHE_ENABLED = os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES') or 2048)
+    ANALYSIS_CACHE_DB_PATH = os.environ.get('ANALYSIS_CACHE_DB_PATH') or \
+        os.path.join(basedir, 'instance', 'analysis_cache.db')
+    ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYSIS_CACHE_TTL_SECONDS') or 7 * 24 * 3600)
+    # Serve the process-wide cache counters under /api/*_cache/stats (always on in debug mode)
+    CACHE_STATS_ENABLED = os.environ.get('CACHE_STATS_ENABLED', 'false').lower() == 'true'
+    # Report payload cache (dashboard data, feed API responses): in-process LRU size in bytes,
+    # shared SQLite tier location, size and entry lifetime
+    PAYLOAD_CACHE_ENABLED = os.environ.get('PAYLOAD_CACHE_ENABLED', 'true').lower() == 'true'
+    PAYLOAD_CACHE_MAX_BYTES = int(os.environ.get('PAYLOAD_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+    PAYLOAD_CACHE_DB_PATH = os.environ.get('PAYLOAD_CACHE_DB_PATH') or \
+        os.path.join(basedir, 'instance', 'payload_cache.db')
+    PAYLOAD_CACHE_SHARED_MAX_BYTES = int(os.environ.get('PAYLOAD_CACHE_SHARED_MAX_BYTES') or 256 * 1024 * 1024)
+    PAYLOAD_CACHE_TTL_SECONDS = int(os.environ.get('PAYLOAD_CACHE_TTL_SECONDS') or 24 * 3600)
+    # Shared OpenAI client: timeouts, connection pool size, retries and the account's rate limits
+    OPENAI_TIMEOUT_SECONDS = float(os.environ.get('OPENAI_TIMEOUT_SECONDS') or 30)
+    OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('OPENAI_CONNECT_TIMEOUT_SECONDS') or 5)
+    OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS') or 20)
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES') or 4)
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE') or 500)
+    OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE') or 200000)
+    # Adaptive concurrency: most requests in flight per process, and the latency that triggers backing off
+    OPENAI_MAX_IN_FLIGHT = int(os.environ.get('OPENAI_MAX_IN_FLIGHT') or 16)
+    OPENAI_LATENCY_TARGET_SECONDS = float(os.environ.get('OPENAI_LATENCY_TARGET_SECONDS') or 10)
+    # Per-item token limit applied when splitting submissions; oversized items are 'split' or 'trim'med
+    ANALYSIS_MAX_ITEM_TOKENS = int(os.environ.get('ANALYSIS_MAX_ITEM_TOKENS') or 2000)
+    ANALYSIS_OVERSIZE_POLICY = os.environ.get('ANALYSIS_OVERSIZE_POLICY') or 'split'
+    # Analyzer backend ('openai' or the local 'lexicon' engine) and the opt-in backend used when it fails
+    ANALYZER_BACKEND = os.environ.get('ANALYZER_BACKEND') or 'openai'
+    ANALYZER_FALLBACK_BACKEND = os.environ.get('ANALYZER_FALLBACK_BACKEND') or None
+    # Bulk file ingestion: where uploads wait for a worker, articles per analyzed/committed chunk, upload size cap
+    INGEST_UPLOAD_FOLDER = os.environ.get('INGEST_UPLOAD_FOLDER') or os.path.join(basedir, 'instance', 'uploads')
+    INGEST_CHUNK_SIZE = int(os.environ.get('INGEST_CHUNK_SIZE') or 200)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB') or 512) * 1024 * 1024
+    # SQLite engine profile applied on connect (see app/db_engine.py): 'production' (WAL, tuned PRAGMAs)
+    # or 'default' (SQLite's defaults). SQLITE_BUSY_TIMEOUT_MS overrides the profile's busy timeout.
+    SQLITE_ENGINE_PROFILE = os.environ.get('SQLITE_ENGINE_PROFILE') or 'production'
+    SQLITE_PRAGMAS = {'busy_timeout': int(os.environ['SQLITE_BUSY_TIMEOUT_MS'])} \
+        if os.environ.get('SQLITE_BUSY_TIMEOUT_MS') else {}
+    # Time allowed for the cross-report keyword/intent analytics queries before they are interrupted
+    ANALYTICS_TIME_BUDGET_MS = int(os.environ.get('ANALYTICS_TIME_BUDGET_MS') or 2000)
+    # Compressed news text storage: directory of the trained zlib dictionaries and compression level
+    TEXT_DICTIONARY_DIR = os.environ.get('TEXT_DICTIONARY_DIR') # None uses app/text_dictionaries
+    TEXT_COMPRESSION_LEVEL = int(os.environ.get('TEXT_COMPRESSION_LEVEL') or 6)
     # Add other common configurations here
 
 class DevelopmentConfig(Config):
@@ -15,6 +72,8 @@ class DevelopmentConfig(Config):
         'sqlite:///' + os.path.join(basedir, 'instance', 'app-dev.db')
     # Ensure the 'instance' folder exists for the SQLite DB
     os.makedirs(os.path.join(basedir, 'instance'), exist_ok=True)
+    # Connection pool for the dev server plus an analysis worker or two
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 5, 'max_overflow': 5, 'pool_timeout': 30}
 
 
 class TestingConfig(Config):
@@ -22,15 +81,24 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite:///:memory:' # Use in-memory SQLite for tests
     WTF_CSRF_ENABLED = False # Disable CSRF forms in tests for convenience
+    ANALYSIS_CACHE_DB_PATH = None # Keep the analysis cache in memory only during tests
+    PAYLOAD_CACHE_DB_PATH = None # Likewise for the payload cache
     SERVER_NAME = 'localhost.localdomain' # Added for url_for in tests
     APPLICATION_ROOT = '/'  # Added for url_for in tests
     PREFERRED_URL_SCHEME = 'http' # Added for url_for in tests
+    SQLITE_ENGINE_PROFILE = 'default' # In-memory database; WAL and mmap do not apply
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'instance', 'app.db')
     # Ensure the 'instance' folder exists for the SQLite DB
     os.makedirs(os.path.join(basedir, 'instance'), exist_ok=True)
+    # One pooled connection per web/worker thread; SQLite connections are cheap, so pre-ping is not needed
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 10),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    }
     # Add other production-specific configs
 
 config = {
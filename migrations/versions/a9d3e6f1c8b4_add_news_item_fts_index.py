@@ -0,0 +1,49 @@
+"""Add news_item_fts full-text index over news item text and summaries
+
+Revision ID: a9d3e6f1c8b4
+Revises: f4c7d2e9b5a3
+Create Date: 2025-05-24 15:02:48.731655
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e6f1c8b4'
+down_revision = 'f4c7d2e9b5a3'
+branch_labels = None
+depends_on = None
+
+# Same statements as app.models.NEWS_ITEM_FTS_DDL at this revision
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS news_item_fts USING fts5("
+    "original_text, summary, content='news_item', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ai AFTER INSERT ON news_item BEGIN "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ad AFTER DELETE ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_au AFTER UPDATE OF original_text, summary ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+]
+
+
+def upgrade():
+    # FTS5 virtual table and sync triggers (SQLite only)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    # Index the existing news items
+    op.execute("INSERT INTO news_item_fts(news_item_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('news_item_fts_ai', 'news_item_fts_ad', 'news_item_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS news_item_fts")
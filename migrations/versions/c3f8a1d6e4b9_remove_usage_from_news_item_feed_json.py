@@ -0,0 +1,30 @@
+"""Remove the owner-only usage block from news_item.feed_json
+
+Revision ID: c3f8a1d6e4b9
+Revises: b7d2e5a9c3f8
+Create Date: 2025-05-28 10:41:09.372815
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d6e4b9'
+down_revision = 'b7d2e5a9c3f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The stored JSON is served to everyone the report is shared with; the feed adds the usage
+    # telemetry from the item's columns for the report's author only
+    op.execute("UPDATE news_item SET feed_json = json_remove(feed_json, '$.usage') WHERE feed_json IS NOT NULL")
+
+
+def downgrade():
+    op.execute(
+        "UPDATE news_item SET feed_json = json_set(feed_json, '$.usage', json_object("
+        "'model', usage_model, 'prompt_tokens', prompt_tokens, 'completion_tokens', completion_tokens, "
+        "'cached_tokens', cached_tokens, 'latency_ms', latency_ms, 'retries', retries, 'cost_usd', cost_usd)) "
+        "WHERE feed_json IS NOT NULL"
+    )
@@ -0,0 +1,110 @@
+"""Store news_item.original_text compressed and index it through a decompressing view
+
+Revision ID: d8a3f6b2e5c1
+Revises: c6d2a8e4f1b7
+Create Date: 2025-05-26 10:42:17.305816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.text_compression import get_text_codec
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f6b2e5c1'
+down_revision = 'c6d2a8e4f1b7'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Same statements as app.models.NEWS_ITEM_FTS_DDL; news_item_text() is registered on every
+# connection by app.text_compression.configure_text_compression
+FTS_DDL = [
+    "CREATE VIEW IF NOT EXISTS news_item_fts_content AS "
+    "SELECT id, news_item_text(original_text) AS original_text, summary FROM news_item",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS news_item_fts USING fts5("
+    "original_text, summary, content='news_item_fts_content', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ai AFTER INSERT ON news_item BEGIN "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) "
+    "VALUES (new.id, news_item_text(new.original_text), new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ad AFTER DELETE ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, news_item_text(old.original_text), old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_au AFTER UPDATE OF original_text, summary ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, news_item_text(old.original_text), old.summary); "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) "
+    "VALUES (new.id, news_item_text(new.original_text), new.summary); END",
+]
+
+# The previous index, which read the plain text straight from news_item (revision a9d3e6f1c8b4)
+PLAIN_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS news_item_fts USING fts5("
+    "original_text, summary, content='news_item', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ai AFTER INSERT ON news_item BEGIN "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_ad AFTER DELETE ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); END",
+    "CREATE TRIGGER IF NOT EXISTS news_item_fts_au AFTER UPDATE OF original_text, summary ON news_item BEGIN "
+    "INSERT INTO news_item_fts(news_item_fts, rowid, original_text, summary) "
+    "VALUES ('delete', old.id, old.original_text, old.summary); "
+    "INSERT INTO news_item_fts(rowid, original_text, summary) VALUES (new.id, new.original_text, new.summary); END",
+]
+
+
+def drop_fts():
+    for trigger in ('news_item_fts_ai', 'news_item_fts_ad', 'news_item_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS news_item_fts")
+    op.execute("DROP VIEW IF EXISTS news_item_fts_content")
+
+
+def convert_texts(convert):
+    # Rewrites every original_text in id order, BATCH_SIZE rows at a time
+    bind = op.get_bind()
+    select = sa.text("SELECT id, original_text FROM news_item WHERE id > :last_id ORDER BY id LIMIT :limit")
+    update = sa.text("UPDATE news_item SET original_text = :text WHERE id = :item_id")
+    last_id = 0
+    while True:
+        rows = bind.execute(select, {'last_id': last_id, 'limit': BATCH_SIZE}).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        bind.execute(update, [{'item_id': item_id, 'text': convert(value)} for item_id, value in rows])
+
+
+def upgrade():
+    codec = get_text_codec()
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    # The triggers would re-index every row while it is rewritten; the index is rebuilt at the end
+    if sqlite:
+        drop_fts()
+
+    # Compress before changing the type: the batch copy CASTs the column, which turns texts into blobs
+    convert_texts(lambda value: codec.encode(codec.decode(value)))
+    with op.batch_alter_table('news_item', schema=None) as batch_op:
+        batch_op.alter_column('original_text', existing_type=sa.Text(), type_=sa.LargeBinary(), existing_nullable=False)
+
+    if sqlite:
+        for statement in FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO news_item_fts(news_item_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    codec = get_text_codec()
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    if sqlite:
+        drop_fts()
+
+    convert_texts(codec.decode)
+    with op.batch_alter_table('news_item', schema=None) as batch_op:
+        batch_op.alter_column('original_text', existing_type=sa.LargeBinary(), type_=sa.Text(), existing_nullable=False)
+
+    if sqlite:
+        for statement in PLAIN_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO news_item_fts(news_item_fts) VALUES ('rebuild')")
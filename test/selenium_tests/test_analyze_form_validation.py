@@ -11,16 +11,10 @@ Test Steps for each validation case:
 4. Navigate to the /analyze page.
 5. Attempt to submit the form with invalid data (e.g., empty news_text, too short news_text).
 6. Assert that the application provides feedback indicating a validation error.
-   - Given the current AJAX implementation in analyze.html, this involves checking
-     that the results modal appears but displays default/empty-looking content
-     (e.g., "undefined" sentiment) rather than a successful analysis, and that
-     the user remains on the /analyze page.
-
-Note: The current client-side JavaScript in analyze.html for AJAX submission
-does not explicitly display WTForms field-specific validation error messages
-(e.g., "This field is required.") in the DOM. Instead, it shows the analysis
-result modal with content reflecting the missing/invalid data from the
-server's JSON error response.
+   - The streaming endpoint (/analyze/stream) rejects the submission with a JSON
+     error response, script.js shows the WTForms field errors as a warning in
+     #ajax-result-display, no results are rendered, and the user remains on the
+     /analyze page.
 """
 import unittest
 import threading
@@ -107,51 +101,27 @@ class TestAnalyzeFormValidation(unittest.TestCase):
         if self.driver:
             self.driver.quit()
 
-    def _check_modal_content_for_validation_error(self, driver):
+    def _check_result_display_for_validation_error(self, driver):
         """
-        Helper method to check the content of the analysis result modal
-        when a form validation error is expected via AJAX.
-        The current JS in analyze.html shows the modal with default/empty-looking
-        content because it doesn't specifically parse form.errors from the JSON.
+        Helper method to check the streamed result area when a form validation error
+        is expected. The server rejects the submission with a JSON error response before
+        any event is streamed, and script.js shows the field errors as a warning.
         """
-        # Wait for the modal to become visible
-        modal_content_div = self.wait.until(EC.visibility_of_element_located((By.ID, "analysis-result-content")))
-
-        # In analyze.html's displayAnalysisResultInModal, if data.sentiment is undefined (from error JSON),
-        # the badge text becomes the string "undefined".
-        sentiment_badge = self.wait.until(EC.visibility_of_element_located(
-            (By.XPATH, "//div[@id='analysis-result-content']//span[contains(@class, 'badge bg-secondary') and contains(text(), 'undefined')]")
+        warning = self.wait.until(EC.visibility_of_element_located(
+            (By.CSS_SELECTOR, "#ajax-result-display .alert-warning")
         ))
-        self.assertTrue(sentiment_badge.is_displayed(),
-                        "Modal should indicate 'undefined' sentiment in badge on validation error.")
+        self.assertTrue(warning.text.strip(), "A validation message should be shown.")
 
-        # Check that intents and keywords sections are not present (as they wouldn't be in the error JSON)
-        intents_elements = driver.find_elements(By.XPATH, "//div[@id='analysis-result-content']//h3[contains(text(), 'Identified Intents:')]")
-        self.assertEqual(len(intents_elements), 0,
-                         "Intents section should not be present in modal on validation error.")
-        
-        keywords_elements = driver.find_elements(By.XPATH, "//div[@id='analysis-result-content']//h3[contains(text(), 'Extracted Keywords:')]")
-        self.assertEqual(len(keywords_elements), 0,
-                         "Keywords section should not be present in modal on validation error.")
-
-        # Check for the potentially misleading "saved to history" message which is always added by current JS
-        saved_message = driver.find_element(By.XPATH, "//div[@id='analysis-result-content']//small[contains(text(), 'This result has been saved to your history.')]")
-        self.assertTrue(saved_message.is_displayed(),
-                        "Misleading 'saved to history' message should be present in modal on validation error.")
-        
-        # Close the modal to reset state for next potential interaction
-        # The close button can be the 'x' or the "Close" button in the footer
-        close_button = self.wait.until(EC.element_to_be_clickable(
-            (By.XPATH, "//div[@id='analysisResultModal']//button[contains(@class, 'btn-close') or contains(text(), 'Close')]")
-        ))
-        close_button.click()
-        # Wait for modal to hide to prevent interference with subsequent actions
-        self.wait.until(EC.invisibility_of_element_located((By.ID, "analysisResultModal")))
+        # No item results or report link should be rendered for a rejected submission
+        items = driver.find_elements(By.CSS_SELECTOR, "#ajax-result-display .list-group-item")
+        self.assertEqual(len(items), 0, "No analysis results should be shown on validation error.")
+        report_links = driver.find_elements(By.XPATH, "//div[@id='ajax-result-display']//a[contains(text(), 'View Report')]")
+        self.assertEqual(len(report_links), 0, "No report should be created on validation error.")
 
     def test_empty_news_text_submission(self):
         """
         Tests submitting the analysis form with an empty news_text field.
-        Expects the AJAX response to trigger the modal with default/empty-like content.
+        Expects the validation errors to be shown above the (empty) result list.
         """
         driver = self.driver
         driver.get(f"{self.base_url}/analyze")
@@ -165,8 +135,8 @@ class TestAnalyzeFormValidation(unittest.TestCase):
         # Click submit without filling news_text
         submit_button.click()
 
-        # Check the modal content for signs of a validation error (as per current JS behavior)
-        self._check_modal_content_for_validation_error(driver)
+        # Check the result area for the validation error
+        self._check_result_display_for_validation_error(driver)
         
         # Verify the URL hasn't changed (i.e., no redirect to results page)
         self.assertIn("/analyze", driver.current_url,
@@ -175,7 +145,7 @@ class TestAnalyzeFormValidation(unittest.TestCase):
     def test_short_news_text_submission(self):
         """
         Tests submitting the analysis form with news_text shorter than the minimum length.
-        Expects the AJAX response to trigger the modal with default/empty-like content.
+        Expects the validation errors to be shown above the (empty) result list.
         """
         driver = self.driver
         driver.get(f"{self.base_url}/analyze")
@@ -190,8 +160,8 @@ class TestAnalyzeFormValidation(unittest.TestCase):
         news_text_field.send_keys("short") # 5 characters
         submit_button.click()
 
-        # Check the modal content for signs of a validation error
-        self._check_modal_content_for_validation_error(driver)
+        # Check the result area for the validation error
+        self._check_result_display_for_validation_error(driver)
 
         # Verify the URL hasn't changed
         self.assertIn("/analyze", driver.current_url,
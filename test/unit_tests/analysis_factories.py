@@ -0,0 +1,26 @@
+# Synthetic analysis results shared by the unit tests, so they build reports without calling the API.
+
+from typing import Any, List
+
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+
+def make_analysis(i: int, **fields: Any) -> SingleNewsItemAnalysis:
+    """
+    Builds the i-th synthetic analysis: neutral, one intent, keywords alternating between
+    'topic0' and 'topic1' and a date in May 2024. Any field can be overridden with a value,
+    or with a function of i.
+    """
+    values = dict(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, intents=['News Report'],
+                  keywords=[f'topic{i % 2}'], summary=f'Headline {i}', publication_date=f'2024-05-{i % 28 + 1:02d}')
+    values.update({name: value(i) if callable(value) else value for name, value in fields.items()})
+    return SingleNewsItemAnalysis(**values)
+
+def make_analyses(count: int, **fields: Any) -> List[SingleNewsItemAnalysis]:
+    """Builds `count` analyses with make_analysis()."""
+    return [make_analysis(i, **fields) for i in range(count)]
+
+def fake_analysis(text: str, score: float = 0.6) -> SingleNewsItemAnalysis:
+    """Stands in for the API's analysis of `text`, e.g. as the side effect of a patched request."""
+    label = SentimentEnum.POSITIVE if score > 0 else SentimentEnum.NEGATIVE if score < 0 else SentimentEnum.NEUTRAL
+    return SingleNewsItemAnalysis(sentiment_label=label, sentiment_score=score,
+                                  intents=['News Report'], keywords=['markets'], summary=text[:20])
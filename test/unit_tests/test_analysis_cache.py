@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import openai_api, create_app, db
+from app.config import TestingConfig
+from app.models import User
+from app.openai_client import configure_openai_client
+from app.analysis_cache import AnalysisCache, configure_analysis_cache, make_cache_key
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+
+def sample_analysis(score=0.7):
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=score,
+                                  intents=['News Report'], keywords=['economy'], summary='Economy grows')
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        # Use a throwaway SQLite file for the shared tier
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'cache.db')
+
+    def tearDown(self):
+        configure_analysis_cache(enabled=False)
+        self.tmpdir.cleanup()
+
+    def mock_openai_client(self):
+        # Injects a mock in place of the OpenAI class; the process-wide manager is reset after the test
+        mock_openai = MagicMock()
+        configure_openai_client(client_factory=mock_openai)
+        self.addCleanup(configure_openai_client)
+        return mock_openai
+
+    # 1. Keys ignore whitespace differences but depend on model and prompt version
+    def test_cache_key_normalization(self):
+        key = make_cache_key('Stocks  rallied\ntoday.', 'model-a', '1')
+        self.assertEqual(key, make_cache_key('  Stocks rallied today. ', 'model-a', '1'))
+        self.assertNotEqual(key, make_cache_key('Stocks rallied today.', 'model-b', '1'))
+        self.assertNotEqual(key, make_cache_key('Stocks rallied today.', 'model-a', '2'))
+
+    # 2. The LRU tier evicts the least recently used entry and counts the eviction
+    def test_memory_tier_eviction(self):
+        cache = AnalysisCache(max_entries=2)
+        cache.set('a', sample_analysis())
+        cache.set('b', sample_analysis())
+        cache.get('a') # 'a' becomes most recently used
+        cache.set('c', sample_analysis())
+        self.assertIsNone(cache.get('b'), "Least recently used entry should have been evicted.")
+        self.assertIsNotNone(cache.get('a'))
+        stats = cache.stats()
+        self.assertEqual(stats['memory_evictions'], 1)
+        self.assertEqual(stats['memory_hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+
+    # 3. The SQLite tier survives a new cache instance and expires entries after the TTL
+    def test_disk_tier_persistence_and_ttl(self):
+        AnalysisCache(max_entries=0, db_path=self.db_path).set('k', sample_analysis(0.3))
+        reloaded = AnalysisCache(max_entries=10, db_path=self.db_path)
+        cached = reloaded.get('k')
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.sentiment_score, 0.3)
+        self.assertEqual(reloaded.stats()['disk_hits'], 1)
+
+        short_lived = AnalysisCache(max_entries=0, db_path=self.db_path, ttl_seconds=-1)
+        short_lived.set('old', sample_analysis())
+        self.assertIsNone(short_lived.get('old'), "Expired entries should not be returned.")
+        self.assertEqual(short_lived.stats()['expired_evictions'], 1)
+
+    # 4. A repeated text is served from the cache without a second API call
+    def test_repeated_text_skips_network_call(self):
+        configure_analysis_cache(max_entries=10)
+        fake_response = MagicMock()
+        fake_response.choices[0].message.content = sample_analysis().model_dump_json()
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.return_value = fake_response
+        first = openai_api.analyze_text_data('The economy grew faster than expected this quarter.')
+        second = openai_api.analyze_text_data('The economy grew  faster than expected this quarter. ')
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 1,
+                         "Identical normalized text should only reach the API once.")
+        # Same analysis; only the usage telemetry differs (the cached copy cost nothing)
+        self.assertEqual(first.model_dump(), second.model_dump())
+        self.assertFalse(first.usage.cache_hit)
+        self.assertTrue(second.usage.cache_hit)
+
+    # 5. The process-wide counters are only served in debug mode or with CACHE_STATS_ENABLED
+    def test_stats_endpoint_is_gated(self):
+        app = create_app(TestingConfig)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            user = User(username='statsuser', email='stats@example.com')
+            user.set_password('statspass')
+            db.session.add(user)
+            db.session.commit()
+            client.post('/auth/login', data={'username': 'statsuser', 'password': 'statspass'})
+            self.assertEqual(client.get('/api/analysis_cache/stats').status_code, 404)
+            app.config['CACHE_STATS_ENABLED'] = True
+            response = client.get('/api/analysis_cache/stats')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('hit_ratio', response.get_json())
+            db.session.remove()
+            db.drop_all()
+
+if __name__ == '__main__':
+    unittest.main()
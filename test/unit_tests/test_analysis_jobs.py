@@ -0,0 +1,141 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db, openai_api
+from app.models import User, AnalysisJob, AnalysisReport
+from app.config import TestingConfig
+from app import jobs
+from app.jobs import claim_next_job, process_job, JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED
+from test.unit_tests.analysis_factories import fake_analysis
+
+class TestAnalysisJobs(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='jobuser', email='job@example.com')
+        self.user.set_password('jobpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'jobuser', 'password': 'jobpass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def submit_job(self):
+        return self.client.post('/api/analysis_jobs', data={
+            'report_name': 'Queued report',
+            'news_text': 'Markets rallied strongly today.---NEXT_ITEM---Tech shares slipped after earnings.'
+        })
+
+    # 1. Submitting returns 202 with a job id right away, without analyzing anything
+    def test_submission_is_queued(self):
+        with patch.object(openai_api, '_request_text_analysis') as mock_analysis:
+            response = self.submit_job()
+        self.assertEqual(response.status_code, 202)
+        data = response.get_json()
+        self.assertEqual(data['status'], JOB_QUEUED)
+        self.assertEqual(data['items_total'], 2)
+        self.assertEqual(response.headers['Location'], data['status_url'])
+        mock_analysis.assert_not_called()
+
+    # 2. A worker processes the job and the status endpoint reports progress and the report URL
+    def test_worker_completes_job(self):
+        job_id = self.submit_job().get_json()['job_id']
+        job = claim_next_job('worker-a')
+        self.assertEqual(job.id, job_id)
+        self.assertEqual(job.status, JOB_RUNNING)
+
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            self.assertTrue(process_job(job, 'worker-a', heartbeat=False))
+
+        data = self.client.get(f'/api/analysis_jobs/{job_id}').get_json()
+        self.assertEqual(data['status'], JOB_COMPLETED)
+        self.assertEqual((data['items_done'], data['items_failed'], data['items_total']), (2, 0, 2))
+        report = db.session.get(AnalysisReport, data['analysis_report_id'])
+        self.assertEqual(report.name, 'Queued report')
+        self.assertIn(f'/results_dashboard/{report.id}', data['report_url'])
+
+    # 3. A job whose lease expired is claimed again by another worker
+    def test_expired_lease_is_reclaimed(self):
+        self.submit_job()
+        job = claim_next_job('crashed-worker')
+        self.assertIsNone(claim_next_job('worker-b'), "A leased job must not be claimed twice.")
+
+        # Simulate the first worker dying: its lease runs out without being renewed
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.session.commit()
+        reclaimed = claim_next_job('worker-b')
+        self.assertIsNotNone(reclaimed)
+        self.assertEqual(reclaimed.lease_owner, 'worker-b')
+        self.assertEqual(reclaimed.attempts, 2)
+
+    # 4. Users cannot see other users' jobs
+    def test_job_status_requires_owner(self):
+        job_id = self.submit_job().get_json()['job_id']
+        db.session.get(AnalysisJob, job_id).user_id = self.user.id + 1
+        db.session.commit()
+        self.assertEqual(self.client.get(f'/api/analysis_jobs/{job_id}').status_code, 404)
+
+    # 5. A worker that loses its lease before completing the job does not leave a report behind
+    def test_lost_lease_creates_no_report(self):
+        self.submit_job()
+        job = claim_next_job('worker-a')
+
+        def steal_lease_then_create(*args, **kwargs):
+            # Another worker takes the job over after every item was analyzed
+            db.session.get(AnalysisJob, job.id).lease_owner = 'worker-b'
+            db.session.commit()
+            return create_analysis_report(*args, **kwargs)
+
+        create_analysis_report = jobs.create_analysis_report
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis), \
+                patch.object(jobs, 'create_analysis_report', side_effect=steal_lease_then_create):
+            self.assertFalse(process_job(job, 'worker-a', heartbeat=False))
+
+        self.assertEqual(db.session.scalar(db.select(db.func.count(AnalysisReport.id))), 0)
+        job = db.session.get(AnalysisJob, job.id, populate_existing=True)
+        self.assertEqual((job.status, job.lease_owner, job.analysis_report_id), (JOB_RUNNING, 'worker-b', None))
+
+    # 6. Submissions to the Analyze form above ANALYSIS_QUEUE_MIN_ITEMS are queued instead of analyzed in the request
+    def test_large_submission_is_queued(self):
+        self.app.config['ANALYSIS_QUEUE_MIN_ITEMS'] = 2
+        form = {'report_name': 'Big paste',
+                'news_text': 'Markets rallied strongly today.---NEXT_ITEM---Tech shares slipped after earnings.'}
+        with patch.object(openai_api, '_request_text_analysis') as mock_analysis:
+            ajax = self.client.post('/analyze', data=form, headers={'X-Requested-With': 'XMLHttpRequest'})
+            streamed = self.client.post('/analyze/stream', data=form)
+            plain = self.client.post('/analyze', data=form)
+        mock_analysis.assert_not_called()
+        for response in (ajax, streamed):
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.get_json()['items_total'], 2)
+            self.assertEqual(response.headers['Location'], response.get_json()['status_url'])
+        self.assertEqual(plain.status_code, 302)
+        self.assertTrue(plain.headers['Location'].endswith('/results'))
+        self.assertEqual(db.session.scalar(db.select(db.func.count(AnalysisJob.id))), 3)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(AnalysisReport.id))), 0)
+
+        # Smaller submissions are still analyzed in the request
+        self.app.config['ANALYSIS_QUEUE_MIN_ITEMS'] = 3
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            response = self.client.post('/analyze', data=form, headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('report_id', response.get_json())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import patch
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db, openai_api
+from app.models import User, AnalysisReport
+from app.config import TestingConfig
+from test.unit_tests.analysis_factories import fake_analysis
+
+def stream_analysis(text):
+    # Texts about a slump come back negative, the rest positive
+    return fake_analysis(text, -0.6 if 'slump' in text else 0.7)
+
+def parse_events(body):
+    # Split a text/event-stream body into (event, data) pairs
+    events = []
+    for raw_event in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in raw_event.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+class TestAnalyzeStream(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        user = User(username='streamuser', email='stream@example.com')
+        user.set_password('streampass')
+        db.session.add(user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'streamuser', 'password': 'streampass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    # 1. One event per item, then a final event with the saved report and its aggregates
+    def test_stream_events(self):
+        news_text = 'Markets rallied strongly today.---NEXT_ITEM---Retail sales slump deepens.---NEXT_ITEM---Tech shares climbed again.'
+        with patch.object(openai_api, '_request_text_analysis', side_effect=stream_analysis):
+            response = self.client.post('/analyze/stream', data={'report_name': 'Streamed', 'news_text': news_text})
+            body = response.get_data(as_text=True) # Consume the stream while the patch is active
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+
+        events = parse_events(body)
+        self.assertEqual(events[0], ('start', {'items_total': 3}))
+        items = [data for event, data in events if event == 'item']
+        self.assertEqual(sorted(item['index'] for item in items), [0, 1, 2])
+        slump = next(item for item in items if item['index'] == 1)
+        self.assertEqual((slump['sentiment'], slump['sentiment_score'], slump['failed']), ('Negative', -0.6, False))
+        self.assertEqual(slump['keywords'], ['markets'])
+        self.assertEqual(slump['summary'], 'Retail sales slump d')
+
+        event, done = events[-1]
+        self.assertEqual(event, 'done')
+        report = db.session.get(AnalysisReport, done['report_id'])
+        self.assertEqual(report.name, 'Streamed')
+        self.assertEqual(done['items_total'], 3)
+        self.assertEqual(done['overall_sentiment_label'], report.overall_sentiment_label)
+        self.assertIn('News Report', done['aggregated_intents'])
+        self.assertIn(f'/results_dashboard/{report.id}', done['report_url'])
+
+    # 2. Invalid submissions are rejected with JSON errors before any stream starts
+    def test_invalid_submission(self):
+        with patch.object(openai_api, '_request_text_analysis') as mock_analysis:
+            response = self.client.post('/analyze/stream', data={'news_text': 'short'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('news_text', response.get_json()['errors'])
+        mock_analysis.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
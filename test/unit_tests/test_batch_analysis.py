@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.openai_client import configure_openai_client
+from app.analysis_cache import configure_analysis_cache
+from app.openai_api import (SingleNewsItemAnalysis, SentimentEnum, BATCH_OUTPUT_TOKENS_PER_ITEM,
+                            analyze_texts_concurrently, iter_text_analyses, pack_batches)
+
+def fake_completion(content):
+    # Mimic the shape of an OpenAI chat completion response
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+def batch_reply(messages, broken_text=None):
+    # Answer a batched prompt with one entry per item, echoing the text as the summary
+    items = json.loads(messages[1]['content'])
+    if broken_text and any(item['text'] == broken_text for item in items):
+        return fake_completion('{"items": [{"index": 0, "sentiment_label": "Furious"}]}')
+    return fake_completion(json.dumps({'items': [
+        {'index': item['index'], 'sentiment_label': 'Positive', 'sentiment_score': 0.4,
+         'intents': ['News Report'], 'keywords': ['markets'], 'summary': item['text']}
+        for item in reversed(items) # Out of order on purpose; results must still map by index
+    ]}))
+
+class TestBatchAnalysis(unittest.TestCase):
+    def setUp(self):
+        configure_analysis_cache(enabled=False)
+
+    def mock_openai_client(self):
+        # Injects a mock in place of the OpenAI class; the process-wide manager is reset after the test
+        mock_openai = MagicMock()
+        configure_openai_client(client_factory=mock_openai)
+        self.addCleanup(configure_openai_client)
+        return mock_openai
+
+    # 1. Packing respects the token budget and item cap while keeping input order
+    def test_pack_batches(self):
+        texts = ['x' * 400] * 5 # 100 estimated tokens each
+        per_item = 100 + BATCH_OUTPUT_TOKENS_PER_ITEM
+        batches = pack_batches(texts, token_budget=per_item * 2)
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+        self.assertEqual(pack_batches(texts, token_budget=10_000, max_items=3), [[0, 1, 2], [3, 4]])
+        # An oversized item still gets its own batch
+        self.assertEqual(pack_batches(['y' * 40_000, 'short text here'], token_budget=500), [[0], [1]])
+
+    # 2. A batched reply is mapped back to the inputs by index
+    def test_batched_results_follow_input_order(self):
+        texts = [f'Markets news article number {i}' for i in range(6)]
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = \
+            lambda **kwargs: batch_reply(kwargs['messages'])
+        results = analyze_texts_concurrently(texts, max_workers=2, batch_token_budget=100_000)
+        self.assertEqual([r.summary for r in results], texts)
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 1,
+                         "All six short items should fit into a single completion.")
+
+    # 3. An invalid batched reply is split and retried so only the bad item is re-run on its own
+    def test_invalid_batch_is_split(self):
+        texts = [f'Business article about topic {i}' for i in range(4)]
+        broken = texts[2]
+
+        def reply(**kwargs):
+            messages = kwargs['messages']
+            if messages[1]['content'] in texts: # Single-item prompt after splitting down to one item
+                summary = 'isolated' if messages[1]['content'] == broken else messages[1]['content']
+                return fake_completion(SingleNewsItemAnalysis(
+                    sentiment_label=SentimentEnum.NEGATIVE, sentiment_score=-0.5, summary=summary).model_dump_json())
+            return batch_reply(messages, broken_text=broken)
+
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = reply
+        results = analyze_texts_concurrently(texts, max_workers=1, batch_token_budget=100_000)
+        self.assertEqual([r.summary for r in results], [texts[0], texts[1], 'isolated', texts[3]])
+        # Full batch, both halves, then single-item prompts for the two items of the failing half
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 5)
+
+    # 4. An item that also fails on its own only fails itself; the other results of its batch are kept
+    def test_isolated_item_keeps_failing(self):
+        texts = [f'Business article about topic {i}' for i in range(8)]
+        broken = texts[2]
+        batch_sizes = []
+
+        def reply(**kwargs):
+            messages = kwargs['messages']
+            if messages[1]['content'] in texts: # Single-item prompt after splitting down to one item
+                batch_sizes.append(1)
+                if messages[1]['content'] == broken:
+                    return fake_completion('{"sentiment_label": "Furious"}')
+                return fake_completion(SingleNewsItemAnalysis(
+                    sentiment_label=SentimentEnum.NEGATIVE, sentiment_score=-0.5, summary=messages[1]['content']).model_dump_json())
+            batch_sizes.append(len(json.loads(messages[1]['content'])))
+            return batch_reply(messages, broken_text=broken)
+
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = reply
+        results = sorted(iter_text_analyses(texts, max_workers=1, batch_token_budget=100_000))
+        self.assertEqual(batch_sizes, [8, 4, 2, 2, 1, 1, 4]) # Only the failing half is split further
+        failed = [index for index, _, error in results if error is not None]
+        self.assertEqual(failed, [2])
+        self.assertEqual([analysis.summary for index, analysis, _ in results if index != 2], texts[:2] + texts[3:])
+
+if __name__ == '__main__':
+    unittest.main()
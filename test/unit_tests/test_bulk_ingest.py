@@ -0,0 +1,195 @@
+import sys
+import os
+import io
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db, openai_api
+from app.models import User, AnalysisJob, AnalysisReport, NewsItem
+from app.config import TestingConfig
+from app.ingest import iter_articles, ingest_articles, detect_format, IngestedArticle
+from app.reports import create_analysis_report
+from app.search import search_news_items
+from app.jobs import claim_next_job, process_job, fail_exhausted_jobs, JOB_COMPLETED, JOB_FAILED
+from test.unit_tests.analysis_factories import fake_analysis
+
+CSV_FEED = (
+    'Title,Body,Published_At,Source\n'
+    'Markets rally,"Stocks climbed, led by banks.",2024-05-01T08:30:00Z,Reuters\n'
+    'Empty row,,2024-05-02,AP\n'
+    'Rates hold,The central bank kept rates unchanged.,2024-05-03,Bloomberg\n'
+)
+
+class TestBulkIngest(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.upload_dir = tempfile.mkdtemp()
+        self.app.config['INGEST_UPLOAD_FOLDER'] = self.upload_dir
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='ingestuser', email='ingest@example.com')
+        self.user.set_password('ingestpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'ingestuser', 'password': 'ingestpass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    # 1. CSV columns are mapped case-insensitively, and rows without text are skipped
+    def test_csv_columns_mapped(self):
+        articles = list(iter_articles(io.BytesIO(CSV_FEED.encode()), 'feed.csv'))
+        self.assertEqual(len(articles), 2)
+        self.assertEqual(articles[0].text, 'Markets rally\nStocks climbed, led by banks.')
+        self.assertEqual(articles[0].source, 'Reuters')
+        self.assertEqual(articles[0].publication_date.isoformat(), '2024-05-01T08:30:00+00:00')
+        self.assertEqual(articles[1].publication_date.strftime('%Y-%m-%d'), '2024-05-03')
+
+    # 2. Gzipped NDJSON is decompressed on the fly; malformed lines are reported by number
+    def test_gzip_jsonl(self):
+        lines = [json.dumps({'content': f'Article number {i} about markets.', 'publisher': 'Wire'}) for i in range(3)]
+        payload = gzip.compress('\n'.join(lines + ['']).encode())
+        articles = list(iter_articles(io.BytesIO(payload), 'feed.ndjson.gz'))
+        self.assertEqual([a.source for a in articles], ['Wire'] * 3)
+        self.assertEqual(detect_format('feed.ndjson.gz'), 'jsonl')
+        with self.assertRaisesRegex(ValueError, 'Line 2'):
+            list(iter_articles(io.BytesIO(b'{"text": "Valid first line."}\n{broken\n'), 'feed.jsonl'))
+        with self.assertRaises(ValueError):
+            detect_format('feed.xlsx')
+
+    # 3. Articles are analyzed and committed in chunks, and the report aggregates cover all of them
+    def test_chunked_ingest(self):
+        articles = (IngestedArticle(f'Article number {i} about markets.', source='Wire') for i in range(5))
+        progress = []
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            report = ingest_articles(self.user.id, 'Bulk report', articles, chunk_size=2,
+                                     on_progress=lambda done, failed: progress.append(done))
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(db.session.scalar(db.select(db.func.count(NewsItem.id))
+                                           .where(NewsItem.analysis_report_id == report.id)), 5)
+        self.assertEqual(report.overall_sentiment_label, 'Positive')
+        self.assertEqual(json.loads(report.aggregated_keywords_json)[0]['value'], 5)
+        self.assertEqual(report.summary, 'Article number 4 abo')
+
+    # 4. A failure part-way through removes the partial report
+    def test_failed_ingest_is_rolled_back(self):
+        articles = [IngestedArticle(f'Article number {i} about markets.') for i in range(4)]
+        def stop_after_first_chunk(done, failed):
+            raise RuntimeError('lease lost')
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            with self.assertRaises(RuntimeError):
+                ingest_articles(self.user.id, 'Broken report', articles, chunk_size=2, on_progress=stop_after_first_chunk)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(AnalysisReport.id))), 0)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(NewsItem.id))), 0)
+
+    # 5. An upload is queued as a job; the worker builds the report and removes the file
+    def test_upload_endpoint_and_worker(self):
+        response = self.client.post('/api/ingest', data={
+            'report_name': 'Uploaded feed',
+            'news_file': (io.BytesIO(CSV_FEED.encode()), 'feed.csv')
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        self.assertEqual(len(os.listdir(self.upload_dir)), 1)
+
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            self.assertTrue(process_job(claim_next_job('worker-a'), 'worker-a', heartbeat=False))
+        job = db.session.get(AnalysisJob, job_id, populate_existing=True)
+        self.assertEqual((job.status, job.items_total, job.items_done), (JOB_COMPLETED, 2, 2))
+        self.assertEqual(os.listdir(self.upload_dir), [])
+        sources = db.session.scalars(db.select(NewsItem.source).where(NewsItem.analysis_report_id == job.analysis_report_id)).all()
+        self.assertEqual(sorted(sources), ['Bloomberg', 'Reuters'])
+
+        rejected = self.client.post('/api/ingest', data={'news_file': (io.BytesIO(b'x'), 'feed.txt')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(rejected.status_code, 400)
+
+    # 6. The report is hidden from listings, search and its dashboard until its last chunk is stored,
+    #    and its aggregates match a report created in one go
+    def test_report_hidden_until_complete(self):
+        texts = [f'Article number {i} about markets.' for i in range(5)]
+        seen = []
+        def check_hidden(done, failed):
+            report_id = db.session.scalar(db.select(AnalysisReport.id).where(AnalysisReport.name == 'Bulk report'))
+            seen.append((f'/results_dashboard/{report_id}"'.encode() in self.client.get('/results').data,
+                         self.client.get(f'/api/filtered_report_data/{report_id}').status_code,
+                         len(search_news_items(self.user.id, 'markets'))))
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            report = ingest_articles(self.user.id, 'Bulk report', (IngestedArticle(t) for t in texts), chunk_size=2,
+                                     on_progress=check_hidden)
+        self.assertEqual(seen, [(False, 404, 0)] * 3)
+        self.assertTrue(report.complete)
+        self.assertIn(f'/results_dashboard/{report.id}"'.encode(), self.client.get('/results').data)
+        self.assertEqual(len(search_news_items(self.user.id, 'markets')), 5)
+
+        expected = create_analysis_report(self.user.id, 'Reference', texts, [fake_analysis(t) for t in texts])
+        for column in ('overall_sentiment_score', 'aggregated_intents_json', 'aggregated_keywords_json',
+                       'sentiment_trend_json', 'total_prompt_tokens', 'max_item_latency_ms'):
+            self.assertEqual(getattr(report, column), getattr(expected, column), column)
+
+    # 7. A job retried after its worker died mid-file replaces the partial report the first attempt left
+    def test_retry_discards_partial_report(self):
+        response = self.client.post('/api/ingest', data={
+            'report_name': 'Uploaded feed',
+            'news_file': (io.BytesIO(CSV_FEED.encode()), 'feed.csv')
+        }, content_type='multipart/form-data')
+        job_id = response.get_json()['job_id']
+        partial = AnalysisReport(name='Uploaded feed', user_id=self.user.id, summary='', complete=False)
+        db.session.add(partial)
+        db.session.flush()
+        db.session.execute(db.update(AnalysisJob).where(AnalysisJob.id == job_id)
+                           .values(analysis_report_id=partial.id))
+        db.session.commit()
+        db.session.expunge(partial)
+        status = self.client.get(f'/api/analysis_jobs/{job_id}').get_json()
+        self.assertEqual((status['analysis_report_id'], status['report_url']), (None, None))
+
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            self.assertTrue(process_job(claim_next_job('worker-b'), 'worker-b', heartbeat=False))
+        job = db.session.get(AnalysisJob, job_id, populate_existing=True)
+        self.assertEqual(job.status, JOB_COMPLETED)
+        # The partial report and its link are gone; only the finished report remains
+        self.assertEqual(db.session.scalars(db.select(AnalysisReport.complete)).all(), [True])
+        self.assertEqual(db.session.scalar(db.select(db.func.count(NewsItem.id))
+                                           .where(NewsItem.analysis_report_id == job.analysis_report_id)), 2)
+
+    # 8. The uploaded file is removed when its job fails or is abandoned, not only when it completes
+    def test_failed_job_removes_upload(self):
+        def upload(payload, filename):
+            return self.client.post('/api/ingest', data={'news_file': (io.BytesIO(payload), filename)},
+                                    content_type='multipart/form-data').get_json()['job_id']
+
+        job_id = upload(b'{"text": "Valid first line about markets."}\n{broken\n', 'feed.jsonl')
+        with patch.object(openai_api, '_request_text_analysis', side_effect=fake_analysis):
+            self.assertFalse(process_job(claim_next_job('worker-a'), 'worker-a', heartbeat=False))
+        self.assertEqual(db.session.get(AnalysisJob, job_id, populate_existing=True).status, JOB_FAILED)
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+        # A job whose worker died on its last attempt
+        job_id = upload(CSV_FEED.encode(), 'feed.csv')
+        job = claim_next_job('crashed-worker', max_attempts=1)
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.session.commit()
+        self.assertEqual(fail_exhausted_jobs(max_attempts=1), 1)
+        self.assertEqual(db.session.get(AnalysisJob, job_id, populate_existing=True).status, JOB_FAILED)
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
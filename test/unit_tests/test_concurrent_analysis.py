@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import openai_api
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum, analyze_texts_concurrently, iter_text_analyses
+
+def traced_analysis(text):
+    # Build a deterministic result so each output can be traced back to its input text
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=0.5, summary=text)
+
+class TestConcurrentAnalysis(unittest.TestCase):
+    # 1. Results are returned in input order even when later items finish first
+    def test_results_keep_input_order(self):
+        delays = {'item 0 slow text': 0.2, 'item 1 fast text': 0.0, 'item 2 medium text': 0.1}
+
+        def slow_fake(text):
+            time.sleep(delays[text])
+            return traced_analysis(text)
+
+        with patch.object(openai_api, '_request_text_analysis', side_effect=slow_fake):
+            results = analyze_texts_concurrently(list(delays.keys()), max_workers=3)
+        self.assertEqual([r.summary for r in results], list(delays.keys()),
+                         "Concurrent analysis should return results in input order.")
+
+    # 2. A failing item falls back to the neutral default without affecting the others
+    def test_failed_item_does_not_block_others(self):
+        def flaky_fake(text):
+            if 'broken' in text:
+                raise RuntimeError('provider error')
+            return traced_analysis(text)
+
+        texts = ['first working text', 'this one is broken', 'third working text']
+        outcomes = {index: (analysis, error) for index, analysis, error in
+                    iter_text_analyses(texts, max_workers=2, analyze_fn=flaky_fake)}
+        self.assertEqual(len(outcomes), 3, "Every item should produce an outcome.")
+        self.assertIsInstance(outcomes[1][1], RuntimeError, "The failing item should report its error.")
+        self.assertEqual(outcomes[1][0].sentiment_label, SentimentEnum.NEUTRAL,
+                         "The failing item should fall back to a neutral result.")
+        self.assertIsNone(outcomes[0][1])
+        self.assertEqual(outcomes[2][0].summary, 'third working text')
+
+    # 3. No more than max_workers analyses run at the same time
+    def test_concurrency_cap_is_respected(self):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def tracking_fake(text):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return traced_analysis(text)
+
+        texts = [f'news item number {i}' for i in range(10)]
+        list(iter_text_analyses(texts, max_workers=3, analyze_fn=tracking_fake))
+        self.assertLessEqual(state['peak'], 3, "Concurrency should never exceed max_workers.")
+        self.assertGreater(state['peak'], 1, "Items should actually be analyzed concurrently.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import sys
+import os
+import unittest
+from datetime import timedelta
+
+import sqlalchemy as sa
+from werkzeug.http import http_date
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport
+from app.config import TestingConfig
+from app.reports import create_analysis_report, append_to_analysis_report
+from test.unit_tests.analysis_factories import make_analyses
+
+class TestConditionalRequests(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus a user the report can be shared with
+        self.user = User(username='etaguser', email='etag@example.com')
+        self.user.set_password('etagpass')
+        self.other = User(username='otheruser', email='other@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'etaguser', 'password': 'etagpass'}, follow_redirects=True)
+        self.report = create_analysis_report(self.user.id, 'ETag report', [f'News text {i}.' for i in range(30)],
+                                             make_analyses(30))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def record_statements(self):
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+        return statements
+
+    def version(self):
+        return db.session.scalar(sa.select(AnalysisReport.version).where(AnalysisReport.id == self.report.id))
+
+    # 1. A repeat dashboard view is answered with 304, without reading any news item
+    def test_dashboard_not_modified(self):
+        url = f'/results_dashboard/{self.report.id}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.headers['ETag'])
+        self.assertIsNotNone(first.last_modified)
+        self.assertEqual(first.headers['Cache-Control'], 'private, no-cache')
+
+        statements = self.record_statements()
+        repeat = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.data, b'')
+        self.assertEqual(repeat.headers['ETag'], first.headers['ETag'])
+        self.assertFalse([s for s in statements if 'FROM news_item' in s])
+
+        # If-Modified-Since applies without If-None-Match; a stale ETag is not overridden by it
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': http_date(first.last_modified)}).status_code, 304)
+        earlier = http_date(first.last_modified - timedelta(seconds=1))
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': earlier}).status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': '"stale"',
+                                                       'If-Modified-Since': http_date(first.last_modified)}).status_code, 200)
+
+    # 2. The feed API supports GET with conditional requests; POST keeps working unconditionally
+    def test_feed_api_not_modified(self):
+        url = f'/api/filtered_report_data/{self.report.id}'
+        first = self.client.get(url, query_string={'per_page': 10, 'keyword': 'topic1', 'include_total': 'true'})
+        self.assertEqual(first.status_code, 200)
+        data = first.get_json()
+        self.assertEqual(len(data['news_items']), 10)
+        self.assertEqual(data['total_items'], 15)
+        posted = self.client.post(url, json={'per_page': 10, 'keyword': 'topic1', 'include_total': True}).get_json()
+        self.assertEqual(posted, data)
+
+        statements = self.record_statements()
+        repeat = self.client.get(url, query_string={'per_page': 10, 'keyword': 'topic1', 'include_total': 'true'},
+                                 headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(repeat.status_code, 304)
+        self.assertFalse([s for s in statements if 'news_item' in s])
+
+        # Other filters or pages are other representations
+        next_page = self.client.get(url, query_string={'per_page': 10, 'keyword': 'topic1', 'cursor': data['next_cursor']},
+                                    headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(next_page.status_code, 200)
+        self.assertNotEqual(next_page.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(self.client.post(url, json={'per_page': 10}, headers={'If-None-Match': first.headers['ETag']}).status_code, 200)
+
+    # 3. Appending items and changing the sharing bump the version, so old ETags no longer match
+    def test_version_bumps(self):
+        url = f'/results_dashboard/{self.report.id}'
+        etag = self.client.get(url).headers['ETag']
+        version = self.version()
+
+        append_to_analysis_report(self.report, ['One more text.'], make_analyses(1))
+        self.assertGreater(self.version(), version)
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag, version = response.headers['ETag'], self.version()
+
+        self.client.post(f'/share_report/{self.report.id}', data={'share_with_username': 'otheruser'})
+        self.assertEqual(self.version(), version + 1)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+        # Saving the sharing form without changes keeps the version
+        version = self.version()
+        self.client.post(f'/manage_report_sharing/{self.report.id}', data={'users_to_share_with': [self.other.id]})
+        self.assertEqual(self.version(), version)
+        self.client.post(f'/manage_report_sharing/{self.report.id}', data={})
+        self.assertEqual(self.version(), version + 1)
+
+    # 4. Permissions are checked before the validators: a matching ETag does not grant access
+    def test_permission_checked_first(self):
+        url = f'/api/filtered_report_data/{self.report.id}'
+        etag = self.client.get(url).headers['ETag']
+        self.client.get('/auth/logout')
+        self.client.post('/auth/login', data={'username': 'otheruser', 'password': 'otherpass'}, follow_redirects=True)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport, NewsItem
+from app.config import TestingConfig
+from app.db_engine import sqlite_pragmas
+from app.reports import create_analysis_report
+from test.unit_tests.analysis_factories import make_analyses
+
+WRITERS, READERS, ITEMS_PER_REPORT = 2, 4, 20
+WRITES_PER_WRITER, READS_PER_READER = 10, 25
+
+class TestDbEngine(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.db_dir.cleanup)
+
+    def make_app(self, profile):
+        # A file database per profile, since WAL and mmap do not apply to :memory:
+        class FileDatabaseConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.db_dir.name, profile + '.db')}"
+            SQLITE_ENGINE_PROFILE = profile
+            SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': WRITERS + READERS, 'max_overflow': 0}
+        app = create_app(FileDatabaseConfig)
+        with app.app_context():
+            db.create_all()
+            user = User(username=f'{profile}user', email=f'{profile}@example.com')
+            user.set_password('enginepass')
+            db.session.add(user)
+            db.session.commit()
+        self.addCleanup(self.dispose, app)
+        return app
+
+    def dispose(self, app):
+        with app.app_context():
+            db.engine.dispose()
+
+    # 1. The production profile's PRAGMAs are set on every pooled connection
+    def test_production_pragmas_applied(self):
+        app = self.make_app('production')
+        with app.app_context():
+            with db.engine.connect() as conn:
+                pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                self.assertEqual(pragma('journal_mode'), 'wal')
+                self.assertEqual(pragma('synchronous'), 1) # NORMAL
+                self.assertEqual(pragma('busy_timeout'), 5000)
+                self.assertEqual(pragma('foreign_keys'), 1)
+                self.assertEqual(pragma('temp_store'), 2) # MEMORY
+                self.assertEqual(pragma('cache_size'), -65536)
+
+    # 2. Overrides are validated, and None drops a PRAGMA from the profile
+    def test_pragma_overrides(self):
+        self.assertEqual(sqlite_pragmas('production', {'busy_timeout': 100})['busy_timeout'], 100)
+        self.assertNotIn('mmap_size', sqlite_pragmas('production', {'mmap_size': None}))
+        self.assertEqual(sqlite_pragmas('default'), {})
+        with self.assertRaises(ValueError):
+            sqlite_pragmas('turbo')
+        with self.assertRaises(ValueError):
+            sqlite_pragmas('production', {'writable_schema': 'ON'})
+        with self.assertRaises(ValueError):
+            sqlite_pragmas('production', {'journal_mode': 'WAL; DROP TABLE user'})
+
+    def run_mixed_workload(self, app):
+        # Writers create reports while readers load report lists and item feeds
+        counts = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+        with app.app_context():
+            user_id = db.session.scalar(sa.select(User.id))
+
+        def writer():
+            with app.app_context():
+                for _ in range(WRITES_PER_WRITER):
+                    try:
+                        create_analysis_report(user_id, 'Concurrent', ['News text.'] * ITEMS_PER_REPORT,
+                                               make_analyses(ITEMS_PER_REPORT))
+                        outcome = 'writes'
+                    except OperationalError:
+                        db.session.rollback()
+                        outcome = 'locked'
+                    with lock:
+                        counts[outcome] += 1
+
+        def reader():
+            with app.app_context():
+                for _ in range(READS_PER_READER):
+                    try:
+                        db.session.scalars(sa.select(AnalysisReport).where(AnalysisReport.user_id == user_id)
+                                           .order_by(AnalysisReport.timestamp.desc()).limit(20)).all()
+                        db.session.scalars(sa.select(NewsItem).order_by(NewsItem.id.desc()).limit(50)).all()
+                        db.session.rollback() # End the read transaction
+                        outcome = 'reads'
+                    except OperationalError:
+                        db.session.rollback()
+                        outcome = 'locked'
+                    with lock:
+                        counts[outcome] += 1
+
+        threads = [threading.Thread(target=writer) for _ in range(WRITERS)] + \
+                  [threading.Thread(target=reader) for _ in range(READERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
+
+    # 3. Concurrent readers and writers under the production profile never hit 'database is locked'
+    def test_concurrent_workload(self):
+        counts = self.run_mixed_workload(self.make_app('production'))
+        self.assertEqual(counts, {'writes': WRITERS * WRITES_PER_WRITER, 'reads': READERS * READS_PER_READER, 'locked': 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import sys
+import os
+import re
+import unittest
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, NewsItem
+from app.config import TestingConfig
+from app.reports import create_analysis_report, append_to_analysis_report
+from app.feed import news_feed_page, encode_cursor, MAX_FEED_PAGE_SIZE
+from test.unit_tests.analysis_factories import make_analyses
+
+# Every fourth item is undated, and several items share each date
+FEED_FIELDS = dict(sentiment_score=lambda i: round((i % 11 - 5) / 5, 1), keywords=lambda i: [f'topic{i % 3}'],
+                   publication_date=lambda i: None if i % 4 == 0 else f'2024-{i % 12 + 1:02d}-{i % 5 + 1:02d}')
+
+class TestFeedPagination(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='feeduser', email='feed@example.com')
+        self.user.set_password('feedpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'feeduser', 'password': 'feedpass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, count):
+        return create_analysis_report(self.user.id, f'Feed {count}', [f'News text {i}.' for i in range(count)],
+                                      make_analyses(count, **FEED_FIELDS))
+
+    def feed_order(self, report_id):
+        # The feed order, as the OFFSET-based query produced it
+        return db.session.scalars(db.select(NewsItem.id).where(NewsItem.analysis_report_id == report_id).order_by(
+            NewsItem.publication_date.desc().nullslast(), NewsItem.id.desc())).all()
+
+    def post_feed(self, report_id, **filters):
+        response = self.client.post(f'/api/filtered_report_data/{report_id}', json=filters)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    # 1. Following next_cursor, then prev_cursor, visits every item once, in feed order
+    def test_cursor_walk(self):
+        report = self.create_report(45)
+        pages, data = [], self.post_feed(report.id, per_page=7)
+        self.assertFalse(data['has_prev'])
+        while True:
+            pages.append([item['id'] for item in data['news_items']])
+            if not data['has_next']:
+                break
+            data = self.post_feed(report.id, per_page=7, cursor=data['next_cursor'])
+        self.assertEqual([item_id for page in pages for item_id in page], self.feed_order(report.id))
+        self.assertEqual(len(pages), 7)
+        self.assertIsNone(data['next_cursor'])
+
+        back = []
+        while data['has_prev']:
+            data = self.post_feed(report.id, per_page=7, cursor=data['prev_cursor'])
+            back.append([item['id'] for item in data['news_items']])
+        self.assertEqual(back, pages[-2::-1])
+
+    # 2. Filters apply across pages; the total is optional, cached and refreshed after an append
+    def test_filters_and_total(self):
+        report = self.create_report(40)
+        data = self.post_feed(report.id, sentiment_min=0, per_page=5)
+        self.assertNotIn('total_items', data)
+        self.assertTrue(all(item['sentiment_score'] >= 0 for item in data['news_items']))
+
+        data = self.post_feed(report.id, keyword='topic1', include_total=True)
+        expected = sum(1 for i in range(40) if i % 3 == 1)
+        self.assertEqual(data['total_items'], expected)
+        append_to_analysis_report(report, ['Appended text.'], [make_analyses(2, **FEED_FIELDS)[1]]) # keyword topic1
+        self.assertEqual(self.post_feed(report.id, keyword='topic1', include_total=True)['total_items'], expected + 1)
+
+        dated = self.post_feed(report.id, date_range='2024-01-01 to 2024-12-31', per_page=100)
+        self.assertTrue(all(item['publication_date'] for item in dated['news_items']))
+        self.assertEqual(len(dated['news_items']), 30 + 1)
+
+    # 3. Page sizes are capped and bad input is rejected
+    def test_page_size_and_validation(self):
+        report = self.create_report(150)
+        self.assertEqual(len(self.post_feed(report.id, per_page=10_000)['news_items']), MAX_FEED_PAGE_SIZE)
+        url = f'/api/filtered_report_data/{report.id}'
+        self.assertEqual(self.client.post(url, json={'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.post(url, json={'per_page': 'all'}).status_code, 400)
+        self.assertEqual(self.client.post(url, json={'sentiment_min': 'low'}).status_code, 400)
+
+    # 4. A deep page seeks to its cursor through the feed index instead of skipping rows with OFFSET
+    def test_deep_page_uses_index(self):
+        report = self.create_report(300)
+        order = self.feed_order(report.id)
+        deep_cursor = encode_cursor(db.session.get(NewsItem, order[-10]))
+
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if 'FROM news_item' in statement:
+                statements.append((statement, parameters))
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            page = news_feed_page(report.id, cursor=deep_cursor, per_page=10)
+        finally:
+            sa.event.remove(db.engine, 'before_cursor_execute', on_execute)
+        self.assertEqual([item.id for item in page['items']], order[-9:])
+
+        self.assertTrue(statements)
+        for statement, parameters in statements:
+            if 'OFFSET' in statement: # SQLite renders LIMIT with a zero OFFSET
+                self.assertEqual(parameters[-1], 0)
+            plan = ' '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters))
+            self.assertIn('ix_news_item_report_feed', plan)
+            self.assertNotIn('USE TEMP B-TREE', plan)
+
+    # 5. The dashboard renders the aggregates and the first feed page only, and links to the next one
+    def test_dashboard_renders_first_page(self):
+        small, large = self.create_report(30), self.create_report(3_000)
+        small_html = self.client.get(f'/results_dashboard/{small.id}').get_data(as_text=True)
+        large_html = self.client.get(f'/results_dashboard/{large.id}').get_data(as_text=True)
+        self.assertLess(abs(len(large_html) - len(small_html)), 2_000)
+        feed_list = re.search(r'id="newsFeedList".*?</ul>', large_html, re.S).group(0)
+        self.assertEqual(feed_list.count('<li class="list-group-item">'), 10)
+
+        order = self.feed_order(large.id)
+        first_item = db.session.get(NewsItem, order[0])
+        self.assertIn(first_item.summary, large_html)
+        next_cursor = re.search(r'data-next-cursor="([^"]*)"', large_html).group(1)
+        data = self.post_feed(large.id, cursor=next_cursor, per_page=10)
+        self.assertEqual([item['id'] for item in data['news_items']], order[10:20])
+
+        last_page_html = self.client.get(f'/results_dashboard/{self.create_report(5).id}').get_data(as_text=True)
+        self.assertIn('data-next-cursor=""', last_page_html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import sys
+import os
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, NewsItem
+from app.config import TestingConfig
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum, AnalysisUsage
+from app.reports import create_analysis_report, news_item_values, insert_news_items
+from app.feed import news_feed_page, item_json, encode_with_items
+from test.unit_tests.analysis_factories import make_analyses
+
+# Values that need escaping in JSON: quotes and non-ASCII keywords
+JSON_FIELDS = dict(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=lambda i: round(i / 1000, 3),
+                   intents=['News Report', 'Opinion'], keywords=lambda i: [f'topic{i % 3}', 'Ünïcödé'],
+                   summary=lambda i: f'Headline "{i}"')
+
+class TestItemJson(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='jsonuser', email='json@example.com')
+        self.user.set_password('jsonpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'jsonuser', 'password': 'jsonpass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, count):
+        return create_analysis_report(self.user.id, 'JSON report', [f'News text {i}.' for i in range(count)],
+                                      make_analyses(count, **JSON_FIELDS))
+
+    def stored_items(self, report_id):
+        return db.session.scalars(sa.select(NewsItem).options(sa.orm.undefer(NewsItem.feed_json))
+                                  .where(NewsItem.analysis_report_id == report_id).order_by(NewsItem.id)).all()
+
+    # 1. The JSON stored at write time decodes to exactly what to_dict() returns
+    def test_fragment_matches_to_dict(self):
+        report = self.create_report(5)
+        values = [
+            news_item_values('A' * 300, SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0)),
+            news_item_values('Short text without a summary.', SingleNewsItemAnalysis(
+                sentiment_label=SentimentEnum.NEGATIVE, sentiment_score=-0.25, summary='',
+                usage=AnalysisUsage(model='gpt-4o-mini', prompt_tokens=120, completion_tokens=40, latency_ms=850)),
+                publication_date=datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2))), source='Wire')
+        ]
+        insert_news_items(report.id, values, [SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL,
+                                                                     sentiment_score=0.0)] * 2)
+        db.session.commit()
+        db.session.expire_all()
+        items = self.stored_items(report.id)
+        self.assertEqual(len(items), 7)
+        for item in items:
+            self.assertEqual(json.loads(item_json(item.id, item.feed_json)), item.to_dict())
+            self.assertEqual(json.loads(item_json(item.id, item.feed_json, NewsItem.usage_json(item))),
+                             item.to_dict(include_usage=True))
+        self.assertEqual(items[5].to_dict()['summary'], 'A' * 200 + '...')
+
+    # 2. Feed pages read only the ID, date and stored JSON of each item, and fall back for items without it
+    def test_feed_reads_stored_json(self):
+        report = self.create_report(25)
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+
+        page = news_feed_page(report.id, per_page=10, encoded=True)
+        entities = news_feed_page(report.id, per_page=10)
+        self.assertEqual([json.loads(item) for item in page['items']], [item.to_dict() for item in entities['items']])
+        self.assertEqual(page['next_cursor'], entities['next_cursor'])
+        self.assertNotIn('news_item.keywords', statements[0])
+
+        # The report's author also gets each item's usage, read from its columns
+        data = self.client.get(f'/api/filtered_report_data/{report.id}', query_string={'per_page': 10}).get_json()
+        self.assertEqual(data['news_items'], [item.to_dict(include_usage=True) for item in entities['items']])
+        self.assertEqual(data['next_cursor'], entities['next_cursor'])
+
+        # Items written without feed_json (e.g. by another client) are serialized on the fly
+        db.session.execute(sa.update(NewsItem).where(NewsItem.analysis_report_id == report.id).values(feed_json=None))
+        db.session.commit()
+        self.assertEqual([json.loads(item) for item in news_feed_page(report.id, per_page=10, encoded=True)['items']],
+                         [item.to_dict() for item in entities['items']])
+
+    # 3. Pre-encoded items are spliced into the response object as is
+    def test_encode_with_items(self):
+        self.assertEqual(json.loads(encode_with_items({'has_next': False, 'next_cursor': None}, ['{"id":1}', '{"id":2}'])),
+                         {'has_next': False, 'next_cursor': None, 'news_items': [{'id': 1}, {'id': 2}]})
+        self.assertEqual(json.loads(encode_with_items({}, [])), {'news_items': []})
+
+    # 4. A 100-item page spliced from the stored JSON decodes to the to_dict() serialization
+    def test_encoded_page_matches_to_dict(self):
+        report = self.create_report(150)
+        page = news_feed_page(report.id, per_page=100)
+        encoded = encode_with_items({}, news_feed_page(report.id, per_page=100, encoded=True)['items'])
+        self.assertEqual(json.loads(encoded), {'news_items': [item.to_dict() for item in page['items']]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from openai import OpenAIError
+
+from app import create_app
+from app.models import NewsItem
+from app.reports import news_item_values
+from app.openai_client import configure_openai_client
+from app.analysis_cache import configure_analysis_cache
+from app.analyzer_backend import configure_analyzer, get_analyzer, get_fallback_analyzer, create_backend
+from app.lexicon_analyzer import LexiconBackend, INTENT_RULES, analyze_text_locally
+from app.openai_api import (SentimentEnum, PREDEFINED_INTENT_TAGS, OpenAIBackend,
+                            analyze_text_data, analyze_texts_concurrently)
+from config import TestingConfig
+
+class TestLexiconAnalyzer(unittest.TestCase):
+    def setUp(self):
+        configure_analysis_cache(enabled=False)
+
+    def tearDown(self):
+        configure_analyzer('openai')
+
+    def mock_openai_client(self):
+        # Injects a mock in place of the OpenAI class; the process-wide manager is reset after the test
+        mock_openai = MagicMock()
+        configure_openai_client(client_factory=mock_openai)
+        self.addCleanup(configure_openai_client)
+        return mock_openai
+
+    # 1. Clearly positive and negative news get the matching label and score sign
+    def test_sentiment_direction(self):
+        positive = analyze_text_locally("The product launch was a massive success and customers love the new features.")
+        negative = analyze_text_locally("Profits plummeted after the scandal and investors fear a deeper crisis.")
+        self.assertEqual(positive.sentiment_label, SentimentEnum.POSITIVE)
+        self.assertGreater(positive.sentiment_score, 0)
+        self.assertEqual(negative.sentiment_label, SentimentEnum.NEGATIVE)
+        self.assertLess(negative.sentiment_score, 0)
+        for analysis in (positive, negative):
+            self.assertLessEqual(abs(analysis.sentiment_score), 1.0)
+
+    # 2. Negation flips the sentiment of the words that follow it
+    def test_negation(self):
+        self.assertEqual(analyze_text_locally("The quarterly results were good for the company.").sentiment_label,
+                         SentimentEnum.POSITIVE)
+        self.assertEqual(analyze_text_locally("The quarterly results were not good for the company.").sentiment_label,
+                         SentimentEnum.NEGATIVE)
+        self.assertEqual(analyze_text_locally("The council meets on Tuesday in the town hall.").sentiment_label,
+                         SentimentEnum.NEUTRAL)
+
+    # 3. Keywords skip stopwords, intents come from the predefined list and dates are normalized
+    def test_keywords_intents_and_date(self):
+        analysis = analyze_text_locally(
+            "Stock markets surged on January 5th, 2024 as analysts cheered strong quarterly earnings. "
+            "Shares of chip makers led the stock rally.")
+        self.assertEqual(analysis.keywords[0], 'stock')
+        self.assertNotIn('the', analysis.keywords)
+        self.assertIn('Stock Market Update', analysis.intents)
+        self.assertLessEqual(len(analysis.intents), 5)
+        self.assertTrue(set(analysis.intents) <= set(PREDEFINED_INTENT_TAGS))
+        self.assertTrue(set(INTENT_RULES) <= set(PREDEFINED_INTENT_TAGS))
+        self.assertEqual(analysis.publication_date, '2024-01-05')
+        self.assertEqual(analysis.summary, 'Stock markets surged on January 5th, 2024 as analysts cheered...')
+
+    # 4. Selecting the lexicon backend analyzes without ever creating an OpenAI client
+    def test_lexicon_backend_selected(self):
+        configure_analyzer('lexicon')
+        self.assertIsInstance(get_analyzer(), LexiconBackend)
+        mock_openai = self.mock_openai_client()
+        results = analyze_texts_concurrently(["Markets rallied strongly today on upbeat data."] * 3,
+                                             batch_token_budget=6000)
+        mock_openai.assert_not_called()
+        self.assertEqual([r.sentiment_label for r in results], [SentimentEnum.POSITIVE] * 3)
+        with self.assertRaises(ValueError):
+            create_backend('no-such-backend')
+
+    # 5. When OpenAI fails, the fallback backend analyzes the item instead of returning Neutral 0.0
+    def test_fallback_on_provider_outage(self):
+        configure_analyzer('openai', fallback='lexicon')
+        self.assertIsInstance(get_analyzer(), OpenAIBackend)
+        text = "Shares tumbled sharply after the company warned of heavy losses."
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = OpenAIError('Service unavailable')
+        single = analyze_text_data(text)
+        without_fallback = analyze_texts_concurrently([text])
+        self.assertEqual(single.sentiment_label, SentimentEnum.NEGATIVE)
+        # analyze_texts_concurrently only falls back when given a fallback backend
+        self.assertEqual(without_fallback[0].sentiment_score, 0.0)
+
+        # Degraded results are marked with the fallback backend in the item payload
+        self.assertEqual(single.usage.model, 'lexicon')
+        self.assertEqual(NewsItem(**news_item_values(text, single)).to_dict(include_usage=True)['usage']['model'], 'lexicon')
+
+    # 6. The fallback is opt-in: by default failed items are recorded as Neutral
+    @unittest.skipIf('ANALYZER_FALLBACK_BACKEND' in os.environ, 'fallback configured in the environment')
+    def test_fallback_disabled_by_default(self):
+        configure_analyzer('openai', fallback='lexicon')
+        create_app(TestingConfig)
+        self.assertIsNone(get_fallback_analyzer())
+
+if __name__ == '__main__':
+    unittest.main()
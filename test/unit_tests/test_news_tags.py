@@ -0,0 +1,83 @@
+import sys
+import os
+import unittest
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, NewsItem, NewsItemKeyword, NewsItemIntent
+from app.config import TestingConfig
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+from app.reports import create_analysis_report
+from app.news_tags import unique_tags, has_keyword, keyword_stats, intent_stats
+
+def analysis(score, intents, keywords):
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE if score > 0 else SentimentEnum.NEGATIVE,
+                                  sentiment_score=score, intents=intents, keywords=keywords)
+
+class TestNewsTags(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='taguser', email='tag@example.com')
+        self.user.set_password('tagpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'taguser', 'password': 'tagpass'}, follow_redirects=True)
+
+        self.report = create_analysis_report(self.user.id, 'Tagged report', ['one', 'two', 'three'], [
+            analysis(0.5, ['News Report'], ['Markets', 'markets', 'rates']),
+            analysis(-0.5, ['Opinion', 'News Report'], ['rates']),
+            analysis(0.1, ['Opinion'], ['markets rally']),
+        ])
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    # 1. Tags are written with the items: distinct strings only, compared case-insensitively
+    def test_tags_written_with_items(self):
+        self.assertEqual(unique_tags(['Markets', ' markets ', '', None, 'rates']), ['Markets', 'rates'])
+        keywords = db.session.execute(db.select(NewsItemKeyword.keyword, NewsItemKeyword.analysis_report_id)
+                                      .order_by(NewsItemKeyword.news_item_id, NewsItemKeyword.keyword)).all()
+        self.assertEqual([kw for kw, _ in keywords], ['Markets', 'rates', 'rates', 'markets rally'])
+        self.assertTrue(all(report_id == self.report.id for _, report_id in keywords))
+        self.assertEqual(db.session.scalar(db.select(db.func.count()).select_from(NewsItemIntent)), 4)
+
+    # 2. The dashboard filters match whole tags, case-insensitively, through the tag tables
+    def test_filtered_report_data_uses_tags(self):
+        url = f'/api/filtered_report_data/{self.report.id}'
+        data = self.client.post(url, json={'keyword': 'MARKETS', 'include_total': True}).get_json()
+        self.assertEqual(data['total_items'], 1) # 'markets rally' is a different keyword
+        data = self.client.post(url, json={'intent': 'opinion', 'include_total': True}).get_json()
+        self.assertEqual(data['total_items'], 2)
+        data = self.client.post(url, json={'intent': 'News Report', 'keyword': 'rates', 'include_total': True}).get_json()
+        self.assertEqual(data['total_items'], 2)
+
+    # 3. Tag counts are aggregated by the database
+    def test_tag_counts(self):
+        self.assertEqual([(s['text'], s['count']) for s in keyword_stats([self.report.id])],
+                         [('rates', 2), ('Markets', 1), ('markets rally', 1)])
+        self.assertEqual([(s['text'], s['count']) for s in intent_stats([self.report.id], limit=1)], [('News Report', 2)])
+        self.assertEqual(keyword_stats([self.report.id + 1]), [])
+
+    # 4. The keyword filter is answered from the composite index, not by scanning the items
+    def test_keyword_filter_uses_index(self):
+        query = db.select(NewsItem.id).where(NewsItem.analysis_report_id == self.report.id,
+                                             has_keyword('rates', report_id=self.report.id))
+        compiled = query.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')))
+        self.assertIn('ix_news_item_keyword_report_keyword', plan)
+        self.assertNotIn('SCAN news_item_keyword', plan)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import httpx
+from openai import RateLimitError, InternalServerError, BadRequestError
+
+from app.analysis_cache import configure_analysis_cache
+from app.analyzer_backend import configure_analyzer
+from app.openai_client import (OpenAIClientManager, TokenBucket, AdaptiveConcurrencyLimiter,
+                               configure_openai_client)
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum, analyze_texts_concurrently
+
+def api_error(error_class, status_code, headers=None):
+    # Build an SDK error the way the OpenAI client raises it for an HTTP error response
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class(f'HTTP {status_code}', response=response, body=None)
+
+class FakeClock:
+    # Stands in for time.monotonic/time.sleep so pacing can be tested without waiting
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestOpenAIClient(unittest.TestCase):
+    def mock_openai_client(self):
+        # Injects a mock in place of the OpenAI class; the process-wide manager is reset after the test
+        mock_openai = MagicMock()
+        configure_openai_client(client_factory=mock_openai)
+        self.addCleanup(configure_openai_client)
+        return mock_openai
+
+    # 1. The token bucket lets a full minute's budget through, then paces by requests and tokens
+    def test_token_bucket_pacing(self):
+        clock = FakeClock()
+        bucket = TokenBucket(requests_per_minute=2, tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.acquire(100), 0)
+        self.assertEqual(bucket.acquire(100), 0)
+        self.assertAlmostEqual(bucket.acquire(100), 30.0) # Waits for one request to refill (60s / 2)
+
+        bucket = TokenBucket(requests_per_minute=0, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.acquire(600), 0)
+        self.assertAlmostEqual(bucket.acquire(300), 30.0) # 300 tokens refill in half a minute
+        bucket.pause(5)
+        self.assertGreaterEqual(bucket.acquire(0), 5.0)
+
+    # 2. A 429 is retried after at least Retry-After seconds, and the bucket holds back everyone else
+    def test_retry_honours_retry_after(self):
+        clock = FakeClock()
+        manager = OpenAIClientManager(max_retries=3, backoff_base=0.01, client_factory=MagicMock(), sleep=clock.sleep)
+        manager.rate_limiter = TokenBucket(clock=clock, sleep=clock.sleep)
+        request = MagicMock(side_effect=[api_error(RateLimitError, 429, {'retry-after': '2'}),
+                                         api_error(InternalServerError, 503), 'ok'])
+        self.assertEqual(manager.call(request), 'ok')
+        self.assertEqual(request.call_count, 3)
+        self.assertGreaterEqual(sum(clock.sleeps), 2.0)
+        stats = manager.stats()
+        self.assertEqual((stats['requests'], stats['retries'], stats['throttled']), (3, 2, 1))
+
+    # 3. Client errors are not retried, and retries stop after max_retries
+    def test_retry_limits(self):
+        manager = OpenAIClientManager(max_retries=2, client_factory=MagicMock(), sleep=lambda seconds: None)
+        bad_request = MagicMock(side_effect=api_error(BadRequestError, 400))
+        with self.assertRaises(BadRequestError):
+            manager.call(bad_request)
+        self.assertEqual(bad_request.call_count, 1)
+
+        outage = MagicMock(side_effect=api_error(InternalServerError, 500))
+        with self.assertRaises(InternalServerError):
+            manager.call(outage)
+        self.assertEqual(outage.call_count, 3)
+        self.assertEqual(manager.stats()['failures'], 2)
+
+    # 4. The concurrency limit halves under overload or high latency and grows back on success
+    def test_adaptive_concurrency(self):
+        clock = FakeClock()
+        limiter = AdaptiveConcurrencyLimiter(max_limit=16, latency_target=5.0, clock=clock)
+        clock.now = 100.0
+        limiter.record(1.0, overloaded=True)
+        self.assertEqual(limiter.limit, 8)
+        clock.now += 10
+        limiter.record(30.0) # Average latency now above the target
+        self.assertEqual(limiter.limit, 4)
+        limiter = AdaptiveConcurrencyLimiter(max_limit=16, latency_target=5.0, clock=clock)
+        clock.now += 10
+        limiter.record(0.5, overloaded=True)
+        for _ in range(20):
+            limiter.record(0.5)
+        self.assertGreater(limiter.limit, 8)
+        self.assertLessEqual(limiter.limit, 16)
+
+    # 5. All analysis calls share one client instead of building a new one per item
+    def test_client_is_shared(self):
+        configure_analysis_cache(enabled=False)
+        configure_analyzer('openai')
+        reply = SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=0.5).model_dump_json()
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.return_value.choices[0].message.content = reply
+        analyze_texts_concurrently([f'Markets news article number {i}' for i in range(5)], max_workers=3)
+        mock_openai.assert_called_once()
+        self.assertEqual(mock_openai.call_args.kwargs['max_retries'], 0)
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 5)
+
+if __name__ == '__main__':
+    unittest.main()
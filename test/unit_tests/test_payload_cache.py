@@ -0,0 +1,179 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport
+from app.config import TestingConfig
+from app.reports import create_analysis_report, append_to_analysis_report
+from app.payload_cache import (PayloadCache, MemoryPayloadBackend, SQLitePayloadBackend, configure_payload_cache,
+                               get_payload_cache, ENTRY_OVERHEAD_BYTES)
+from test.unit_tests.analysis_factories import make_analyses
+
+class TestPayloadCache(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus a user the report can be shared with
+        self.user = User(username='payloaduser', email='payload@example.com')
+        self.user.set_password('payloadpass')
+        self.other = User(username='otheruser', email='other@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'payloaduser', 'password': 'payloadpass'}, follow_redirects=True)
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, count):
+        return create_analysis_report(self.user.id, 'Payload report', [f'News text {i}.' for i in range(count)],
+                                      make_analyses(count))
+
+    def dispose(self, app):
+        with app.app_context():
+            db.engine.dispose()
+
+    def record_statements(self):
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+        return statements
+
+    # 1. The in-process tier is an LRU bounded by the total size of its payloads
+    def test_memory_tier_byte_bound(self):
+        entry_size = len('k0') + 1000 + ENTRY_OVERHEAD_BYTES
+        memory = MemoryPayloadBackend(max_bytes=3 * entry_size)
+        for i in range(3):
+            memory.set(f'k{i}', i, b'x' * 1000)
+        memory.get('k0') # k1 is now the least recently used
+        memory.set('k3', 3, b'x' * 1000)
+        self.assertIsNone(memory.get('k1'))
+        self.assertIsNotNone(memory.get('k0'))
+        self.assertEqual(memory.stats(), {'entries': 3, 'bytes': 3 * entry_size, 'max_bytes': 3 * entry_size, 'evictions': 1})
+        memory.set('huge', 4, b'x' * 10_000) # Larger than the whole tier: not stored
+        self.assertIsNone(memory.get('huge'))
+        self.assertEqual(memory.invalidate_report(0), 1)
+        self.assertEqual(memory.stats()['bytes'], 2 * entry_size)
+
+    # 2. The SQLite tier is shared between processes, feeds their memory tiers and is bounded in size
+    def test_shared_tier(self):
+        path = os.path.join(self.directory, 'payload_cache.db')
+        first = PayloadCache([MemoryPayloadBackend(), SQLitePayloadBackend(path)])
+        second = PayloadCache([MemoryPayloadBackend(), SQLitePayloadBackend(path)]) # Another worker process
+        first.set('dashboard:1:1:abc', 1, b'{"a":1}')
+        self.assertEqual(second.get('dashboard:1:1:abc', 1), b'{"a":1}')
+        self.assertEqual(second.get('dashboard:1:1:abc', 1), b'{"a":1}')
+        stats = second.stats()
+        self.assertEqual((stats['shared_hits'], stats['memory_hits'], stats['hit_ratio']), (1, 1, 1.0))
+
+        first.invalidate_report(1)
+        self.assertIsNone(PayloadCache([SQLitePayloadBackend(path)]).get('dashboard:1:1:abc', 1))
+
+        shared = SQLitePayloadBackend(path, max_bytes=5000, ttl_seconds=60)
+        for i in range(10):
+            shared.set(f'feed:{i}:1:abc', i, b'x' * 1000)
+        shared.purge()
+        self.assertEqual(shared.stats()['bytes'], 5000)
+        self.assertIsNone(shared.get('feed:4:1:abc'))
+        self.assertIsNotNone(shared.get('feed:5:1:abc'))
+
+    # 3. Repeat dashboard and feed requests are served from the cache without reading items
+    def test_routes_use_cache(self):
+        report = self.create_report(30)
+        dashboard_url, feed_url = f'/results_dashboard/{report.id}', f'/api/filtered_report_data/{report.id}'
+        page = self.client.get(dashboard_url).data
+        feed = self.client.get(feed_url, query_string={'per_page': 10, 'keyword': 'topic1', 'include_total': 'true'}).get_json()
+
+        statements = self.record_statements()
+        self.assertEqual(self.client.get(dashboard_url).data, page)
+        # A POST with the same parameters shares the GET's entry
+        posted = self.client.post(feed_url, json={'per_page': 10, 'keyword': 'topic1', 'include_total': True}).get_json()
+        self.assertEqual(posted, feed)
+        self.assertFalse([s for s in statements if 'news_item' in s])
+
+        # The counters are operational data, only exposed in debug mode or when enabled
+        self.assertEqual(self.client.get('/api/payload_cache/stats').status_code, 404)
+        self.app.config['CACHE_STATS_ENABLED'] = True
+        stats = self.client.get('/api/payload_cache/stats').get_json()
+        self.assertTrue(stats['enabled'])
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (2, 2, 0.5))
+        self.assertEqual(stats['tiers']['memory']['entries'], 2)
+        self.assertGreater(stats['tiers']['memory']['bytes'], 0)
+
+    # 4. Appending items and changing the sharing drop the report's payloads
+    def test_invalidation(self):
+        report = self.create_report(5)
+        feed_url = f'/api/filtered_report_data/{report.id}'
+        self.client.get(f'/results_dashboard/{report.id}')
+        self.client.get(feed_url, query_string={'include_total': 'true'})
+        memory = get_payload_cache().tiers[0]
+        self.assertEqual(memory.stats()['entries'], 2)
+
+        append_to_analysis_report(report, ['One more text.'], make_analyses(1))
+        self.assertEqual(memory.stats()['entries'], 0)
+        self.assertEqual(self.client.get(feed_url, query_string={'include_total': 'true'}).get_json()['total_items'], 6)
+
+        self.client.post(f'/share_report/{report.id}', data={'share_with_username': 'otheruser'})
+        self.assertEqual(memory.stats()['entries'], 0)
+        self.assertEqual(get_payload_cache().stats()['invalidations'], 2)
+
+    # 5. A cached feed page is byte-for-byte the page the route builds without the cache
+    def test_cached_response_matches_uncached(self):
+        report = self.create_report(150)
+        url = f'/api/filtered_report_data/{report.id}'
+        configure_payload_cache(enabled=False)
+        uncached = self.client.get(url, query_string={'per_page': 100}).data
+        configure_payload_cache(max_bytes=1024 * 1024)
+        self.client.get(url, query_string={'per_page': 100})
+        statements = self.record_statements()
+        self.assertEqual(self.client.get(url, query_string={'per_page': 100}).data, uncached)
+        self.assertFalse([s for s in statements if 'news_item' in s])
+
+    # 6. A total counted by one worker is not reused for a version another worker created
+    def test_totals_follow_other_workers_appends(self):
+        class SharedDatabaseConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.directory, 'shared.db')}"
+        worker_a, worker_b = create_app(SharedDatabaseConfig), create_app(SharedDatabaseConfig)
+        with worker_a.app_context():
+            db.create_all()
+            user = User(username='workeruser', email='worker@example.com')
+            user.set_password('workerpass')
+            db.session.add(user)
+            db.session.commit()
+            report_id = create_analysis_report(user.id, 'Shared', [f'News text {i}.' for i in range(5)],
+                                               make_analyses(5)).id
+        for worker in (worker_a, worker_b):
+            self.addCleanup(self.dispose, worker)
+        client = worker_b.test_client()
+        worker_b.config['WTF_CSRF_ENABLED'] = False
+        client.post('/auth/login', data={'username': 'workeruser', 'password': 'workerpass'})
+        url = f'/api/filtered_report_data/{report_id}'
+        self.assertEqual(client.get(url, query_string={'include_total': 'true'}).get_json()['total_items'], 5)
+
+        with worker_a.app_context():
+            append_to_analysis_report(db.session.get(AnalysisReport, report_id), ['More text.'] * 3, make_analyses(3))
+        self.assertEqual(client.get(url, query_string={'include_total': 'true'}).get_json()['total_items'], 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import os
+import re
+import unittest
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User
+from app.config import TestingConfig
+from app.reports import create_analysis_report
+from test.unit_tests.analysis_factories import make_analysis
+
+# Plan steps that mean a table is read in full, or rows are sorted after reading them
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)(?! USING)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+def analysis(i):
+    return make_analysis(i, sentiment_score=round((i % 11 - 5) / 5, 1), keywords=[f'topic{i % 3}'])
+
+class TestQueryPlans(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus another user who shares a report with them
+        self.user = User(username='planuser', email='plan@example.com')
+        self.user.set_password('planpass')
+        self.other = User(username='planother', email='planother@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'planuser', 'password': 'planpass'}, follow_redirects=True)
+
+        self.report = create_analysis_report(self.user.id, 'Plan report', [f'News text {i}.' for i in range(30)],
+                                             [analysis(i) for i in range(30)])
+        shared = create_analysis_report(self.other.id, 'Shared report', ['Shared news text.'], [analysis(0)])
+        shared.shared_with_recipients.append(db.session.get(User, self.user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def captured_selects(self, method, url, **kwargs):
+        """Sends a request and returns the SELECT statements it ran, with their parameters."""
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            response = self.client.open(url, method=method, **kwargs)
+        finally:
+            sa.event.remove(db.engine, 'before_cursor_execute', on_execute)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(statements)
+        return statements
+
+    def assert_plans_use_indexes(self, method, url, **kwargs):
+        for statement, parameters in self.captured_selects(method, url, **kwargs):
+            plan = [row[-1] for row in db.session.connection().exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            for step in plan:
+                scan = FULL_SCAN_RE.match(step)
+                self.assertFalse(scan and scan.group(1) in db.metadata.tables,
+                                 f'{url}: full table scan\n{statement}\n{plan}')
+                self.assertNotIn(TEMP_SORT, step, f'{url}: sort without an index\n{statement}\n{plan}')
+
+    # 1. The report feed reads items in index order, with and without filters
+    def test_feed_queries(self):
+        self.assert_plans_use_indexes('GET', f'/results_dashboard/{self.report.id}')
+        url = f'/api/filtered_report_data/{self.report.id}'
+        self.assert_plans_use_indexes('POST', url, json={'sentiment_min': -0.2, 'sentiment_max': 0.6})
+        self.assert_plans_use_indexes('POST', url, json={'date_range': '2024-05-02 to 2024-05-09', 'sentiment_min': 0})
+        self.assert_plans_use_indexes('POST', url, json={'keyword': 'topic1', 'per_page': 5, 'include_total': True})
+
+    # 2. A user's report lists and sentiment counts
+    def test_report_list_queries(self):
+        self.assert_plans_use_indexes('GET', '/results')
+        self.assert_plans_use_indexes('GET', '/visualization')
+
+    # 3. Reports shared with the user are found by recipient
+    def test_share_queries(self):
+        self.assert_plans_use_indexes('GET', '/shared_with_me')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import random
+import unittest
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.reports import prepare_report_aggregates, ReportAggregator
+
+# Same columns stored_items_aggregator() streams from the database
+ItemRow = namedtuple('ItemRow', 'id intents keywords sentiment_score publication_date')
+
+INTENTS = ['Inform', 'Persuade', 'Warn', 'Promote', 'Criticize', 'Entertain', 'Analyze']
+START_DATE = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+def make_rows(count, seed=37):
+    # Synthetic items: 1-2 intents, 3-6 keywords from a 500-word vocabulary, 30 publication days
+    rng = random.Random(seed)
+    vocabulary = [f'topic{i}' for i in range(500)]
+    return [ItemRow(i,
+                    json.dumps(rng.sample(INTENTS, rng.randint(1, 2))),
+                    json.dumps(rng.sample(vocabulary, rng.randint(3, 6))),
+                    round(rng.uniform(-1, 1), 2),
+                    START_DATE + timedelta(days=rng.randrange(30)))
+            for i in range(count)]
+
+class TestReportAggregates(unittest.TestCase):
+    # 1. Intent shares, keyword averages, trends and the overall score match hand-computed values
+    def test_aggregates_values(self):
+        rows = [
+            ItemRow(1, '["Inform"]', '["rates", "inflation"]', 0.6, START_DATE),
+            ItemRow(2, '["Inform", "Warn"]', '["rates"]', -0.4, START_DATE),
+            ItemRow(3, '["Warn"]', '["jobs"]', None, START_DATE),
+            ItemRow(4, 'not json', '["inflation"]', 0.2, START_DATE + timedelta(days=1)),
+        ]
+        result = prepare_report_aggregates(rows)
+
+        self.assertEqual(json.loads(result['aggregated_intents_json']), {'Inform': 50.0, 'Warn': 50.0})
+        keywords = {kw['text']: kw for kw in json.loads(result['aggregated_keywords_json'])}
+        self.assertEqual(keywords['rates']['value'], 2)
+        self.assertEqual(keywords['rates']['avg_sentiment'], 0.1)
+        self.assertEqual(keywords['inflation']['avg_sentiment'], 0.4)
+        self.assertEqual(keywords['inflation']['color'], 'green')
+        self.assertEqual(keywords['jobs']['avg_sentiment'], 0.0) # Unscored items count as 0 for keywords
+
+        trend = json.loads(result['sentiment_trend_json'])
+        self.assertEqual(trend['dates'], ['2024-05-01', '2024-05-02'])
+        self.assertEqual(trend['overall_scores'], [0.1, 0.2])
+        self.assertEqual(trend['keyword_trends']['rates'], [0.1, None])
+        self.assertEqual(trend['keyword_trends']['inflation'], [0.6, 0.2])
+        self.assertEqual(result['overall_sentiment_score'], 0.13)
+        self.assertEqual(result['overall_sentiment_label'], 'Neutral')
+
+    # 2. No items gives the same empty aggregates the report placeholders use
+    def test_empty_aggregates(self):
+        result = ReportAggregator().result()
+        self.assertEqual(json.loads(result['aggregated_intents_json']), {})
+        self.assertEqual(json.loads(result['aggregated_keywords_json']), [])
+        self.assertEqual(json.loads(result['sentiment_trend_json']),
+                         {'dates': [], 'overall_scores': [], 'keyword_trends': {}})
+        self.assertEqual(result['overall_sentiment_label'], 'Neutral')
+        self.assertEqual(result['overall_sentiment_score'], 0.0)
+
+    # 3. Aggregates merged from a saved state match a single pass over all items
+    def test_state_round_trip(self):
+        rows = make_rows(200)
+        aggregator = ReportAggregator()
+        for row in rows[:120]:
+            aggregator.add_item(row)
+        restored = ReportAggregator.from_state(aggregator.to_state())
+        for row in rows[120:]:
+            restored.add_item(row)
+        self.assertEqual(restored.result(), prepare_report_aggregates(rows))
+        self.assertIsNone(ReportAggregator.from_state(None))
+        self.assertIsNone(ReportAggregator.from_state('{"intent_counts": {}}'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import patch
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db, openai_api
+from app.models import User, AnalysisReport, NewsItem
+from app.config import TestingConfig
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+from app.reports import (create_analysis_report, append_to_analysis_report, prepare_report_aggregates,
+                         ReportAggregator)
+
+# Scores, keywords and dates per text, so every aggregate differs between the two halves
+FAKE_RESULTS = {
+    'Markets rallied strongly today.': (0.8, ['News Report'], ['markets', 'rally'], '2024-05-01'),
+    'Tech shares slipped after earnings.': (-0.5, ['Market Analysis'], ['tech', 'earnings'], '2024-05-01'),
+    'Retail sales slumped in May.': (-0.7, ['News Report', 'Warning'], ['retail', 'markets'], '2024-05-02'),
+    'Central bank holds rates steady.': (0.1, ['Policy Update'], ['rates', 'markets'], '2024-05-03'),
+}
+
+def scripted_analysis(text):
+    score, intents, keywords, date = FAKE_RESULTS[text]
+    label = SentimentEnum.POSITIVE if score > 0 else SentimentEnum.NEGATIVE
+    return SingleNewsItemAnalysis(sentiment_label=label, sentiment_score=score, intents=intents,
+                                  keywords=keywords, publication_date=date, summary=text[:20])
+
+class TestReportAppend(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='appenduser', email='append@example.com')
+        self.user.set_password('appendpass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'appenduser', 'password': 'appendpass'}, follow_redirects=True)
+
+        texts = list(FAKE_RESULTS)
+        self.first_texts, self.new_texts = texts[:2], texts[2:]
+        self.report = create_analysis_report(self.user.id, 'Daily monitor', self.first_texts,
+                                             [scripted_analysis(t) for t in self.first_texts])
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def assert_matches_full_recompute(self, report):
+        items = db.session.scalars(db.select(NewsItem).where(NewsItem.analysis_report_id == report.id)).all()
+        expected = prepare_report_aggregates(items)
+        for column in ('aggregated_intents_json', 'aggregated_keywords_json', 'sentiment_trend_json'):
+            self.assertEqual(json.loads(getattr(report, column)), json.loads(expected[column]), column)
+        self.assertEqual(report.overall_sentiment_label, expected['overall_sentiment_label'])
+        self.assertAlmostEqual(report.overall_sentiment_score, expected['overall_sentiment_score'])
+
+    # 1. Appending through the API gives the same aggregates as recomputing over every item
+    def test_append_items_api(self):
+        with patch.object(openai_api, '_request_text_analysis', side_effect=scripted_analysis):
+            response = self.client.post(f'/api/reports/{self.report.id}/items',
+                                        data={'news_text': '---NEXT_ITEM---'.join(self.new_texts)})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['items_added'], 2)
+
+        report = db.session.get(AnalysisReport, self.report.id)
+        self.assertEqual(report.name, 'Daily monitor')
+        self.assertEqual(db.session.scalar(db.select(db.func.count(NewsItem.id))
+                                           .where(NewsItem.analysis_report_id == report.id)), 4)
+        self.assert_matches_full_recompute(report)
+        trend = json.loads(report.sentiment_trend_json)
+        self.assertEqual(trend['dates'], ['2024-05-01', '2024-05-02', '2024-05-03'])
+        self.assertEqual(data['overall_sentiment_score'], report.overall_sentiment_score)
+
+    # 2. Existing items are not reloaded: the stored state is merged with the new items only
+    def test_append_uses_stored_state(self):
+        report = db.session.get(AnalysisReport, self.report.id)
+        self.assertIsNotNone(ReportAggregator.from_state(report.aggregate_state_json))
+        with patch('app.reports.stored_items_aggregator') as mock_rebuild:
+            append_to_analysis_report(report, self.new_texts, [scripted_analysis(t) for t in self.new_texts])
+        mock_rebuild.assert_not_called()
+        self.assert_matches_full_recompute(report)
+
+    # 3. Reports saved before the state existed are rebuilt from their items once
+    def test_append_without_state(self):
+        db.session.execute(db.update(AnalysisReport).where(AnalysisReport.id == self.report.id)
+                           .values(aggregate_state_json=None))
+        db.session.commit()
+        report = db.session.get(AnalysisReport, self.report.id)
+        append_to_analysis_report(report, self.new_texts, [scripted_analysis(t) for t in self.new_texts])
+        self.assertIsNotNone(report.aggregate_state_json)
+        self.assert_matches_full_recompute(report)
+
+    # 4. Only the author can append to a report
+    def test_append_requires_author(self):
+        other = User(username='otheruser', email='other@example.com')
+        other.set_password('otherpass')
+        db.session.add(other)
+        db.session.commit()
+        other_report = create_analysis_report(other.id, 'Not mine', self.first_texts[:1],
+                                              [scripted_analysis(self.first_texts[0])])
+        with patch.object(openai_api, '_request_text_analysis', side_effect=scripted_analysis) as mock_analysis:
+            response = self.client.post(f'/api/reports/{other_report.id}/items',
+                                        data={'news_text': self.new_texts[0]})
+        self.assertEqual(response.status_code, 404)
+        mock_analysis.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport, NewsItem, NewsItemKeyword
+from app.config import TestingConfig
+from app.reports import create_analysis_report
+from test.unit_tests.analysis_factories import make_analyses
+
+BULK_FIELDS = dict(sentiment_score=lambda i: round((i % 21 - 10) / 10, 1),
+                   keywords=lambda i: [f'topic{i % 50}', f'topic{i % 7}'],
+                   publication_date=lambda i: None if i % 29 == 0 else f'2024-05-{i % 28 + 1:02d}')
+
+class TestReportBulkInsert(unittest.TestCase):
+    def setUp(self):
+        # A file database, so commits go through the same journal as in production
+        self.db_dir = tempfile.TemporaryDirectory()
+        class FileDatabaseConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.db_dir.name, 'bulk.db')}"
+        self.app = create_app(FileDatabaseConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.user = User(username='bulkuser', email='bulk@example.com')
+        self.user.set_password('bulkpass')
+        db.session.add(self.user)
+        db.session.commit()
+
+        # Count commits and statements sent to the database
+        self.commits = self.statements = 0
+        def on_commit(conn):
+            self.commits += 1
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            self.statements += 1
+        sa.event.listen(db.engine, 'commit', on_commit)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'commit', on_commit)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.db_dir.cleanup()
+
+    def create_report(self, count):
+        texts = [f'News article number {i} about the markets.' for i in range(count)]
+        analyses = make_analyses(count, **BULK_FIELDS)
+        self.commits = self.statements = 0
+        return create_analysis_report(self.user.id, f'Bulk {count}', texts, analyses)
+
+    # 1. Report, items, tags and aggregates are written in one transaction with one commit
+    def test_single_transaction(self):
+        report = self.create_report(1000)
+        self.assertEqual(self.commits, 1)
+        self.assertLess(self.statements, 50, "Items must be inserted in batches, not one statement per row.")
+
+        report = db.session.get(AnalysisReport, report.id)
+        self.assertEqual(db.session.scalar(sa.select(sa.func.count(NewsItem.id))
+                                           .where(NewsItem.analysis_report_id == report.id)), 1000)
+        self.assertEqual(db.session.scalar(sa.select(sa.func.count()).select_from(NewsItemKeyword)),
+                         sum(len({i % 50, i % 7}) for i in range(1000))) # Duplicate keywords are stored once
+        # Each tag row points at the item it came from
+        mismatched = [kw for kw, item_keywords in db.session.execute(
+            sa.select(NewsItemKeyword.keyword, NewsItem.keywords).join(NewsItem)) if kw not in json.loads(item_keywords)]
+        self.assertEqual(mismatched, [])
+        self.assertIsNotNone(report.aggregate_state_json)
+        self.assertEqual(len(json.loads(report.sentiment_trend_json)['dates']), 28)
+
+    # 2. A failed item insert leaves no partial report behind
+    def test_failed_write_leaves_nothing(self):
+        with patch('app.reports.insert_news_items', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                create_analysis_report(self.user.id, 'Broken', ['A news article text.'], make_analyses(1))
+        db.session.rollback()
+        self.assertEqual(db.session.scalar(sa.select(sa.func.count(AnalysisReport.id))), 0)
+        self.assertEqual(self.commits, 0)
+
+    # 3. Larger reports add no statements per item: 10 to 3,000 items each take one commit
+    def test_statements_independent_of_size(self):
+        statements = {}
+        for count in (10, 1_000, 3_000):
+            self.create_report(count)
+            self.assertEqual(self.commits, 1)
+            statements[count] = self.statements
+        self.assertEqual(statements[1_000], statements[10])
+        self.assertLess(statements[3_000], 20)
+
+if __name__ == '__main__':
+    unittest.main()
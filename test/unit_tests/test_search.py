@@ -0,0 +1,103 @@
+import sys
+import os
+import unittest
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, NewsItem
+from app.config import TestingConfig
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+from app.reports import create_analysis_report
+from app.search import build_match_query, _SEARCH_SQL
+
+def analysis(summary):
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, summary=summary)
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus another user who shares one report with them
+        self.user = User(username='searchuser', email='search@example.com')
+        self.user.set_password('searchpass')
+        self.other = User(username='otheruser', email='other@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'searchuser', 'password': 'searchpass'}, follow_redirects=True)
+
+        self.own_report = create_analysis_report(self.user.id, 'Own report', [
+            'Inflation slowed in April as energy prices fell.',
+            'The football season opened with a <b>surprise</b> win.',
+        ], [analysis('Inflation eases'), analysis('Season opener')])
+        self.shared_report = create_analysis_report(self.other.id, 'Shared report', [
+            'Central bank warns inflation inflation inflation may persist.',
+        ], [analysis('Bank warning')])
+        self.private_report = create_analysis_report(self.other.id, 'Private report', [
+            'Inflation data leaked before release.',
+        ], [analysis('Data leak')])
+        shared = db.session.merge(self.shared_report)
+        shared.shared_with_recipients.append(db.session.get(User, self.user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search', query_string=dict(q=q, **params))
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['results']
+
+    # 1. Results cover own and shared reports only, best BM25 match first
+    def test_search_scope_and_ranking(self):
+        results = self.search('inflation')
+        self.assertEqual([r['report_name'] for r in results], ['Own report', 'Shared report'])
+        self.assertLessEqual(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<mark>Inflation</mark>', results[0]['text_snippet'])
+        self.assertEqual(results[0]['summary_snippet'], '<mark>Inflation</mark> eases')
+        self.assertIn(f'/results_dashboard/{self.own_report.id}', results[0]['report_url'])
+        self.assertEqual(len(self.search('inflation', limit=1, offset=1)), 1)
+
+    # 2. Stemming and prefixes match, and every word must appear
+    def test_search_terms(self):
+        self.assertEqual(len(self.search('price energies')), 1)
+        self.assertEqual(len(self.search('infla*')), 2)
+        self.assertEqual(self.search('inflation football'), [])
+
+    # 3. Query syntax and stored markup cannot break the query or the snippets
+    def test_search_input_is_sanitized(self):
+        self.assertEqual(build_match_query('inflation OR "bank" (NEAR'), '"inflation" "OR" "bank" "NEAR"')
+        self.assertIsNone(build_match_query('*** ---'))
+        results = self.search('surprise')
+        self.assertIn('&lt;b&gt;<mark>surprise</mark>&lt;/b&gt;', results[0]['text_snippet'])
+        self.assertEqual(self.client.get('/api/search?q=').status_code, 400)
+
+    # 4. The index follows updates and deletes made outside the ORM
+    def test_index_stays_in_sync(self):
+        db.session.execute(db.update(NewsItem).where(NewsItem.analysis_report_id == self.own_report.id)
+                           .values(summary='Updated headline'))
+        db.session.execute(db.delete(NewsItem).where(NewsItem.analysis_report_id == self.shared_report.id))
+        db.session.commit()
+        self.assertEqual(len(self.search('headline')), 2)
+        self.assertEqual([r['report_name'] for r in self.search('inflation')], ['Own report'])
+
+    # 5. The search starts from the full-text index and looks items up by primary key
+    def test_search_uses_fts_index(self):
+        plan = ' '.join(row[-1] for row in db.session.execute(
+            db.text(f'EXPLAIN QUERY PLAN {_SEARCH_SQL.element.text}'),
+            {'match': '"inflation"', 'user_id': self.user.id, 'limit': 20, 'offset': 0}))
+        self.assertIn('news_item_fts VIRTUAL TABLE INDEX', plan)
+        self.assertIn('SEARCH news_item USING INTEGER PRIMARY KEY', plan)
+
+if __name__ == '__main__':
+    unittest.main()
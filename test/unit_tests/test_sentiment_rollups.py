@@ -0,0 +1,133 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport, NewsItem, UserDailySentiment
+from app.config import TestingConfig
+from app.openai_api import SentimentEnum
+from app.reports import create_analysis_report, append_to_analysis_report
+from app.ingest import ingest_articles, IngestedArticle
+from app.rollups import user_sentiment_counts, rebuild_sentiment_rollups
+from test.unit_tests.analysis_factories import make_analyses
+
+LABELS = [SentimentEnum.POSITIVE, SentimentEnum.NEUTRAL, SentimentEnum.NEGATIVE]
+
+def rollup_analyses(count, offset=0):
+    # Labels cycle through positive, neutral and negative
+    return make_analyses(count, sentiment_label=lambda i: LABELS[(i + offset) % 3],
+                         sentiment_score=lambda i: ((i + offset) % 3 - 1) * -0.5)
+
+class TestSentimentRollups(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user
+        self.user = User(username='rollupuser', email='rollup@example.com')
+        self.user.set_password('rolluppass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'rollupuser', 'password': 'rolluppass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, count, offset=0):
+        return create_analysis_report(self.user.id, 'Rollup report', [f'News text {i}.' for i in range(count)],
+                                      rollup_analyses(count, offset))
+
+    def counts_from_items(self):
+        # What the pages used to compute by loading every item
+        rows = db.session.execute(sa.select(NewsItem.sentiment_label, sa.func.count()).join(NewsItem.analysis_report)
+                                  .where(AnalysisReport.user_id == self.user.id).group_by(NewsItem.sentiment_label))
+        return dict(dict.fromkeys(['Positive', 'Neutral', 'Negative'], 0), **dict(rows.all()))
+
+    def rollup_rows(self):
+        return db.session.execute(sa.select(UserDailySentiment.day, UserDailySentiment.sentiment_label,
+                                            UserDailySentiment.item_count, UserDailySentiment.score_sum)
+                                  .order_by(UserDailySentiment.day, UserDailySentiment.sentiment_label)).all()
+
+    # 1. Creating, appending to and ingesting reports keep the rollups equal to the items
+    def test_rollups_follow_writes(self):
+        report = self.create_report(10)
+        self.assertEqual(user_sentiment_counts(self.user.id), {'Positive': 4, 'Neutral': 3, 'Negative': 3})
+        append_to_analysis_report(report, ['More text.', 'Even more.'], rollup_analyses(2, offset=2))
+        articles = [IngestedArticle(text=f'Ingested article {i}.', publication_date=None, source=None) for i in range(5)]
+        with patch('app.ingest.iter_text_analyses',
+                   side_effect=lambda texts, **kwargs: ((i, a, None) for i, a in enumerate(rollup_analyses(len(texts))))):
+            ingest_articles(self.user.id, 'Ingested', articles, chunk_size=2)
+
+        self.assertEqual(user_sentiment_counts(self.user.id), self.counts_from_items())
+        today = datetime.now(timezone.utc).date()
+        self.assertEqual({row.day for row in self.rollup_rows()}, {today})
+        positive = next(row for row in self.rollup_rows() if row.sentiment_label == 'Positive')
+        self.assertAlmostEqual(positive.score_sum, 0.5 * positive.item_count)
+
+    # 2. A failed ingest removes the counts of the chunks it had already committed
+    def test_failed_ingest_is_subtracted(self):
+        self.create_report(3)
+        before = self.rollup_rows()
+
+        def progress(done, failed):
+            raise RuntimeError('worker stopped')
+        articles = [IngestedArticle(text=f'Ingested article {i}.', publication_date=None, source=None) for i in range(4)]
+        with patch('app.ingest.iter_text_analyses',
+                   side_effect=lambda texts, **kwargs: ((i, a, None) for i, a in enumerate(rollup_analyses(len(texts))))):
+            with self.assertRaises(RuntimeError):
+                ingest_articles(self.user.id, 'Broken', articles, chunk_size=2, on_progress=progress)
+        self.assertEqual(self.rollup_rows(), before)
+
+    # 3. The backfill rebuilds the same rows, one per day and label
+    def test_rebuild(self):
+        self.create_report(9)
+        older = self.create_report(6, offset=1)
+        db.session.execute(sa.update(AnalysisReport).where(AnalysisReport.id == older.id)
+                           .values(timestamp=datetime(2024, 3, 1, 12, tzinfo=timezone.utc)))
+        db.session.commit()
+        rebuild_sentiment_rollups(self.user.id)
+        db.session.commit()
+        rebuilt = self.rollup_rows()
+        self.assertEqual(len(rebuilt), 6)
+        self.assertEqual(str(rebuilt[0].day), '2024-03-01')
+
+        db.session.execute(sa.delete(UserDailySentiment))
+        db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['rebuild-sentiment-rollups'])
+        self.assertIn('Wrote 6 daily sentiment rollup rows.', result.output)
+        self.assertEqual(self.rollup_rows(), rebuilt)
+
+    # 4. /results and /visualization count labels from the rollups without loading items
+    def test_pages_use_rollups(self):
+        for _ in range(5):
+            self.create_report(40)
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+
+        for url in ('/results', '/visualization'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        expected = self.counts_from_items()
+        pie_data = f"data: [{expected['Positive']}, {expected['Neutral']}, {expected['Negative']}]"
+        self.assertIn(pie_data.encode(), response.data)
+        self.assertFalse([s for s in statements if 'news_item.original_text' in s])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, AnalysisReport
+from app.config import TestingConfig
+from app.reports import create_analysis_report
+from app.analytics import user_tag_analytics, AnalyticsBudgetExceeded, DEFAULT_TIME_BUDGET_MS
+from test.unit_tests.analysis_factories import make_analyses
+
+def tag_analyses(count, keyword, score):
+    return make_analyses(count, sentiment_score=score, intents=lambda i: ['News Report', 'Opinion'] if i % 2 else ['News Report'],
+                         keywords=lambda i: [keyword, f'{keyword}-{i % 2}'])
+
+class TestTagAnalytics(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus a user who shares a report with them
+        self.user = User(username='tagsuser', email='tags@example.com')
+        self.user.set_password('tagspass')
+        self.other = User(username='otheruser', email='other@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'tagsuser', 'password': 'tagspass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, user, count, keyword, score, timestamp=None):
+        report = create_analysis_report(user.id, f'{keyword} report', [f'News text {i}.' for i in range(count)],
+                                        tag_analyses(count, keyword, score))
+        if timestamp:
+            db.session.execute(sa.update(AnalysisReport).where(AnalysisReport.id == report.id).values(timestamp=timestamp))
+            db.session.commit()
+        return report
+
+    def get_tags(self, **params):
+        response = self.client.get('/api/analytics/tags', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    # 1. Own and shared reports are aggregated; other users' reports are not
+    def test_scope_and_aggregates(self):
+        self.create_report(self.user, 6, 'economy', 0.5)
+        self.create_report(self.user, 4, 'economy', -0.5)
+        shared = self.create_report(self.other, 3, 'sports', 1.0)
+        shared.shared_with_recipients.append(self.user)
+        db.session.commit()
+        self.create_report(self.other, 50, 'private', 0.0)
+
+        data = self.get_tags()
+        self.assertEqual(data['report_count'], 3)
+        keywords = {tag['text']: tag for tag in data['keywords']}
+        self.assertNotIn('private', keywords)
+        self.assertEqual(data['keywords'][0], {'text': 'economy', 'count': 10, 'avg_sentiment': 0.1})
+        self.assertEqual(keywords['sports']['count'], 3)
+        self.assertEqual(keywords['sports']['avg_sentiment'], 1.0)
+        self.assertEqual(data['intents'][0], {'text': 'News Report', 'count': 13, 'avg_sentiment': 0.3077})
+        self.assertEqual(data['intents'][1]['text'], 'Opinion')
+
+    # 2. Report and date filters narrow the scope; limits are capped and bad input is rejected
+    def test_filters_and_validation(self):
+        old = self.create_report(self.user, 5, 'archive', 0.0, timestamp=datetime(2024, 1, 15, tzinfo=timezone.utc))
+        self.create_report(self.user, 5, 'current', 0.0, timestamp=datetime(2024, 6, 15, tzinfo=timezone.utc))
+        foreign = self.create_report(self.other, 5, 'foreign', 0.0)
+
+        data = self.get_tags(start_date='2024-06-01', end_date='2024-06-15')
+        self.assertEqual(data['report_count'], 1)
+        self.assertEqual({tag['text'] for tag in data['keywords']}, {'current', 'current-0', 'current-1'})
+        data = self.get_tags(report_ids=f'{old.id},{foreign.id}', keyword_limit=1)
+        self.assertEqual(data['report_count'], 1)
+        self.assertEqual(data['keywords'], [{'text': 'archive', 'count': 5, 'avg_sentiment': 0.0}])
+        self.assertEqual(self.get_tags(report_ids=str(foreign.id)), {'report_count': 0, 'keywords': [], 'intents': []})
+        self.assertEqual(len(self.get_tags(keyword_limit=10_000)['keywords']), 6)
+
+        for params in ({'report_ids': 'one,two'}, {'start_date': '15/06/2024'}, {'keyword_limit': 0}):
+            self.assertEqual(self.client.get('/api/analytics/tags', query_string=params).status_code, 400)
+
+    # 3. Queries that run past the time budget are interrupted with a 503
+    def test_time_budget(self):
+        self.create_report(self.user, 300, 'economy', 0.5)
+        with self.assertRaises(AnalyticsBudgetExceeded):
+            user_tag_analytics(self.user.id, time_budget_ms=0.001)
+        self.app.config['ANALYTICS_TIME_BUDGET_MS'] = 0.001
+        response = self.client.get('/api/analytics/tags')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('did not finish within', response.get_json()['error'])
+        # The session is usable again, and the default budget lets the same query finish
+        self.app.config['ANALYTICS_TIME_BUDGET_MS'] = DEFAULT_TIME_BUDGET_MS
+        self.assertEqual(self.get_tags()['report_count'], 1)
+
+    # 4. Counts span many reports, and the items' texts are never read
+    def test_counts_across_reports(self):
+        for i in range(40):
+            self.create_report(self.user, 10, f'topic{i % 8}', (i % 5 - 2) / 2)
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+
+        data = self.get_tags(keyword_limit=20, intent_limit=5)
+        self.assertEqual(data['report_count'], 40)
+        self.assertEqual(data['keywords'][0]['count'], 50)
+        self.assertFalse([s for s in statements if 'original_text' in s])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import sys
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.models import User, NewsItem
+from app.config import TestingConfig
+from app.openai_api import SingleNewsItemAnalysis, SentimentEnum
+from app.reports import create_analysis_report
+from app.search import search_news_items
+from app.text_compression import (TextCodec, train_dictionary, configure_text_compression, get_text_codec,
+                                  FORMAT_RAW, FORMAT_ZLIB)
+
+SUBJECTS = ['The central bank', 'The government', 'Shares in the retailer', 'The energy regulator', 'Local officials']
+VERBS = ['announced on Tuesday that', 'said in a statement that', 'warned investors that', 'confirmed that']
+CLAIMS = ['inflation is expected to ease later this year', 'interest rates will remain unchanged',
+          'quarterly profits fell short of analyst expectations', 'the new policy will take effect next month',
+          'energy prices continue to weigh on households']
+
+def make_articles(count, seed=0):
+    # Short news articles sharing the phrasing of a real feed
+    rng = random.Random(seed)
+    return [' '.join(f'{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(CLAIMS)}, '
+                     f'according to a report published on {rng.randint(1, 28)} May.' for _ in range(rng.randint(2, 4)))
+            for _ in range(count)]
+
+def analysis(i):
+    return SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEUTRAL, sentiment_score=0.0, summary=f'Headline {i}')
+
+class TestTextCompression(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Create and log in a test user, plus a user whose items they cannot read
+        self.user = User(username='textuser', email='text@example.com')
+        self.user.set_password('textpass')
+        self.other = User(username='otheruser', email='other@example.com')
+        self.other.set_password('otherpass')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'textuser', 'password': 'textpass'}, follow_redirects=True)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_report(self, user, texts):
+        return create_analysis_report(user.id, 'Text report', texts, [analysis(i) for i in range(len(texts))])
+
+    def stored_values(self):
+        raw = sa.type_coerce(NewsItem.original_text, sa.types.NullType())
+        return db.session.execute(sa.select(NewsItem.id, raw).order_by(NewsItem.id)).all()
+
+    # 1. The codec round-trips any text and reads texts stored before compression
+    def test_codec_round_trip(self):
+        codec = TextCodec({1: train_dictionary(make_articles(50))})
+        for text in ['', 'Short.', 'Ünïcödé 新闻 ' * 40, make_articles(1)[0]]:
+            self.assertEqual(codec.decode(codec.encode(text)), text)
+        self.assertEqual(codec.encode('Short.')[0], FORMAT_RAW)
+        self.assertEqual(codec.encode(make_articles(1)[0])[:2], bytes((FORMAT_ZLIB, 1)))
+        self.assertEqual(codec.decode('Stored as plain text.'), 'Stored as plain text.')
+        self.assertFalse(codec.is_current(TextCodec().encode(make_articles(1)[0])))
+        with self.assertRaises(LookupError):
+            TextCodec().decode(codec.encode(make_articles(1)[0]))
+
+    # 2. A dictionary trained on the corpus compresses unseen articles better than plain zlib
+    def test_trained_dictionary(self):
+        training, held_out = make_articles(300, seed=1), make_articles(100, seed=2)
+        plain, trained = TextCodec(), TextCodec({1: train_dictionary(training)})
+        plain_size = sum(len(plain.encode(text)) for text in held_out)
+        trained_size = sum(len(trained.encode(text)) for text in held_out)
+        self.assertLess(trained_size, plain_size * 0.6)
+
+    # 3. Items are stored compressed, lists never select the text, and the detail API returns it
+    def test_storage_and_deferred_loading(self):
+        texts = make_articles(40)
+        report = self.create_report(self.user, texts)
+        stored = self.stored_values()
+        self.assertTrue(all(isinstance(value, bytes) for _, value in stored))
+        self.assertLess(sum(len(value) for _, value in stored), sum(len(text) for text in texts))
+
+        statements = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        sa.event.listen(db.engine, 'before_cursor_execute', on_execute)
+        self.addCleanup(sa.event.remove, db.engine, 'before_cursor_execute', on_execute)
+        self.assertEqual(self.client.get(f'/results_dashboard/{report.id}').status_code, 200)
+        feed = self.client.post(f'/api/filtered_report_data/{report.id}', json={'per_page': 20}).get_json()
+        self.assertNotIn('original_text', feed['news_items'][0])
+        self.assertFalse([s for s in statements if 'original_text' in s])
+
+        item_id = feed['news_items'][0]['id']
+        detail = self.client.get(f'/api/news_item/{item_id}').get_json()
+        self.assertEqual(detail['original_text'], db.session.get(NewsItem, item_id).original_text)
+        self.assertIn(detail['original_text'], texts)
+        other_report = self.create_report(self.other, ['Private article text.'])
+        other_item = db.session.scalar(sa.select(NewsItem.id).where(NewsItem.analysis_report_id == other_report.id))
+        self.assertEqual(self.client.get(f'/api/news_item/{other_item}').status_code, 403)
+
+    # 4. Full-text search indexes and highlights the decompressed text
+    def test_search_reads_decompressed_text(self):
+        self.create_report(self.user, make_articles(20) + ['A pipeline outage halted exports of liquefied gas.'])
+        results = search_news_items(self.user.id, 'liquefied')
+        self.assertEqual(len(results), 1)
+        self.assertIn('<mark>liquefied</mark> gas', results[0]['text_snippet'])
+
+    # 5. A dictionary trained by the CLI is used for new texts and by the re-encoding command
+    def test_train_and_recompress_commands(self):
+        texts = make_articles(200)
+        self.create_report(self.user, texts)
+        before = sum(len(value) for _, value in self.stored_values())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.app.config['TEXT_DICTIONARY_DIR'] = directory
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['train-text-dictionary', '--sample-size', '100'])
+        self.assertIn('1.zdict', result.output)
+        self.assertTrue(os.path.exists(os.path.join(directory, '1.zdict')))
+
+        configure_text_compression(db.engine, directory)
+        self.assertEqual(get_text_codec().dictionary_id, 1)
+        result = runner.invoke(args=['recompress-news-text', '--batch-size', '64'])
+        self.assertIn('Re-encoded 200 news texts with dictionary 1.', result.output)
+        stored = self.stored_values()
+        self.assertTrue(all(value[:2] == bytes((FORMAT_ZLIB, 1)) for _, value in stored))
+        self.assertLess(sum(len(value) for _, value in stored), before)
+        self.assertEqual(db.session.scalars(sa.select(NewsItem.original_text).order_by(NewsItem.id)).all(), texts)
+        self.assertEqual(len(search_news_items(self.user.id, 'quarterly profits', limit=100)),
+                         sum(1 for text in texts if 'quarterly profits' in text))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import os
+import unittest
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.openai_api import estimate_tokens
+from app.text_segmenter import (detect_split_mode, split_news_items, iter_news_items, SPLIT_MARKER,
+                                SPLIT_BLANK_LINE, SPLIT_LINE, OVERSIZE_TRIM)
+
+class TestTextSegmenter(unittest.TestCase):
+    # 1. Auto mode picks the marker, then blank lines, then single lines
+    def test_detect_split_mode(self):
+        self.assertEqual(detect_split_mode('First article.---NEXT_ITEM---Second article.'), SPLIT_MARKER)
+        self.assertEqual(detect_split_mode('First article\ncontinues here.\n  \nSecond article.'), SPLIT_BLANK_LINE)
+        self.assertEqual(detect_split_mode('First article.\nSecond article.'), SPLIT_LINE)
+
+    # 2. Each mode splits the same way the form's help text describes
+    def test_split_modes(self):
+        text = 'Stocks rallied strongly today.\nInvestors cheered the data.\n\nRetail sales slumped in May.'
+        self.assertEqual(split_news_items(text, 'blank'),
+                         ['Stocks rallied strongly today.\nInvestors cheered the data.', 'Retail sales slumped in May.'])
+        self.assertEqual(split_news_items(text, 'line'),
+                         ['Stocks rallied strongly today.', 'Investors cheered the data.', 'Retail sales slumped in May.'])
+        self.assertEqual(split_news_items(text, 'marker'), [text])
+        self.assertEqual(split_news_items('Article number one.---NEXT_ITEM---Article number two.'),
+                         ['Article number one.', 'Article number two.'])
+        with self.assertRaises(ValueError):
+            split_news_items(text, 'sentences')
+
+    # 3. Duplicates and fragments under 10 characters are dropped before analysis
+    def test_duplicates_and_fragments_dropped(self):
+        text = 'Markets rallied today.\nok\nMarkets   rallied today.\n\n\nTech shares slipped.'
+        self.assertEqual(split_news_items(text, 'line'), ['Markets rallied today.', 'Tech shares slipped.'])
+
+    # 4. Oversized items are split into parts within the limit, or trimmed to one part
+    def test_oversized_items(self):
+        sentence = 'The central bank kept interest rates unchanged this month. '
+        long_item = sentence * 40 # About 600 estimated tokens
+        parts = split_news_items(long_item, 'line', max_item_tokens=100)
+        self.assertGreater(len(parts), 1)
+        self.assertTrue(all(estimate_tokens(part) <= 100 for part in parts))
+        self.assertTrue(all(part.endswith('month.') for part in parts), "Parts should end at sentence boundaries.")
+
+        trimmed = split_news_items(long_item, 'line', max_item_tokens=100, oversize=OVERSIZE_TRIM)
+        self.assertEqual(len(trimmed), 1)
+        self.assertLessEqual(estimate_tokens(trimmed[0]), 100)
+        self.assertTrue(long_item.startswith(trimmed[0]))
+
+        # Without the limit the item passes through unchanged
+        self.assertEqual(split_news_items(long_item, 'line', max_item_tokens=None), [long_item.strip()])
+
+    # 5. Segmentation is lazy, so items can be consumed before the whole text is scanned
+    def test_iter_is_lazy(self):
+        items = iter_news_items('\n'.join(f'Article number {i} about markets.' for i in range(10_000)), 'line')
+        self.assertEqual(next(items), 'Article number 0 about markets.')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app, db
+from app.openai_client import configure_openai_client
+from app.analysis_cache import configure_analysis_cache
+from app.models import User, AnalysisReport, NewsItem
+from app.config import TestingConfig
+from app.openai_api import (SingleNewsItemAnalysis, SentimentEnum, AnalysisUsage, OPENAI_MODEL,
+                            analyze_texts_concurrently)
+from app.reports import create_analysis_report
+
+def fake_completion(content, prompt_tokens, completion_tokens, cached_tokens=0):
+    # Mimic an OpenAI chat completion, including its usage block
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = prompt_tokens
+    response.usage.completion_tokens = completion_tokens
+    response.usage.prompt_tokens_details.cached_tokens = cached_tokens
+    return response
+
+def single_reply(**kwargs):
+    return fake_completion(SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE,
+                                                  sentiment_score=0.5).model_dump_json(), 400, 100, cached_tokens=200)
+
+class TestUsageTelemetry(unittest.TestCase):
+    def setUp(self):
+        # Create a test Flask app instance with TestingConfig
+        self.app = create_app(TestingConfig)
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        configure_analysis_cache(max_entries=10)
+
+        # Create and log in a test user
+        self.user = User(username='usageuser', email='usage@example.com')
+        self.user.set_password('usagepass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.client.post('/auth/login', data={'username': 'usageuser', 'password': 'usagepass'}, follow_redirects=True)
+
+    def tearDown(self):
+        configure_analysis_cache(enabled=False)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def mock_openai_client(self):
+        # Injects a mock in place of the OpenAI class; the process-wide manager is reset after the test
+        mock_openai = MagicMock()
+        configure_openai_client(client_factory=mock_openai)
+        self.addCleanup(configure_openai_client)
+        return mock_openai
+
+    # 1. Usage is recorded per call, cache hits cost nothing, and cost follows the price table
+    def test_usage_recorded_per_item(self):
+        texts = ['Markets rallied strongly today.', 'Retail sales slumped in May.', 'Markets rallied strongly today.']
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = single_reply
+        results = analyze_texts_concurrently(texts[:2])
+        repeated = analyze_texts_concurrently(texts[2:])
+        usage = results[0].usage
+        self.assertEqual((usage.model, usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens),
+                         (OPENAI_MODEL, 400, 100, 200))
+        self.assertGreaterEqual(usage.latency_ms, 0)
+        self.assertAlmostEqual(usage.cost_usd, (200 * 0.10 + 200 * 0.025 + 100 * 0.40) / 1_000_000)
+        self.assertTrue(repeated[0].usage.cache_hit)
+        self.assertEqual(repeated[0].usage.cost_usd, 0.0)
+        # Telemetry never leaks into the cached payload or the model's schema
+        self.assertNotIn('usage', json.loads(results[0].model_dump_json()))
+
+    # 2. A batched completion's tokens are shared among its items
+    def test_batch_usage_is_split(self):
+        texts = ['Short markets item here.', 'A much longer markets news item ' * 4]
+        def batch_reply(**kwargs):
+            items = json.loads(kwargs['messages'][1]['content'])
+            return fake_completion(json.dumps({'items': [
+                {'index': item['index'], 'sentiment_label': 'Neutral', 'sentiment_score': 0.0} for item in items
+            ]}), 1000, 300)
+        mock_openai = self.mock_openai_client()
+        mock_openai.return_value.chat.completions.create.side_effect = batch_reply
+        results = analyze_texts_concurrently(texts, batch_token_budget=100_000)
+        self.assertEqual(sum(r.usage.prompt_tokens for r in results), 1000)
+        self.assertEqual(sum(r.usage.completion_tokens for r in results), 300)
+        self.assertGreater(results[1].usage.prompt_tokens, results[0].usage.prompt_tokens)
+
+    # 3. Items store their usage, reports roll it up, and the summary endpoint reports it
+    def test_report_rollup_and_summary(self):
+        analyses = [
+            SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=0.5,
+                                   usage=AnalysisUsage(model=OPENAI_MODEL, prompt_tokens=300, completion_tokens=80,
+                                                       latency_ms=900, retries=1)),
+            SingleNewsItemAnalysis(sentiment_label=SentimentEnum.NEGATIVE, sentiment_score=-0.5,
+                                   usage=AnalysisUsage(model=OPENAI_MODEL, prompt_tokens=200, completion_tokens=70,
+                                                       latency_ms=4000)),
+        ]
+        report = create_analysis_report(self.user.id, 'Usage report', ['First item text.', 'Second item text.'], analyses)
+        report = db.session.get(AnalysisReport, report.id, populate_existing=True)
+        self.assertEqual((report.total_prompt_tokens, report.total_completion_tokens, report.total_retries),
+                         (500, 150, 1))
+        self.assertEqual((report.total_latency_ms, report.max_item_latency_ms), (4900, 4000))
+        item = db.session.scalar(db.select(NewsItem).where(NewsItem.latency_ms == 900))
+        self.assertEqual(item.to_dict(include_usage=True)['usage']['prompt_tokens'], 300)
+
+        data = self.client.get('/api/usage_summary').get_json()
+        self.assertEqual((data['reports'], data['items'], data['prompt_tokens']), (1, 2, 500))
+        self.assertAlmostEqual(data['cost_usd'], report.total_cost_usd, places=6)
+        self.assertEqual(data['by_model'][0]['model'], OPENAI_MODEL)
+        self.assertEqual(data['slowest_items'][0]['latency_ms'], 4000)
+        self.assertEqual(data['costliest_reports'][0]['id'], report.id)
+
+    # 4. Item usage is served to the report's author only, not to the users it is shared with
+    def test_item_usage_only_for_author(self):
+        analysis = SingleNewsItemAnalysis(sentiment_label=SentimentEnum.POSITIVE, sentiment_score=0.5,
+                                          usage=AnalysisUsage(model=OPENAI_MODEL, prompt_tokens=300, completion_tokens=80))
+        report = create_analysis_report(self.user.id, 'Shared usage report', ['Shared item text.'], [analysis])
+        recipient = User(username='recipient', email='recipient@example.com')
+        recipient.set_password('recipientpass')
+        report.shared_with_recipients.append(recipient)
+        db.session.commit()
+        feed_url = f'/api/filtered_report_data/{report.id}'
+
+        owner_item = self.client.get(feed_url).get_json()['news_items'][0]
+        self.assertEqual((owner_item['usage']['model'], owner_item['usage']['prompt_tokens']), (OPENAI_MODEL, 300))
+        self.assertEqual(self.client.get(f"/api/news_item/{owner_item['id']}").get_json()['usage']['completion_tokens'], 80)
+
+        self.client.get('/auth/logout')
+        self.client.post('/auth/login', data={'username': 'recipient', 'password': 'recipientpass'}, follow_redirects=True)
+        shared_item = self.client.get(feed_url).get_json()['news_items'][0]
+        self.assertEqual(shared_item, {key: value for key, value in owner_item.items() if key != 'usage'})
+        self.assertNotIn('usage', self.client.get(f"/api/news_item/{owner_item['id']}").get_json())
+
+if __name__ == '__main__':
+    unittest.main()